@@ -5,50 +5,165 @@ Single agent acting as both issuer and verifier with minimal SSI steps.
 Uses the working issuer logic from the original implementation.
 """
 
+import argparse
 import asyncio
 import logging
+import multiprocessing
+import signal
+import socket
+import sys
 import aiohttp_cors
 from aiohttp import web
 from aiohttp.web import Application
 
 # Import our modules
 from src.backend.ssi_agent import SSIAgent
+from src.backend.agent_pool import AgentPool
 from src.backend.api_routes import routes
-from src.templates.templates import index_page
+from src.backend.webhooks import detect_webhooks
+from src.backend.webhooks import routes as webhook_routes
+from src.backend.bulk_routes import routes as bulk_routes
+from src.backend.campaign_routes import routes as campaign_routes
+from src.backend.tenants import TenantRegistry
+from src.backend.tenant_routes import routes as tenant_routes, tenant_middleware, tenant_route_defs
+from src.backend.events import event_bus
+from src.backend.metrics import LoopLagMonitor, metrics_middleware
+from src.backend.metrics import routes as metrics_routes
+from src.backend.compression import compression_middleware
+from src.backend.tracing import TracedStateStore, create_exporter, tracer, tracing_middleware
+from src.backend.config import Settings
+from src.backend.log_config import configure_logging, stop_logging
+from src.backend.qr_codes import QRCodeRenderer
+from src.backend.state_store import create_state_store
+from src.backend.retention import StateSweeper
+from src.backend.reconciler import FlowReconciler
+from src.backend.readiness import Readiness, readiness_middleware, supervise_bootstrap
+from src.backend.readiness import routes as readiness_routes
+from src.templates.templates import StaticAssets, index_page
+from src.templates.templates import routes as static_routes
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-async def init_agent(app: Application):
-    """Initialize the SSI agent"""
-    try:
-        # Use single agent on port 8021 (same as working Faber issuer)
-        agent = SSIAgent("http://localhost:8021")
-        
-        # Start HTTP session
-        await agent.start_session()
-        
+async def setup_agent(app: Application) -> bool:
+    """Resolve the schema and credential definition for the agent (one attempt)"""
+    settings = app["settings"]
+    agent = app["ssi_agent"]
+    
+    if settings.webhooks == "auto" and not app["webhook_state"]["enabled"]:
+        await detect_webhooks(app)
+    
+    if settings.schema_id and settings.cred_def_id:
+        # Ids bootstrapped by the parent process (or pinned by the operator)
+        agent.schema_id = settings.schema_id
+        agent.cred_def_id = settings.cred_def_id
+        setup_success = True
+    elif settings.bootstrap:
         # Setup schema and credential definition
         logger.info("Setting up schema and credential definition...")
         setup_success = await agent.setup_schema_and_cred_def()
-        
-        if setup_success:
-            logger.info("✅ Agent setup completed successfully")
-            logger.info(f"📋 Schema ID: {agent.schema_id}")
-            logger.info(f"🔑 Credential Definition ID: {agent.cred_def_id}")
-        else:
-            logger.error("❌ Failed to setup agent")
-            logger.error("💡 Make sure ACA-Py agent is running on http://localhost:8021")
-        
-        # Store agent in app for use in routes
-        app["ssi_agent"] = agent
-        
-        return setup_success
-        
-    except Exception as e:
-        logger.error(f"Error initializing agent: {str(e)}")
-        return False
+    else:
+        logger.warning("⚠️ Ledger bootstrap disabled; serving without a credential definition")
+        return True
+    
+    if setup_success:
+        logger.info("✅ Agent setup completed successfully")
+        logger.info(f"📋 Schema ID: {agent.schema_id}")
+        logger.info(f"🔑 Credential Definition ID: {agent.cred_def_id}")
+    else:
+        logger.error("❌ Failed to setup agent")
+        logger.error(f"💡 Make sure ACA-Py agent is running on {agent.admin_url}")
+    
+    return setup_success
+
+async def init_agent(app: Application):
+    """Initialize the SSI agent and bootstrap it in the background"""
+    # Use single agent (defaults to port 8021, same as working Faber issuer),
+    # or balance over several agents sharing the same DID and cred def
+    settings = app["settings"]
+    if len(settings.admin_urls) > 1:
+        # Which agent owns a connection is kept in the (possibly shared) state store
+        agent = AgentPool(settings.admin_urls, store=app["state_store"], **settings.pool_options())
+    else:
+        agent = SSIAgent(settings.admin_urls[0], **settings.agent_options())
+    
+    # Start HTTP session
+    await agent.start_session()
+    
+    # Store agent in app for use in routes
+    app["ssi_agent"] = agent
+    
+    if settings.multitenant:
+        # Subwallets live in one ACA-Py instance; with a pool, the first agent administers them
+        base = agent.members[0].agent if isinstance(agent, AgentPool) else agent
+        app["tenants"] = TenantRegistry(
+            app["state_store"],
+            base,
+            token_ttl=settings.tenant_token_ttl,
+            wallet_type=settings.tenant_wallet_type
+        )
+    
+    # The server starts accepting traffic now; agent routes answer 503 until ready
+    app["bootstrap_task"] = asyncio.ensure_future(supervise_bootstrap(
+        app["readiness"],
+        lambda: setup_agent(app),
+        retry_delay=settings.bootstrap_retry_delay,
+        max_retry_delay=settings.bootstrap_max_retry_delay
+    ))
+
+async def stop_bootstrap(app: Application):
+    """Cancel a bootstrap that is still retrying"""
+    task = app.get("bootstrap_task")
+    if task is not None and not task.done():
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+
+async def open_state_store(app: Application):
+    """Open the connection and campaign state store"""
+    await app["state_store"].open()
+
+async def start_state_sweeper(app: Application):
+    """Start compacting and evicting old connection records in the background"""
+    app["state_sweeper"].start()
+
+async def stop_state_sweeper(app: Application):
+    """Stop the background state sweeper"""
+    await app["state_sweeper"].stop()
+
+async def start_flow_reconciler(app: Application):
+    """Start advancing unfinished flows in the background, independently of browsers"""
+    app["flow_reconciler"].start()
+
+async def stop_flow_reconciler(app: Application):
+    """Stop the background flow reconciler"""
+    await app["flow_reconciler"].stop()
+
+async def start_loop_lag_monitor(app: Application):
+    """Start sampling event loop lag for /metrics"""
+    if "loop_lag_monitor" in app:
+        app["loop_lag_monitor"].start()
+
+async def stop_loop_lag_monitor(app: Application):
+    """Stop sampling event loop lag"""
+    if "loop_lag_monitor" in app:
+        await app["loop_lag_monitor"].stop()
+
+async def start_tracing(app: Application):
+    """Send spans to the configured exporter"""
+    settings = app["settings"]
+    tracer.configure(create_exporter(settings.tracing, settings.trace_path), settings.trace_sample_rate)
+
+async def stop_tracing(app: Application):
+    """Flush and close the span exporter"""
+    tracer.close()
+
+async def close_state_store(app: Application):
+    """Close the state store after background work has stopped"""
+    await app["state_store"].close()
 
 async def cleanup_agent(app: Application):
     """Cleanup agent session"""
@@ -60,15 +175,91 @@ async def cleanup_agent(app: Application):
     except Exception as e:
         logger.error(f"Error during cleanup: {str(e)}")
 
-async def create_app() -> Application:
+async def close_qr_renderer(app: Application):
+    """Shut down the QR rendering pool"""
+    app["qr_renderer"].close()
+
+async def cancel_campaigns(app: Application):
+    """Stop proof campaigns that are still sending requests"""
+    for task in list(app["campaign_tasks"]):
+        task.cancel()
+
+async def close_event_streams(app: Application):
+    """Finish open event streams so shutdown is not held up by idle browsers"""
+    event_bus.close()
+
+async def create_app(settings: Settings = None) -> Application:
     """Create and configure the web application"""
-    app = Application()
+    settings = settings or Settings()
+    # Metrics first so 503s from the readiness gate are counted too
+    middlewares = [metrics_middleware] if settings.metrics else []
+    if settings.tracing != "none":
+        middlewares.append(tracing_middleware)
+    if settings.compression:
+        middlewares.append(compression_middleware)
+    middlewares.append(readiness_middleware)
+    if settings.multitenant:
+        middlewares.append(tenant_middleware)
+    app = Application(middlewares=middlewares)
+    app["settings"] = settings
+    app["readiness"] = Readiness()
+    # Whether ACA-Py sends webhooks to this process (SSI_WEBHOOKS=auto)
+    app["webhook_state"] = {"enabled": False}
+    
+    # QR codes are rendered in a bounded pool, off the event loop
+    app["qr_renderer"] = QRCodeRenderer(
+        executor=settings.qr_executor,
+        max_workers=settings.qr_workers,
+        cache_size=settings.qr_cache_size
+    )
     
-    # Add main page route
+    # Connection flows and proof campaigns
+    app["state_store"] = create_state_store(settings.state_store, settings.state_db_path)
+    if settings.tracing != "none":
+        app["state_store"] = TracedStateStore(app["state_store"])
+    app["state_sweeper"] = StateSweeper(
+        app["state_store"],
+        idle_ttl=settings.state_idle_ttl,
+        completed_ttl=settings.state_completed_ttl,
+        interval=settings.state_sweep_interval
+    )
+    
+    # Flows advance even when no browser is polling their status routes
+    app["flow_reconciler"] = FlowReconciler(
+        app,
+        interval=settings.reconcile_interval,
+        batch_size=settings.reconcile_batch_size,
+        max_age=settings.reconcile_max_age
+    )
+    
+    # Background proof campaigns still sending requests
+    app["campaign_tasks"] = set()
+    
+    # Main page and its content-hashed assets, compressed once here
+    app["static_assets"] = StaticAssets()
     app.router.add_get('/', index_page)
+    app.router.add_routes(static_routes)
+    
+    # Liveness and readiness probes
+    app.router.add_routes(readiness_routes)
+    
+    # Prometheus metrics
+    if settings.metrics:
+        app.router.add_routes(metrics_routes)
+        app["loop_lag_monitor"] = LoopLagMonitor(settings.metrics_lag_interval)
     
     # Add API routes
     app.router.add_routes(routes)
+    app.router.add_routes(bulk_routes)
+    app.router.add_routes(campaign_routes)
+    
+    # Tenant management, and the API above namespaced under /api/tenants/{tenant_id}/
+    if settings.multitenant:
+        app.router.add_routes(tenant_routes)
+        app.router.add_routes(tenant_route_defs(routes, bulk_routes, campaign_routes))
+    
+    # Add ACA-Py webhook receiver
+    app.router.add_routes(webhook_routes)
     
     # Setup CORS
     cors = aiohttp_cors.setup(app, defaults={
@@ -85,24 +276,157 @@ async def create_app() -> Application:
         cors.add(route)
     
     # Setup startup and cleanup
+    app.on_startup.append(start_tracing)
+    app.on_startup.append(open_state_store)
+    app.on_startup.append(start_state_sweeper)
     app.on_startup.append(init_agent)
+    app.on_startup.append(start_flow_reconciler)
+    app.on_startup.append(start_loop_lag_monitor)
+    app.on_shutdown.append(stop_bootstrap)
+    app.on_shutdown.append(close_event_streams)
+    app.on_shutdown.append(cancel_campaigns)
+    app.on_shutdown.append(stop_state_sweeper)
+    app.on_shutdown.append(stop_flow_reconciler)
+    app.on_shutdown.append(stop_loop_lag_monitor)
     app.on_cleanup.append(cleanup_agent)
+    app.on_cleanup.append(close_qr_renderer)
+    app.on_cleanup.append(close_state_store)
+    app.on_cleanup.append(stop_tracing)
     
     return app
 
+async def bootstrap_ledger(settings: Settings) -> bool:
+    """Set up the schema and credential definition once, before workers start
+    
+    The resulting ids are stored on ``settings`` so every worker reuses them.
+    """
+    agent = SSIAgent(settings.admin_urls[0], **settings.agent_options())
+    await agent.start_session()
+    try:
+        if not await agent.setup_schema_and_cred_def():
+            return False
+        settings.schema_id = agent.schema_id
+        settings.cred_def_id = agent.cred_def_id
+        return True
+    finally:
+        await agent.close_session()
+
+def new_event_loop(use_uvloop: bool) -> asyncio.AbstractEventLoop:
+    """Create the event loop a server process runs on"""
+    if use_uvloop:
+        try:
+            import uvloop
+            return uvloop.new_event_loop()
+        except ImportError:
+            logger.warning("uvloop is not installed; using the default asyncio event loop")
+    return asyncio.new_event_loop()
+
+def share_state_between_workers(settings: Settings):
+    """Use the SQLite state store when several workers would otherwise each keep their own
+    
+    Requests for one flow land on any worker, so per-process memory state would
+    answer 404 for QR codes and "Connection not found" for most status polls.
+    """
+    if settings.workers > 1 and settings.state_store == "memory":
+        logger.warning(f"⚠️ Workers cannot share in-memory state; using the SQLite state store at "
+                       f"{settings.state_db_path}")
+        settings.state_store = "sqlite"
+
+def run_worker(settings: Settings, worker_index: int = 0):
+    """Serve the application in this process"""
+    if worker_index:
+        # One retention sweeper and one reconciler are enough for the shared state store
+        settings.state_sweep_interval = 0
+        settings.reconcile_interval = 0
+    
+    # Each process gets its own log listener thread; a forked worker does not inherit the parent's
+    configure_logging(**settings.logging_options())
+    
+    options = {}
+    if not settings.access_log:
+        options["access_log"] = None
+    
+    try:
+        web.run_app(
+            create_app(settings),
+            host=settings.host,
+            port=settings.port,
+            reuse_port=settings.workers > 1,
+            loop=new_event_loop(settings.uvloop),
+            **options
+        )
+    finally:
+        stop_logging()
+
+def parse_args(settings: Settings) -> argparse.Namespace:
+    """Command line options; defaults come from the SSI_* environment settings"""
+    parser = argparse.ArgumentParser(description="SSI Demo Application")
+    parser.add_argument("--host", default=settings.host, help="Interface to listen on")
+    parser.add_argument("--port", type=int, default=settings.port, help="Port to listen on")
+    parser.add_argument("--workers", type=int, default=settings.workers,
+                        help="Server processes sharing the port via SO_REUSEPORT")
+    parser.add_argument("--uvloop", action="store_true", default=settings.uvloop,
+                        help="Run on the uvloop event loop if it is installed")
+    parser.add_argument("--no-access-log", dest="access_log", action="store_false", default=settings.access_log,
+                        help="Disable per-request access logging")
+    return parser.parse_args()
+
 def main():
     """Main entry point"""
+    settings = Settings()
+    args = parse_args(settings)
+    settings.host = args.host
+    settings.port = args.port
+    settings.workers = max(args.workers, 1)
+    settings.uvloop = args.uvloop
+    settings.access_log = args.access_log
+    configure_logging(**settings.logging_options())
+    
     logger.info("🚀 Starting SSI Demo Application...")
     logger.info("📋 Single Agent - Issuer & Verifier")
-    logger.info("🌐 Web interface: http://localhost:8080")
+    logger.info(f"🌐 Web interface: http://localhost:{settings.port}")
     logger.info("📱 Make sure your Aries Bifold wallet is ready!")
-    logger.info("🔧 Make sure ACA-Py agent is running on port 8021")
+    logger.info(f"🔧 Make sure ACA-Py agent is running on {', '.join(settings.admin_urls)}")
+    
+    if settings.workers == 1:
+        # Run the web server
+        run_worker(settings)
+        return
+    
+    if not hasattr(socket, "SO_REUSEPORT"):
+        logger.error("❌ --workers needs SO_REUSEPORT, which this platform does not support")
+        sys.exit(1)
+    
+    share_state_between_workers(settings)
+    
+    # Bootstrap the ledger once here rather than once per worker
+    if settings.bootstrap and not (settings.schema_id and settings.cred_def_id):
+        logger.info("Setting up schema and credential definition...")
+        if not asyncio.run(bootstrap_ledger(settings)):
+            logger.error("❌ Failed to setup agent; workers will keep retrying in the background")
+    
+    logger.info(f"👷 Starting {settings.workers} workers")
+    processes = [
+        multiprocessing.Process(target=run_worker, args=(settings, index), name=f"ssi-worker-{index}")
+        for index in range(settings.workers)
+    ]
+    for process in processes:
+        process.start()
+    
+    def stop_workers(signum, frame):
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
     
-    # Create application
-    app = create_app()
+    signal.signal(signal.SIGTERM, stop_workers)
     
-    # Run the web server
-    web.run_app(app, host='0.0.0.0', port=8080)
+    for process in processes:
+        try:
+            process.join()
+        except KeyboardInterrupt:
+            # Workers receive the same SIGINT and shut down on their own
+            process.join()
+    stop_logging()
 
 if __name__ == '__main__':
     main()
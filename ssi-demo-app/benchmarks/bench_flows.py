@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+"""
+End-to-end Flow Benchmark for SSI Demo Application
+Runs the application from ``create_app()`` against the fake ACA-Py admin
+server (``benchmarks/fake_acapy.py``, started in a child process) and drives
+complete issue and verify flows the way the web page does: create an
+invitation, poll until connected, then poll until the credential is issued or
+the proof is verified. Reports flows/sec and p50/p95/p99 latencies for whole
+flows and for each route.
+
+    python benchmarks/bench_flows.py --flows 500 --concurrency 50 --latency 0.01
+"""
+
+import argparse
+import asyncio
+import logging
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List
+
+import aiohttp
+from aiohttp import web
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, APP_DIR)
+
+from benchmarks.fake_acapy import add_fake_acapy_arguments, create_fake_acapy_app, fake_acapy_options
+
+class FlowTimeout(Exception):
+    pass
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    """Nearest-rank percentile of an ascending list"""
+    if not sorted_values:
+        return 0.0
+    index = max(int(round(q / 100.0 * len(sorted_values) + 0.5)) - 1, 0)
+    return sorted_values[min(index, len(sorted_values) - 1)]
+
+class Recorder:
+    """Latency samples per flow kind and per route"""
+
+    def __init__(self):
+        self.flows: Dict[str, List[float]] = {}
+        self.flow_errors: Dict[str, int] = {}
+        self.routes: Dict[str, List[float]] = {}
+
+    def route(self, name: str, seconds: float):
+        self.routes.setdefault(name, []).append(seconds)
+
+    def flow(self, kind: str, seconds: float):
+        self.flows.setdefault(kind, []).append(seconds)
+
+    def flow_error(self, kind: str):
+        self.flow_errors[kind] = self.flow_errors.get(kind, 0) + 1
+
+class Client:
+    """Browser stand-in that times every call"""
+
+    def __init__(self, session: aiohttp.ClientSession, base_url: str, recorder: Recorder,
+                 poll_interval: float, flow_timeout: float):
+        self.session = session
+        self.base_url = base_url
+        self.recorder = recorder
+        self.poll_interval = poll_interval
+        self.flow_timeout = flow_timeout
+
+    async def call(self, method: str, path: str, name: str, json: dict = None) -> dict:
+        started = time.perf_counter()
+        async with self.session.request(method, f"{self.base_url}{path}", json=json) as resp:
+            body = await resp.json()
+        self.recorder.route(name, time.perf_counter() - started)
+        return body
+
+    async def poll(self, path: str, name: str, done: Callable[[dict], bool], deadline: float) -> dict:
+        while True:
+            body = await self.call("GET", path, name)
+            if done(body):
+                return body
+            if time.monotonic() > deadline:
+                raise FlowTimeout(f"{name} did not finish: {body}")
+            await asyncio.sleep(self.poll_interval)
+
+    async def issue_flow(self, number: int):
+        deadline = time.monotonic() + self.flow_timeout
+        created = await self.call("POST", "/api/issuer/create-invitation", "POST issuer/create-invitation", {
+            "username": f"user{number}",
+            "email": f"user{number}@example.com",
+            "occupation": "Benchmark",
+            "citizenship": "Nowhere"
+        })
+        if not created.get("success"):
+            raise FlowTimeout(f"create-invitation failed: {created}")
+        connection_id = created["connection_id"]
+        await self.poll(f"/api/issuer/status/{connection_id}", "GET issuer/status",
+                        lambda body: body.get("connected"), deadline)
+        await self.poll(f"/api/issuer/credential-status/{connection_id}", "GET issuer/credential-status",
+                        lambda body: body.get("issued"), deadline)
+
+    async def verify_flow(self, number: int):
+        deadline = time.monotonic() + self.flow_timeout
+        created = await self.call("POST", "/api/verifier/create-invitation", "POST verifier/create-invitation", {})
+        if not created.get("success"):
+            raise FlowTimeout(f"create-invitation failed: {created}")
+        connection_id = created["connection_id"]
+        await self.poll(f"/api/verifier/status/{connection_id}", "GET verifier/status",
+                        lambda body: body.get("connected"), deadline)
+        await self.poll(f"/api/verifier/proof-status/{connection_id}", "GET verifier/proof-status",
+                        lambda body: body.get("verified"), deadline)
+
+async def wait_until_ready(session: aiohttp.ClientSession, url: str, timeout: float = 30.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            async with session.get(url) as resp:
+                if resp.status == 200:
+                    return
+        except aiohttp.ClientError:
+            pass
+        await asyncio.sleep(0.1)
+    raise RuntimeError(f"{url} did not become ready")
+
+def run_fake_acapy(port: int, options: dict):
+    logging.basicConfig(level=logging.WARNING)
+    web.run_app(create_fake_acapy_app(**options), host="127.0.0.1", port=port,
+                access_log=None, print=None)
+
+async def run_benchmark(args: argparse.Namespace) -> Recorder:
+    # Imported here so app.py's logging setup can be quietened straight after
+    from app import create_app
+    from src.backend.config import Settings
+    logging.getLogger().setLevel(logging.WARNING)
+
+    env = {
+        "SSI_ADMIN_URL": f"http://127.0.0.1:{args.fake_port}",
+        "SSI_LEDGER_CACHE": "false",
+        "SSI_STATE_SWEEP_INTERVAL": "0",
+        "SSI_STATE_STORE": args.state_store,
+        "SSI_STATE_DB_PATH": os.path.join(tempfile.mkdtemp(prefix="bench-flows-"), "state.db"),
+    }
+    env.update(item.split("=", 1) for item in args.env)
+
+    app = await create_app(Settings(env))
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, "127.0.0.1", args.port).start()
+
+    recorder = Recorder()
+    kinds = args.kinds.split(",")
+    next_flow = iter(range(args.flows))
+
+    async def virtual_user(client: Client):
+        for number in next_flow:
+            kind = kinds[number % len(kinds)]
+            started = time.perf_counter()
+            try:
+                await getattr(client, f"{kind}_flow")(number)
+                recorder.flow(kind, time.perf_counter() - started)
+            except (FlowTimeout, aiohttp.ClientError, ValueError) as e:
+                recorder.flow_error(kind)
+                logging.warning(f"{kind} flow {number} failed: {e}")
+
+    base_url = f"http://127.0.0.1:{args.port}"
+    connector = aiohttp.TCPConnector(limit=args.concurrency)
+    try:
+        async with aiohttp.ClientSession(connector=connector) as session:
+            await wait_until_ready(session, f"{base_url}/readyz")
+            client = Client(session, base_url, recorder, args.poll_interval, args.flow_timeout)
+            started = time.perf_counter()
+            await asyncio.gather(*(virtual_user(client) for _ in range(args.concurrency)))
+            recorder.elapsed = time.perf_counter() - started
+    finally:
+        await runner.cleanup()
+    return recorder
+
+def print_table(title: str, samples: Dict[str, List[float]], elapsed: float, errors: Dict[str, int] = None):
+    print(f"\n{title}")
+    print(f"{'name':<32} {'count':>7} {'errors':>7} {'per s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for name in sorted(samples):
+        values = sorted(samples[name])
+        print(f"{name:<32} {len(values):>7} {(errors or {}).get(name, 0):>7} {len(values) / elapsed:>8.1f} "
+              f"{percentile(values, 50) * 1000:>8.1f} {percentile(values, 95) * 1000:>8.1f} "
+              f"{percentile(values, 99) * 1000:>8.1f}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark full issue/verify flows against a fake ACA-Py")
+    parser.add_argument("--flows", type=int, default=200, help="Total flows to run")
+    parser.add_argument("--concurrency", type=int, default=20, help="Flows in progress at once")
+    parser.add_argument("--kinds", default="issue,verify", help="Comma-separated flow kinds to alternate")
+    parser.add_argument("--poll-interval", type=float, default=0.05, help="Seconds between status polls")
+    parser.add_argument("--flow-timeout", type=float, default=60.0, help="Seconds before a flow counts as failed")
+    parser.add_argument("--no-webhooks", action="store_true", help="Do not post webhooks; status comes from polling")
+    parser.add_argument("--state-store", default="memory", choices=["memory", "sqlite"])
+    parser.add_argument("--env", action="append", default=[], metavar="SSI_NAME=VALUE",
+                        help="Extra application setting (repeatable)")
+    parser.add_argument("--port", type=int, default=8091)
+    parser.add_argument("--fake-port", type=int, default=8092)
+    add_fake_acapy_arguments(parser)
+    args = parser.parse_args()
+
+    webhook_url = None if args.no_webhooks else f"http://127.0.0.1:{args.port}/webhooks"
+    fake = multiprocessing.Process(target=run_fake_acapy,
+                                   args=(args.fake_port, fake_acapy_options(args, webhook_url)), daemon=True)
+    fake.start()
+    try:
+        recorder = asyncio.run(run_benchmark(args))
+    finally:
+        fake.terminate()
+        fake.join()
+
+    print(f"{args.flows} flows, concurrency {args.concurrency}, admin latency {args.latency * 1000:.0f} ms, "
+          f"{'polling only' if args.no_webhooks else 'webhooks'}, {args.state_store} store, "
+          f"{recorder.elapsed:.1f}s")
+    print_table("Flows", recorder.flows, recorder.elapsed, recorder.flow_errors)
+    print_table("Routes", recorder.routes, recorder.elapsed)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Worker Scaling Benchmark for SSI Demo Application
+Starts the application with different ``--workers`` counts and measures how
+many requests per second ``/api/agent/info`` sustains under a fixed client
+load. Ledger ids are preset, so no ACA-Py agent is needed.
+
+    python benchmarks/bench_workers.py --workers 1,2,4 --duration 10
+"""
+
+import argparse
+import asyncio
+import multiprocessing
+import os
+import subprocess
+import sys
+import time
+
+import aiohttp
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+async def wait_until_ready(url: str, timeout: float = 30.0):
+    """Poll the server until it answers or the timeout expires"""
+    deadline = time.monotonic() + timeout
+    async with aiohttp.ClientSession() as session:
+        while time.monotonic() < deadline:
+            try:
+                async with session.get(url) as resp:
+                    if resp.status == 200:
+                        return
+            except aiohttp.ClientError:
+                pass
+            await asyncio.sleep(0.2)
+    raise RuntimeError(f"Server at {url} did not become ready")
+
+async def generate_load(url: str, concurrency: int, duration: float) -> tuple:
+    """Hit ``url`` from ``concurrency`` loops for ``duration`` seconds"""
+    counts = {"ok": 0, "errors": 0}
+    deadline = time.monotonic() + duration
+
+    async def client(session: aiohttp.ClientSession):
+        while time.monotonic() < deadline:
+            try:
+                async with session.get(url) as resp:
+                    await resp.read()
+                    counts["ok" if resp.status == 200 else "errors"] += 1
+            except aiohttp.ClientError:
+                counts["errors"] += 1
+
+    connector = aiohttp.TCPConnector(limit=concurrency)
+    async with aiohttp.ClientSession(connector=connector) as session:
+        await asyncio.gather(*(client(session) for _ in range(concurrency)))
+    return counts["ok"], counts["errors"]
+
+def load_process(url: str, concurrency: int, duration: float, results):
+    results.put(asyncio.run(generate_load(url, concurrency, duration)))
+
+def run_load(url: str, clients: int, concurrency: int, duration: float) -> tuple:
+    """Spread the client load over several processes so the client is not the bottleneck"""
+    results = multiprocessing.Queue()
+    per_client = max(concurrency // clients, 1)
+    processes = [
+        multiprocessing.Process(target=load_process, args=(url, per_client, duration, results))
+        for _ in range(clients)
+    ]
+    for process in processes:
+        process.start()
+    totals = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+    return sum(ok for ok, _ in totals), sum(errors for _, errors in totals)
+
+def benchmark(workers: int, args: argparse.Namespace) -> dict:
+    """Start the server with ``workers`` processes and measure it"""
+    env = dict(os.environ)
+    env.setdefault("SSI_SCHEMA_ID", "bench:2:UserIdentityCredential:1.0")
+    env.setdefault("SSI_CRED_DEF_ID", "bench:3:CL:1:default")
+    env.setdefault("SSI_STATE_SWEEP_INTERVAL", "0")
+
+    command = [sys.executable, "app.py", "--workers", str(workers), "--port", str(args.port), "--no-access-log"]
+    if args.uvloop:
+        command.append("--uvloop")
+    server = subprocess.Popen(command, cwd=APP_DIR, env=env,
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    url = f"http://127.0.0.1:{args.port}{args.path}"
+    try:
+        asyncio.run(wait_until_ready(url))
+        # Short warm-up so every worker has accepted connections
+        run_load(url, args.clients, args.concurrency, 1.0)
+        started = time.monotonic()
+        ok, errors = run_load(url, args.clients, args.concurrency, args.duration)
+        elapsed = time.monotonic() - started
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+    return {"workers": workers, "requests": ok, "errors": errors, "rps": ok / elapsed}
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare requests/sec across worker counts")
+    parser.add_argument("--workers", default="1,2,4", help="Comma-separated worker counts to compare")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds of load per worker count")
+    parser.add_argument("--concurrency", type=int, default=64, help="Concurrent requests in flight")
+    parser.add_argument("--clients", type=int, default=max((os.cpu_count() or 2) // 2, 1),
+                        help="Load generator processes")
+    parser.add_argument("--port", type=int, default=8090)
+    parser.add_argument("--path", default="/api/agent/info")
+    parser.add_argument("--uvloop", action="store_true", help="Run the server with --uvloop")
+    args = parser.parse_args()
+
+    results = [benchmark(int(count), args) for count in args.workers.split(",")]
+
+    baseline = results[0]["rps"] or 1
+    print(f"{'workers':>8} {'requests':>10} {'errors':>8} {'req/s':>10} {'speedup':>8}")
+    for result in results:
+        print(f"{result['workers']:>8} {result['requests']:>10} {result['errors']:>8} "
+              f"{result['rps']:>10.0f} {result['rps'] / baseline:>7.2f}x")
+
+if __name__ == '__main__':
+    main()
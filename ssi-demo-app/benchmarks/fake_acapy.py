@@ -0,0 +1,346 @@
+#!/usr/bin/env python3
+"""
+Fake ACA-Py Admin Server for SSI Demo Application
+Implements the admin endpoints ``SSIAgent`` uses, backed by in-memory records,
+so the application can be exercised without a ledger, ngrok or a phone.
+Invitations are accepted by a simulated holder after ``--accept-after``
+seconds, and credential and presentation exchanges then step through their
+states ``--step-delay`` apart. With ``--accept-after -1`` nothing is accepted
+until a load generator calls ``POST /fake/connections/{id}/accept``, standing
+in for the holder's wallet. Every admin call waits ``--latency`` seconds
+(plus up to ``--jitter``), and state changes can be posted to the
+application's webhook receiver.
+
+    python benchmarks/fake_acapy.py --port 8021 --webhook-url http://localhost:8080/webhooks
+"""
+
+import argparse
+import asyncio
+import logging
+import random
+import uuid
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import aiohttp
+from aiohttp import web
+
+logger = logging.getLogger("fake_acapy")
+
+PUBLIC_DID = "FakeDid1111111111111111"
+
+CONNECTION_STEPS = [("request", "request-received"), ("response", "response-sent"), ("active", "completed")]
+CREDENTIAL_STEPS = ["request_received", "credential_issued", "credential_acked"]
+PRESENTATION_STEPS = ["presentation_received", "verified"]
+
+def now() -> str:
+    return datetime.now().isoformat()
+
+def list_response(records, request: web.Request, filter_keys) -> web.Response:
+    """``{"results": [...]}`` filtered by query parameters, paged by ``limit``/``offset``"""
+    filters = {key: request.query[key] for key in filter_keys if key in request.query}
+    results = [record for record in records if all(record.get(key) == value for key, value in filters.items())]
+    offset = int(request.query.get("offset", 0))
+    limit = int(request.query["limit"]) if "limit" in request.query else None
+    return web.json_response({"results": results[offset:None if limit is None else offset + limit]})
+
+class FakeAcaPy:
+    """In-memory admin API with simulated holder behaviour"""
+
+    def __init__(self, latency: float = 0.005, jitter: float = 0.0, accept_after: float = 0.1,
+                 step_delay: float = 0.05, webhook_url: Optional[str] = None):
+        """
+        Args:
+            latency: Seconds every admin call takes
+            jitter: Extra random latency of up to this many seconds
+            accept_after: Seconds until the simulated holder accepts an invitation (negative = never)
+            step_delay: Seconds between exchange state transitions
+            webhook_url: Base URL receiving ``/topic/{topic}/`` events, if any
+        """
+        self.latency = latency
+        self.jitter = jitter
+        self.accept_after = accept_after
+        self.step_delay = step_delay
+        # Like ACA-Py, "url#key" sends key as the x-api-key header
+        webhook_url, _, self.webhook_api_key = (webhook_url or "").partition("#")
+        self.webhook_url = webhook_url.rstrip("/") or None
+        self.connections: Dict[str, dict] = {}
+        self.credential_exchanges: Dict[str, dict] = {}
+        self.presentation_exchanges: Dict[str, dict] = {}
+        self.schemas: Dict[str, dict] = {}
+        self.cred_defs: Dict[str, dict] = {}
+        self.session: Optional[aiohttp.ClientSession] = None
+        self._tasks = set()
+
+    # Lifecycle
+
+    async def start(self, app: web.Application):
+        if self.webhook_url:
+            self.session = aiohttp.ClientSession()
+
+    async def stop(self, app: web.Application):
+        for task in list(self._tasks):
+            task.cancel()
+        if self.session is not None:
+            await self.session.close()
+
+    def _spawn(self, coro):
+        task = asyncio.ensure_future(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _emit(self, topic: str, record: dict):
+        """Post a webhook event the way ACA-Py does"""
+        if self.session is None:
+            return
+        try:
+            headers = {"x-api-key": self.webhook_api_key} if self.webhook_api_key else None
+            async with self.session.post(f"{self.webhook_url}/topic/{topic}/", json=record, headers=headers) as resp:
+                await resp.read()
+        except aiohttp.ClientError as e:
+            logger.warning(f"Webhook {topic} failed: {e}")
+
+    # Simulated holder
+
+    def set_connection_state(self, connection: dict, state: str, rfc23_state: str):
+        connection.update(state=state, rfc23_state=rfc23_state, updated_at=now())
+        self._spawn(self._emit("connections", dict(connection)))
+
+    async def accept_invitation(self, connection_id: str, delay: float = 0.0):
+        """Walk a connection from invitation to active, as a wallet scanning the QR code would"""
+        await asyncio.sleep(delay)
+        connection = self.connections.get(connection_id)
+        if connection is None or connection["state"] != "invitation":
+            return
+        for state, rfc23_state in CONNECTION_STEPS:
+            self.set_connection_state(connection, state, rfc23_state)
+            if state != "active":
+                await asyncio.sleep(self.step_delay / len(CONNECTION_STEPS))
+
+    async def _advance(self, topic: str, record: dict, steps: List[str]):
+        for state in steps:
+            await asyncio.sleep(self.step_delay)
+            record.update(state=state, updated_at=now())
+            if state == "verified":
+                record["verified"] = "true"
+                record["presentation"] = self._presentation(record)
+            self._spawn(self._emit(topic, dict(record)))
+
+    @staticmethod
+    def _presentation(record: dict) -> dict:
+        requested = record["presentation_request"].get("requested_attributes", {})
+        return {
+            "requested_proof": {
+                "revealed_attrs": {
+                    referent: {"raw": f"{spec.get('name', referent)}-{record['connection_id'][:8]}", "sub_proof_index": 0}
+                    for referent, spec in requested.items()
+                }
+            }
+        }
+
+    # Admin API
+
+    @web.middleware
+    async def latency_middleware(self, request: web.Request, handler):
+        delay = self.latency + (random.uniform(0, self.jitter) if self.jitter else 0.0)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        return await handler(request)
+
+    async def accept(self, request: web.Request) -> web.Response:
+        """Control endpoint: the holder scans the invitation and accepts it now"""
+        connection = self.connections.get(request.match_info["connection_id"])
+        if connection is None:
+            return web.Response(status=404, text="Record not found")
+        accepted = connection["state"] == "invitation"
+        if accepted:
+            self._spawn(self.accept_invitation(connection["connection_id"]))
+        return web.json_response({"accepted": accepted, "state": connection["state"]})
+
+    async def status_live(self, request: web.Request) -> web.Response:
+        return web.json_response({"alive": True})
+
+    async def status_config(self, request: web.Request) -> web.Response:
+        return web.json_response({"config": {"admin.webhook_urls": [self.webhook_url] if self.webhook_url else []}})
+
+    async def public_did(self, request: web.Request) -> web.Response:
+        return web.json_response({"result": {"did": PUBLIC_DID, "verkey": "FakeVerkey", "posture": "posted"}})
+
+    async def create_schema(self, request: web.Request) -> web.Response:
+        body = await request.json()
+        schema_id = f"{PUBLIC_DID}:2:{body['schema_name']}:{body['schema_version']}"
+        self.schemas[schema_id] = {"id": schema_id, "seqNo": len(self.schemas) + 1, "attrNames": body["attributes"]}
+        return web.json_response({"schema_id": schema_id, "schema": self.schemas[schema_id]})
+
+    async def get_schema(self, request: web.Request) -> web.Response:
+        schema = self.schemas.get(request.match_info["schema_id"])
+        return web.json_response({"schema": schema})
+
+    async def created_schemas(self, request: web.Request) -> web.Response:
+        return web.json_response({"schema_ids": list(self.schemas)})
+
+    async def create_cred_def(self, request: web.Request) -> web.Response:
+        body = await request.json()
+        schema = self.schemas.get(body["schema_id"], {"seqNo": 1})
+        cred_def_id = f"{PUBLIC_DID}:3:CL:{schema['seqNo']}:{body.get('tag', 'default')}"
+        self.cred_defs[cred_def_id] = {"id": cred_def_id, "schemaId": str(schema["seqNo"])}
+        return web.json_response({"credential_definition_id": cred_def_id})
+
+    async def get_cred_def(self, request: web.Request) -> web.Response:
+        cred_def = self.cred_defs.get(request.match_info["cred_def_id"])
+        if cred_def is None:
+            return web.Response(status=404, text="Credential definition not found")
+        return web.json_response({"credential_definition": cred_def})
+
+    async def created_cred_defs(self, request: web.Request) -> web.Response:
+        return web.json_response({"credential_definition_ids": list(self.cred_defs)})
+
+    async def create_invitation(self, request: web.Request) -> web.Response:
+        body = await request.json() if request.can_read_body else {}
+        connection_id = str(uuid.uuid4())
+        invitation = {
+            "@type": "https://didcomm.org/connections/1.0/invitation",
+            "@id": str(uuid.uuid4()),
+            "label": body.get("my_label", "Fake ACA-Py"),
+            "recipientKeys": [uuid.uuid4().hex],
+            "serviceEndpoint": "http://fake-acapy.invalid:8020"
+        }
+        self.connections[connection_id] = {
+            "connection_id": connection_id,
+            "alias": body.get("alias"),
+            "state": "invitation",
+            "rfc23_state": "invitation-sent",
+            "their_role": "invitee",
+            "created_at": now(),
+            "updated_at": now()
+        }
+        if self.accept_after >= 0:
+            self._spawn(self.accept_invitation(connection_id, self.accept_after))
+        return web.json_response({
+            "connection_id": connection_id,
+            "invitation": invitation,
+            "invitation_url": f"http://fake-acapy.invalid:8020?c_i={invitation['@id']}"
+        })
+
+    async def list_connections(self, request: web.Request) -> web.Response:
+        return list_response(self.connections.values(), request, ("state", "alias", "their_role"))
+
+    async def get_connection(self, request: web.Request) -> web.Response:
+        connection = self.connections.get(request.match_info["connection_id"])
+        if connection is None:
+            return web.Response(status=404, text="Record not found")
+        return web.json_response(connection)
+
+    async def send_credential(self, request: web.Request) -> web.Response:
+        body = await request.json()
+        if body.get("connection_id") not in self.connections:
+            return web.Response(status=400, text="Connection not found")
+        record = {
+            "credential_exchange_id": str(uuid.uuid4()),
+            "connection_id": body["connection_id"],
+            "cred_def_id": body.get("cred_def_id"),
+            "credential_proposal_dict": {"credential_proposal": body.get("credential_proposal")},
+            "state": "offer_sent",
+            "created_at": now(),
+            "updated_at": now()
+        }
+        self.credential_exchanges[record["credential_exchange_id"]] = record
+        self._spawn(self._emit("issue_credential", dict(record)))
+        self._spawn(self._advance("issue_credential", record, CREDENTIAL_STEPS))
+        return web.json_response(record)
+
+    async def list_credential_exchanges(self, request: web.Request) -> web.Response:
+        return list_response(self.credential_exchanges.values(), request, ("connection_id", "state"))
+
+    async def get_credential_exchange(self, request: web.Request) -> web.Response:
+        record = self.credential_exchanges.get(request.match_info["cred_ex_id"])
+        if record is None:
+            return web.Response(status=404, text="Record not found")
+        return web.json_response(record)
+
+    async def send_proof_request(self, request: web.Request) -> web.Response:
+        body = await request.json()
+        if body.get("connection_id") not in self.connections:
+            return web.Response(status=400, text="Connection not found")
+        record = {
+            "presentation_exchange_id": str(uuid.uuid4()),
+            "connection_id": body["connection_id"],
+            "presentation_request": body.get("proof_request", {}),
+            "state": "request_sent",
+            "created_at": now(),
+            "updated_at": now()
+        }
+        self.presentation_exchanges[record["presentation_exchange_id"]] = record
+        self._spawn(self._emit("present_proof", dict(record)))
+        self._spawn(self._advance("present_proof", record, PRESENTATION_STEPS))
+        return web.json_response(record)
+
+    async def list_presentation_exchanges(self, request: web.Request) -> web.Response:
+        return list_response(self.presentation_exchanges.values(), request, ("connection_id", "state"))
+
+    async def get_presentation_exchange(self, request: web.Request) -> web.Response:
+        record = self.presentation_exchanges.get(request.match_info["pres_ex_id"])
+        if record is None:
+            return web.Response(status=404, text="Record not found")
+        return web.json_response(record)
+
+def create_fake_acapy_app(**options) -> web.Application:
+    """Build the fake admin API; ``options`` are ``FakeAcaPy`` arguments"""
+    fake = FakeAcaPy(**options)
+    app = web.Application(middlewares=[fake.latency_middleware])
+    app["fake_acapy"] = fake
+    app.router.add_get("/status/live", fake.status_live)
+    app.router.add_get("/status/config", fake.status_config)
+    app.router.add_post("/fake/connections/{connection_id}/accept", fake.accept)
+    app.router.add_get("/wallet/did/public", fake.public_did)
+    app.router.add_post("/schemas", fake.create_schema)
+    app.router.add_get("/schemas/created", fake.created_schemas)
+    app.router.add_get("/schemas/{schema_id}", fake.get_schema)
+    app.router.add_post("/credential-definitions", fake.create_cred_def)
+    app.router.add_get("/credential-definitions/created", fake.created_cred_defs)
+    app.router.add_get("/credential-definitions/{cred_def_id}", fake.get_cred_def)
+    app.router.add_post("/connections/create-invitation", fake.create_invitation)
+    app.router.add_get("/connections", fake.list_connections)
+    app.router.add_get("/connections/{connection_id}", fake.get_connection)
+    app.router.add_post("/issue-credential/send", fake.send_credential)
+    app.router.add_get("/issue-credential/records", fake.list_credential_exchanges)
+    app.router.add_get("/issue-credential/records/{cred_ex_id}", fake.get_credential_exchange)
+    app.router.add_post("/present-proof/send-request", fake.send_proof_request)
+    app.router.add_get("/present-proof/records", fake.list_presentation_exchanges)
+    app.router.add_get("/present-proof/records/{pres_ex_id}", fake.get_presentation_exchange)
+    app.on_startup.append(fake.start)
+    app.on_cleanup.append(fake.stop)
+    return app
+
+def add_fake_acapy_arguments(parser: argparse.ArgumentParser):
+    """Options shared by the fake server and the harnesses that start it"""
+    parser.add_argument("--latency", type=float, default=0.005, help="Seconds every admin call takes")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Extra random admin latency, up to this many seconds")
+    parser.add_argument("--accept-after", type=float, default=0.1,
+                        help="Seconds until the simulated holder accepts an invitation (negative = never)")
+    parser.add_argument("--step-delay", type=float, default=0.05, help="Seconds between exchange state transitions")
+
+def fake_acapy_options(args: argparse.Namespace, webhook_url: Optional[str] = None) -> dict:
+    return {
+        "latency": args.latency,
+        "jitter": args.jitter,
+        "accept_after": args.accept_after,
+        "step_delay": args.step_delay,
+        "webhook_url": webhook_url
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Fake ACA-Py admin API for local testing and benchmarks")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8021)
+    parser.add_argument("--webhook-url", default=None,
+                        help="Application webhook base URL, e.g. http://localhost:8080/webhooks")
+    add_fake_acapy_arguments(parser)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    web.run_app(create_fake_acapy_app(**fake_acapy_options(args, args.webhook_url)),
+                host=args.host, port=args.port, access_log=None)
+
+if __name__ == '__main__':
+    main()
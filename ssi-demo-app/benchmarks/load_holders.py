@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+"""
+Virtual Holder Load Generator for SSI Demo Application
+Acts as N wallet holders onboarding against a running application. Each
+holder opens the issuer invitation and its QR code, "scans" it by accepting
+the connection through the fake ACA-Py control endpoint, follows the status
+the way the bundled page does (Server-Sent Events, falling back to polling
+every ``--poll-interval`` seconds), and then repeats this for the verifier
+invitation. Holders start spread over ``--ramp-up`` seconds and pause
+``--think-time`` seconds before each scan.
+
+Start the fake agent so that only holders accept invitations, then the app:
+
+    python benchmarks/fake_acapy.py --port 8021 --accept-after -1 --webhook-url http://localhost:8080/webhooks
+    SSI_ADMIN_URL=http://localhost:8021 python app.py
+    python benchmarks/load_holders.py --holders 2000 --ramp-up 60 --think-time 2
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import resource
+import sys
+import time
+from typing import Callable, Dict, List
+
+import aiohttp
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, APP_DIR)
+
+from benchmarks.bench_flows import percentile
+
+# The bundled page polls every 3 seconds
+PAGE_POLL_INTERVAL = 3.0
+
+class HolderFailed(Exception):
+    pass
+
+def raise_open_file_limit():
+    """Thousands of holders need thousands of sockets"""
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft < hard:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+
+class Stats:
+    """Stage timings and failures across all holders"""
+
+    def __init__(self):
+        self.timings: Dict[str, List[float]] = {}
+        self.failures: Dict[str, int] = {}
+        self.active = 0
+        self.peak_active = 0
+        self.completed = 0
+        self.elapsed = 0.0
+
+    def record(self, stage: str, seconds: float):
+        self.timings.setdefault(stage, []).append(seconds)
+
+    def fail(self, stage: str):
+        self.failures[stage] = self.failures.get(stage, 0) + 1
+
+class Holder:
+    """One simulated wallet holder driving the page's onboarding flow"""
+
+    def __init__(self, number: int, session: aiohttp.ClientSession, args: argparse.Namespace, stats: Stats):
+        self.number = number
+        self.session = session
+        self.args = args
+        self.stats = stats
+        self.deadline = 0.0
+        self.stage = "issue"
+
+    async def get_json(self, url: str, method: str = "GET", body: dict = None) -> dict:
+        async with self.session.request(method, url, json=body) as resp:
+            if resp.status >= 500:
+                raise HolderFailed(f"{method} {url} -> {resp.status}")
+            return await resp.json(content_type=None)
+
+    async def think(self):
+        if self.args.think_time > 0:
+            # Exponential think time, like independent users
+            await asyncio.sleep(random.expovariate(1.0 / self.args.think_time))
+
+    async def open_invitation(self, role: str, body: dict) -> str:
+        created = await self.get_json(f"{self.args.app_url}/api/{role}/create-invitation", "POST", body)
+        if not created.get("success"):
+            raise HolderFailed(f"{role} invitation failed: {created.get('error')}")
+        # The page shows the QR image straight away
+        async with self.session.get(f"{self.args.app_url}{created['qr_url']}") as resp:
+            await resp.read()
+        return created["connection_id"]
+
+    async def accept(self, connection_id: str):
+        result = await self.get_json(f"{self.args.fake_url}/fake/connections/{connection_id}/accept", "POST")
+        if "accepted" not in result:
+            raise HolderFailed(f"Accept failed for {connection_id}: {result}")
+
+    async def watch_events(self, connection_id: str, events: Dict[str, Callable[[dict], bool]],
+                           on_connected: Callable[[], None]) -> bool:
+        """Follow ``/api/events``; returns False when the server asks the page to poll instead"""
+        timeout = aiohttp.ClientTimeout(total=max(self.deadline - time.monotonic(), 0.1))
+        async with self.session.get(f"{self.args.app_url}/api/events/{connection_id}", timeout=timeout) as resp:
+            event = None
+            async for raw in resp.content:
+                line = raw.decode().rstrip("\r\n")
+                if line.startswith("event:"):
+                    event = line[len("event:"):].strip()
+                elif line.startswith("data:"):
+                    data = json.loads(line[len("data:"):])
+                    if event == "ready" and not data.get("push"):
+                        return False
+                    if event == "connection" and data.get("connected"):
+                        on_connected()
+                    handler = events.get(event)
+                    if handler is not None and handler(data):
+                        return True
+        raise HolderFailed(f"Event stream for {connection_id} ended early")
+
+    async def poll(self, status_url: str, result_url: str, done: Callable[[dict], bool],
+                   on_connected: Callable[[], None]):
+        """Poll the status route, then the result route once connected, as the page does"""
+        interval = self.args.poll_interval
+        while time.monotonic() < self.deadline:
+            status = await self.get_json(status_url)
+            if status.get("connected"):
+                on_connected()
+                await asyncio.sleep(interval)
+                if done(await self.get_json(result_url)):
+                    return
+            await asyncio.sleep(interval)
+        raise HolderFailed(f"Timed out polling {status_url}")
+
+    async def follow(self, role: str, connection_id: str, result_route: str, result_event: str,
+                     done: Callable[[dict], bool], accepted_at: float) -> float:
+        """Wait for the flow to finish; records time-to-connect and returns the finish time"""
+        connected_at = []
+
+        def on_connected():
+            if not connected_at:
+                connected_at.append(time.monotonic())
+                self.stats.record(f"{role} connect", connected_at[0] - accepted_at)
+
+        finished = False
+        if self.args.mode == "events":
+            try:
+                finished = await self.watch_events(connection_id, {result_event: done}, on_connected)
+            except asyncio.TimeoutError:
+                raise HolderFailed(f"Timed out waiting for {role} events")
+        if not finished:
+            await self.poll(f"{self.args.app_url}/api/{role}/status/{connection_id}",
+                            f"{self.args.app_url}/api/{role}/{result_route}/{connection_id}", done, on_connected)
+        on_connected()
+        return time.monotonic()
+
+    async def onboard(self):
+        started = time.monotonic()
+        self.deadline = started + self.args.holder_timeout
+
+        self.stage = "issue"
+        connection_id = await self.open_invitation("issuer", {
+            "username": f"holder{self.number}",
+            "email": f"holder{self.number}@example.com",
+            "occupation": "Load test",
+            "citizenship": "Nowhere"
+        })
+        await self.think()
+        accepted_at = time.monotonic()
+        await self.accept(connection_id)
+        issued_at = await self.follow("issuer", connection_id, "credential-status", "credential",
+                                      lambda data: data.get("issued"), accepted_at)
+        self.stats.record("issue", issued_at - accepted_at)
+
+        self.stage = "verify"
+        await self.think()
+        connection_id = await self.open_invitation("verifier", {})
+        await self.think()
+        accepted_at = time.monotonic()
+        await self.accept(connection_id)
+        verified_at = await self.follow("verifier", connection_id, "proof-status", "proof",
+                                        lambda data: data.get("verified"), accepted_at)
+        self.stats.record("verify", verified_at - accepted_at)
+        self.stats.record("onboarding", verified_at - started)
+
+    async def run(self, start_delay: float):
+        await asyncio.sleep(start_delay)
+        self.stats.active += 1
+        self.stats.peak_active = max(self.stats.peak_active, self.stats.active)
+        try:
+            await self.onboard()
+            self.stats.completed += 1
+        except (HolderFailed, aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+            self.stats.fail(self.stage)
+            if self.args.verbose:
+                print(f"holder {self.number} failed: {e}")
+        finally:
+            self.stats.active -= 1
+
+async def report_progress(stats: Stats, holders: int, interval: float = 5.0):
+    started = time.monotonic()
+    while True:
+        await asyncio.sleep(interval)
+        print(f"[{time.monotonic() - started:6.0f}s] active {stats.active:>6}  completed {stats.completed:>6}/{holders}"
+              f"  failed {sum(stats.failures.values()):>5}")
+
+async def run(args: argparse.Namespace) -> Stats:
+    stats = Stats()
+    connector = aiohttp.TCPConnector(limit=args.connections)
+    async with aiohttp.ClientSession(connector=connector) as session:
+        holders = [Holder(number, session, args, stats) for number in range(args.holders)]
+        progress = asyncio.ensure_future(report_progress(stats, args.holders))
+        started = time.monotonic()
+        await asyncio.gather(*(
+            holder.run(args.ramp_up * number / max(args.holders, 1)) for number, holder in enumerate(holders)
+        ))
+        stats.elapsed = time.monotonic() - started
+        progress.cancel()
+    return stats
+
+def print_report(stats: Stats, args: argparse.Namespace):
+    print(f"\n{args.holders} holders, ramp-up {args.ramp_up:.0f}s, think time {args.think_time:.1f}s, "
+          f"{args.mode} mode, {stats.elapsed:.1f}s")
+    failures = ", ".join(f"{stage} {count}" for stage, count in sorted(stats.failures.items()))
+    print(f"completed {stats.completed}, failed {sum(stats.failures.values())}{f' ({failures})' if failures else ''}, "
+          f"peak concurrent holders {stats.peak_active}, "
+          f"{stats.completed / max(stats.elapsed, 1e-9):.1f} onboardings/s")
+    print(f"\n{'stage':<18} {'count':>7} {'p50 s':>8} {'p90 s':>8} {'p95 s':>8} {'p99 s':>8} {'max s':>8}")
+    for stage in ["issuer connect", "issue", "verifier connect", "verify", "onboarding"]:
+        values = sorted(stats.timings.get(stage, []))
+        if not values:
+            continue
+        print(f"{stage:<18} {len(values):>7} {percentile(values, 50):>8.2f} {percentile(values, 90):>8.2f} "
+              f"{percentile(values, 95):>8.2f} {percentile(values, 99):>8.2f} {values[-1]:>8.2f}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulate wallet holders onboarding against a running app")
+    parser.add_argument("--app-url", default="http://127.0.0.1:8080", help="Application base URL")
+    parser.add_argument("--fake-url", default="http://127.0.0.1:8021",
+                        help="Fake ACA-Py started with --accept-after -1")
+    parser.add_argument("--holders", type=int, default=100, help="Number of virtual holders")
+    parser.add_argument("--ramp-up", type=float, default=10.0, help="Seconds over which holders start")
+    parser.add_argument("--think-time", type=float, default=1.0,
+                        help="Mean seconds a holder pauses before scanning a QR code (0 = none)")
+    parser.add_argument("--mode", choices=["events", "poll"], default="events",
+                        help="Follow status like the page: Server-Sent Events with polling fallback, or polling only")
+    parser.add_argument("--poll-interval", type=float, default=PAGE_POLL_INTERVAL, help="Seconds between status polls")
+    parser.add_argument("--holder-timeout", type=float, default=300.0, help="Seconds before a holder gives up")
+    parser.add_argument("--connections", type=int, default=0, help="Maximum client connections (0 = unlimited)")
+    parser.add_argument("--verbose", action="store_true", help="Print each holder failure")
+    args = parser.parse_args()
+
+    raise_open_file_limit()
+    stats = asyncio.run(run(args))
+    print_report(stats, args)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,323 @@
+#!/usr/bin/env python3
+"""
+Agent Pool for SSI Demo Application
+This module spreads admin API traffic over several ACA-Py instances that share
+the same issuer DID and credential definition. Requests go to the healthy
+agent with the fewest outstanding requests, agents that fail or slow down are
+ejected for a while, and calls about a connection or exchange stay on the agent
+that created it. The owning agent is kept on the connection's record in the
+state store, so it survives restarts and is shared by worker processes. List
+calls are sent to every agent and the results merged.
+"""
+
+import asyncio
+import logging
+import re
+import urllib.parse
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from .ssi_agent import SSIAgent
+
+logger = logging.getLogger(__name__)
+
+# Admin paths that name a connection or exchange owned by one agent, with the kind of id they carry
+AFFINITY_PATTERNS = [
+    (re.compile(r"^/connections/([^/?]+)"), "connection"),
+    (re.compile(r"^/issue-credential/records/([^/?]+)"), "credential_exchange"),
+    (re.compile(r"^/present-proof/records/([^/?]+)"), "presentation_exchange"),
+]
+
+# List endpoints; each agent only knows its own records, so these go to every agent
+LIST_PATHS = {"/connections", "/issue-credential/records", "/present-proof/records"}
+
+# Path segments those patterns match that are actions rather than ids
+NON_ID_SEGMENTS = {"create-invitation", "receive-invitation", "create-static"}
+
+# Weight of the newest sample in the latency moving average
+LATENCY_EWMA_ALPHA = 0.2
+
+def is_agent_failure(result: dict) -> bool:
+    """Whether an admin result points at the agent rather than the request
+
+    Client errors (4xx) are the caller's problem; timeouts, transport errors
+    and 5xx responses count against the agent.
+    """
+    error = result.get("error") if isinstance(result, dict) else None
+    return error is not None and not str(error).startswith("Status 4")
+
+class PoolMember:
+    """One ACA-Py instance and its balancing statistics"""
+
+    def __init__(self, agent: SSIAgent):
+        self.agent = agent
+        self.outstanding = 0
+        self.latency = 0.0
+        self.consecutive_failures = 0
+        self.ejected_until = 0.0
+        self.healthy = True
+
+    def available(self, now: float) -> bool:
+        return self.healthy and self.ejected_until <= now
+
+    def as_dict(self, now: float) -> dict:
+        return {
+            "admin_url": self.agent.admin_url,
+            "available": self.available(now),
+            "healthy": self.healthy,
+            "ejected_for": max(self.ejected_until - now, 0.0),
+            "outstanding": self.outstanding,
+            "latency_ms": round(self.latency * 1000, 1),
+            "consecutive_failures": self.consecutive_failures
+        }
+
+class AgentPool:
+    """Drop-in replacement for ``SSIAgent`` that balances over several agents"""
+
+    def __init__(self, admin_urls: List[str], store=None, health_interval: float = 5.0, eject_failures: int = 3,
+                 eject_latency: float = 5.0, eject_duration: float = 30.0, affinity_size: int = 100000,
+                 **agent_options):
+        """
+        Args:
+            admin_urls: Admin API URLs of agents sharing one wallet DID and cred def
+            store: State store recording which agent owns each connection (``admin_url``)
+            health_interval: Seconds between active ``/status/live`` checks (0 disables)
+            eject_failures: Consecutive failures after which an agent is ejected
+            eject_latency: Average latency in seconds above which an agent is ejected
+            eject_duration: Seconds an ejected agent receives no new requests
+            affinity_size: Connection/exchange owners cached in memory in front of the store
+            agent_options: Keyword arguments for each ``SSIAgent``
+        """
+        self.members = [PoolMember(SSIAgent(url, **agent_options)) for url in admin_urls]
+        self.store = store
+        self.health_interval = health_interval
+        self.eject_failures = eject_failures
+        self.eject_latency = eject_latency
+        self.eject_duration = eject_duration
+        self.affinity_size = affinity_size
+        self._affinity: "OrderedDict[str, PoolMember]" = OrderedDict()
+        self._health_task: Optional[asyncio.Task] = None
+        self._next = 0
+
+    @property
+    def admin_url(self) -> str:
+        return ", ".join(member.agent.admin_url for member in self.members)
+
+    @property
+    def schema_id(self):
+        return self.members[0].agent.schema_id
+
+    @schema_id.setter
+    def schema_id(self, value):
+        for member in self.members:
+            member.agent.schema_id = value
+
+    @property
+    def cred_def_id(self):
+        return self.members[0].agent.cred_def_id
+
+    @cred_def_id.setter
+    def cred_def_id(self, value):
+        for member in self.members:
+            member.agent.cred_def_id = value
+
+    async def start_session(self):
+        """Start HTTP sessions and the health checker"""
+        for member in self.members:
+            await member.agent.start_session()
+        if self.health_interval > 0:
+            self._health_task = asyncio.ensure_future(self._health_loop())
+
+    async def close_session(self):
+        """Stop the health checker and close HTTP sessions"""
+        if self._health_task is not None:
+            self._health_task.cancel()
+            try:
+                await self._health_task
+            except asyncio.CancelledError:
+                pass
+            self._health_task = None
+        for member in self.members:
+            await member.agent.close_session()
+
+    def health(self) -> List[dict]:
+        """Balancing and health state of every agent"""
+        now = asyncio.get_running_loop().time()
+        return [member.as_dict(now) for member in self.members]
+
+    # Member selection
+
+    def _remember(self, key: Optional[str], member: Optional[PoolMember]):
+        if not key or member is None:
+            return
+        self._affinity[key] = member
+        self._affinity.move_to_end(key)
+        while len(self._affinity) > self.affinity_size:
+            self._affinity.popitem(last=False)
+
+    def _affine_member(self, key: Optional[str]) -> Optional[PoolMember]:
+        member = self._affinity.get(key) if key else None
+        if member is not None:
+            self._affinity.move_to_end(key)
+        return member
+
+    def _least_outstanding(self) -> PoolMember:
+        now = asyncio.get_running_loop().time()
+        # Fail open: with every agent ejected, keep trying all of them
+        candidates = [member for member in self.members if member.available(now)] or self.members
+        # Rotate the starting point so ties do not always land on the first agent
+        self._next = (self._next + 1) % len(candidates)
+        rotated = candidates[self._next:] + candidates[:self._next]
+        return min(rotated, key=lambda member: (member.outstanding, member.latency))
+
+    def _member_for_url(self, admin_url: Optional[str]) -> Optional[PoolMember]:
+        for member in self.members:
+            if member.agent.admin_url == admin_url:
+                return member
+        return None
+
+    async def _owner(self, kind: Optional[str], key: Optional[str]) -> Optional[PoolMember]:
+        """Agent owning a connection or exchange, from the cache or else the state store"""
+        member = self._affine_member(key)
+        if member is not None or not key or self.store is None:
+            return member
+        if kind == "connection":
+            record = await self.store.get_connection(key)
+        elif kind == "credential_exchange":
+            record = await self.store.find_connection_by_exchange(credential_exchange_id=key)
+        else:
+            record = await self.store.find_connection_by_exchange(presentation_exchange_id=key)
+        member = self._member_for_url(record.admin_url if record else None)
+        self._remember(key, member)
+        return member
+
+    async def _select(self, kind: Optional[str] = None, key: Optional[str] = None) -> PoolMember:
+        member = await self._owner(kind, key)
+        if member is not None and member.available(asyncio.get_running_loop().time()):
+            return member
+        return self._least_outstanding()
+
+    async def _bind(self, connection_id: Optional[str], member: PoolMember):
+        """Record the agent a new connection lives on"""
+        if not connection_id:
+            return
+        self._remember(connection_id, member)
+        if self.store is not None:
+            await self.store.update_connection(connection_id, {"admin_url": member.agent.admin_url})
+
+    @staticmethod
+    def _affinity_key(path: str) -> Tuple[Optional[str], Optional[str]]:
+        """``(kind, id)`` of the connection or exchange a path is about, or ``(None, None)``"""
+        for pattern, kind in AFFINITY_PATTERNS:
+            match = pattern.match(path)
+            if match and match.group(1) not in NON_ID_SEGMENTS:
+                return kind, urllib.parse.unquote(match.group(1))
+        query = urllib.parse.urlparse(path).query
+        connection_id = urllib.parse.parse_qs(query).get("connection_id", [None])[0]
+        return ("connection", connection_id) if connection_id else (None, None)
+
+    # Request accounting
+
+    def _record(self, member: PoolMember, elapsed: float, failed: bool):
+        now = asyncio.get_running_loop().time()
+        member.latency = elapsed if not member.latency else (
+            LATENCY_EWMA_ALPHA * elapsed + (1 - LATENCY_EWMA_ALPHA) * member.latency
+        )
+        member.consecutive_failures = member.consecutive_failures + 1 if failed else 0
+
+        reason = None
+        if member.consecutive_failures >= self.eject_failures:
+            reason = f"{member.consecutive_failures} consecutive failures"
+        elif self.eject_latency > 0 and member.latency > self.eject_latency:
+            reason = f"average latency {member.latency:.2f}s"
+        if reason and member.ejected_until <= now and len(self.members) > 1:
+            member.ejected_until = now + self.eject_duration
+            member.consecutive_failures = 0
+            # Start from a clean slate once the ejection ends
+            member.latency = 0.0
+            logger.warning(f"Ejecting agent {member.agent.admin_url} for {self.eject_duration}s: {reason}")
+
+    async def _call(self, member: PoolMember, method: str, *args) -> dict:
+        loop = asyncio.get_running_loop()
+        member.outstanding += 1
+        started = loop.time()
+        failed = True
+        try:
+            result = await getattr(member.agent, method)(*args)
+            failed = is_agent_failure(result)
+            return result
+        finally:
+            member.outstanding -= 1
+            self._record(member, loop.time() - started, failed)
+
+    # SSIAgent interface
+
+    async def admin_request(self, method: str, path: str, data: dict = None) -> dict:
+        """Send an admin request to the agent owning the path's connection or exchange
+
+        GETs of list endpoints go to every agent instead; ``limit``/``offset``
+        then page through each agent's own records, so one merged page holds up
+        to a page per agent. A listing any agent fails to answer is an error,
+        since a partial list cannot be told apart from a complete one.
+        """
+        kind, key = self._affinity_key(path)
+        if key is None and method == "GET" and urllib.parse.urlparse(path).path in LIST_PATHS:
+            return await self._list_all(path)
+        member = await self._select(kind, key)
+        result = await self._call(member, "admin_request", method, path, data)
+        if isinstance(result, dict) and key and "error" not in result:
+            self._remember(key, member)
+        return result
+
+    async def _list_all(self, path: str) -> dict:
+        results = await asyncio.gather(*(self._call(member, "admin_request", "GET", path) for member in self.members))
+        merged = []
+        for member, result in zip(self.members, results):
+            if "error" in result:
+                return {"error": f"{member.agent.admin_url}: {result['error']}"}
+            for record in result.get("results", []):
+                # Follow-up calls about a listed connection go to the agent that listed it
+                self._remember(record.get("connection_id"), member)
+                merged.append(record)
+        return {"results": merged}
+
+    async def create_invitation(self, purpose: str = "general") -> dict:
+        member = await self._select()
+        result = await self._call(member, "create_invitation", purpose)
+        await self._bind(result.get("connection_id"), member)
+        return result
+
+    async def issue_credential(self, connection_id: str, attributes: dict) -> dict:
+        member = await self._select("connection", connection_id)
+        result = await self._call(member, "issue_credential", connection_id, attributes)
+        self._remember(result.get("credential_exchange_id"), member)
+        return result
+
+    async def request_proof(self, connection_id: str) -> dict:
+        member = await self._select("connection", connection_id)
+        result = await self._call(member, "request_proof", connection_id)
+        self._remember(result.get("presentation_exchange_id"), member)
+        return result
+
+    async def setup_schema_and_cred_def(self) -> bool:
+        """Resolve ledger ids on one agent and share them with the rest"""
+        member = self._least_outstanding()
+        if not await self._call(member, "setup_schema_and_cred_def"):
+            return False
+        self.schema_id = member.agent.schema_id
+        self.cred_def_id = member.agent.cred_def_id
+        return True
+
+    # Active health checks
+
+    async def _check(self, member: PoolMember):
+        result = await member.agent.admin_request("GET", "/status/live")
+        healthy = bool(isinstance(result, dict) and result.get("alive"))
+        if healthy != member.healthy:
+            logger.warning(f"Agent {member.agent.admin_url} is {'healthy' if healthy else 'unhealthy'}")
+        member.healthy = healthy
+
+    async def _health_loop(self):
+        while True:
+            await asyncio.gather(*(self._check(member) for member in self.members), return_exceptions=True)
+            await asyncio.sleep(self.health_interval)
@@ -4,68 +4,309 @@ API Routes for SSI Demo Application
 This module contains all the web API endpoints for the SSI demo.
 """
 
+import asyncio
 import json
 import logging
 import urllib.parse
-import qrcode
-from io import BytesIO
-import base64
 from datetime import datetime
 from aiohttp import web
 from aiohttp.web import Request, Response, RouteTableDef
 
+from .events import event_bus
+from .flows import CREDENTIAL_ISSUED_STATES, FlowRecord, FlowStage, FlowType
+from .tenants import get_agent, request_tenant_id
+
 logger = logging.getLogger(__name__)
 routes = RouteTableDef()
 
-# Global state
-app_state = {
-    "connections": {},
-    "pending_attributes": {}
+# Browser cache lifetime for invitation QR images (seconds)
+QR_CACHE_MAX_AGE = 86400
+
+QR_CONTENT_TYPES = {
+    "png": "image/png",
+    "svg": "image/svg+xml"
 }
 
-def generate_qr_code(data: str) -> str:
-    """Generate QR code as base64 string"""
+# Seconds between keep-alive comments on idle event streams
+EVENT_STREAM_HEARTBEAT = 15
+
+def extract_revealed_attributes(record: dict) -> dict:
+    """Extract revealed attribute values from a presentation exchange record"""
+    presentation = record.get("presentation", {})
+    revealed_attrs = {}
+    
+    if presentation:
+        try:
+            requested_proof = presentation.get("requested_proof", {})
+            if requested_proof:
+                revealed_attrs_v1 = requested_proof.get("revealed_attrs", {})
+                for attr_name, attr_data in revealed_attrs_v1.items():
+                    if "raw" in attr_data:
+                        # Extract the actual attribute name from referent
+                        actual_name = attr_name.replace("_referent", "")
+                        revealed_attrs[actual_name] = attr_data["raw"]
+        except Exception as e:
+            logger.error(f"Error extracting proof attributes: {str(e)}")
+    
+    return revealed_attrs
+
+async def index_presentation_exchange(store, connection_id: str, pres_ex_id: str, record: dict = None):
+    """Remember which presentation exchange belongs to a connection
+    
+    Binds the exchange id to the connection record (the store indexes it for
+    webhook lookups), and caches a verified record so later polls do not hit
+    the admin API at all. Returns the updated connection record.
+    """
+    if not pres_ex_id:
+        return None
+    
+    connection_info = await store.get_connection(connection_id)
+    previous = connection_info.presentation_exchange_id if connection_info else None
+    remove = []
+    if previous and previous != pres_ex_id:
+        # A new proof request supersedes whatever the previous exchange reached
+        remove = ["proof_state", "proof_record", "proof_attributes"]
+    
+    fields = {"presentation_exchange_id": pres_ex_id}
+    if record is not None:
+        fields["proof_state"] = record.get("state")
+        if record.get("state") == "verified":
+            fields["proof_record"] = record
+            fields["proof_attributes"] = extract_revealed_attributes(record)
+    
+    return await store.update_connection(connection_id, fields, remove=remove)
+
+async def lookup_proof_record(store, agent, connection_id: str):
+    """Fetch the presentation exchange record for a connection
+    
+    Returns a ``(record, error)`` tuple. Resolution is O(1) in the number of
+    exchanges ACA-Py holds: a cached verified record is served locally, a known
+    exchange id is fetched directly, and otherwise the admin API is asked to
+    filter by connection instead of returning every record.
+    """
+    connection_info = await store.get_connection(connection_id)
+    
+    if connection_info and connection_info.proof_record is not None:
+        return connection_info.proof_record, None
+    
+    pres_ex_id = connection_info.presentation_exchange_id if connection_info else None
+    if pres_ex_id:
+        record = await agent.admin_request("GET", f"/present-proof/records/{pres_ex_id}")
+        if "error" not in record and "state" in record:
+            await index_presentation_exchange(store, connection_id, pres_ex_id, record)
+            return record, None
+    
+    result = await agent.admin_request("GET", f"/present-proof/records?connection_id={urllib.parse.quote(connection_id)}")
+    if "error" in result:
+        return None, result["error"]
+    
+    proof_records = [
+        record for record in result.get("results", [])
+        if record.get("connection_id") == connection_id
+    ]
+    if not proof_records:
+        return None, None
+    
+    # Most recently updated exchange wins when a connection has several
+    record = max(proof_records, key=lambda r: r.get("updated_at", ""))
+    await index_presentation_exchange(store, connection_id, record.get("presentation_exchange_id"), record)
+    return record, None
+
+def invitation_url_from_result(invitation_result: dict) -> str:
+    """Pick the invitation URL to encode in the QR code for a create-invitation result"""
+    invitation = invitation_result.get("invitation", {})
+    
+    if "invitation_url" in invitation_result:
+        qr_data = invitation_result["invitation_url"]
+        logger.debug("Using invitation_url: %s", qr_data)
+    elif "invitation_url" in invitation:
+        qr_data = invitation["invitation_url"]
+        logger.debug("Using invitation.invitation_url: %s", qr_data)
+    else:
+        try:
+            invitation_json = json.dumps(invitation)
+            encoded_invitation = urllib.parse.quote(invitation_json)
+            qr_data = f"https://didcomm.org/out-of-band/?oob={encoded_invitation}"
+            logger.debug("Created invitation URL from object: %s", qr_data)
+        except Exception as e:
+            logger.error(f"Error creating invitation URL: {e}")
+            qr_data = json.dumps(invitation)
+    
+    return qr_data
+
+async def register_invitation(store, connection_id: str, connection_type: FlowType, invitation: dict,
+                              invitation_url: str, **fields):
+    """Store a freshly created invitation in the connection table
+    
+    Merges into any record a webhook created first, since ACA-Py may report the
+    new connection before the create-invitation call returns. Extra ``fields``
+    (owning tenant, issuer attributes, cred def id) are bound to the flow here,
+    at creation.
+    """
+    await store.update_connection(connection_id, {
+        "type": connection_type,
+        "created_at": datetime.now().isoformat(),
+        "invitation": invitation,
+        "invitation_url": invitation_url,
+        **fields
+    }, defaults={"status": "invitation_sent", "stage": FlowStage.INVITED})
+
+def connection_event(state: str, rfc23_state: str = "") -> dict:
+    """Build the event payload for a connection state change"""
+    return {
+        "connected": state == "active",
+        "state": state,
+        "rfc23_state": rfc23_state
+    }
+
+def credential_event(state: str, cred_ex_id: str) -> dict:
+    """Build the event payload for a credential exchange state change"""
+    return {
+        "issued": state in CREDENTIAL_ISSUED_STATES,
+        "state": state,
+        "credential_exchange_id": cred_ex_id
+    }
+
+def proof_event(state: str, attributes: dict = None) -> dict:
+    """Build the event payload for a presentation exchange state change"""
+    payload = {
+        "verified": state == "verified",
+        "requested": state in ["request_sent", "presentation_received", "verified"],
+        "state": state
+    }
+    if attributes is not None:
+        payload["attributes"] = attributes
+    return payload
+
+def project_fields(request: Request, payload: dict, optional: dict = None) -> dict:
+    """Apply a ``?fields=a,b`` projection to a response payload
+    
+    ``optional`` holds keys that are left out unless asked for by name, such as
+    the full proof record. Without ``fields`` the payload is returned as is.
+    """
+    fields = request.query.get("fields")
+    if not fields:
+        return payload
+    available = {**payload, **(optional or {})}
+    return {name: available[name] for name in (field.strip() for field in fields.split(",")) if name in available}
+
+def webhooks_enabled(app: web.Application) -> bool:
+    """Whether ACA-Py delivers webhooks to this process
+    
+    With ``SSI_WEBHOOKS=auto`` this is known from ACA-Py's reported config, or
+    from the first webhook to arrive. It is not decided per connection, since a
+    connection's own first webhook usually comes after the page subscribes.
+    """
+    setting = app["settings"].webhooks
+    if setting == "auto":
+        return app["webhook_state"]["enabled"]
+    return setting == "true"
+
+async def get_connection_state(store, agent, connection_id: str):
+    """Resolve connection state, preferring webhook-fed state over the admin API
+    
+    Returns a ``(state, rfc23_state, error)`` tuple. Once ACA-Py has delivered a
+    ``connections`` webhook for the connection the answer comes straight from
+    the state store with no admin round trip.
+    """
+    connection_info = await store.get_connection(connection_id)
+    if connection_info and connection_info.webhook_updated_at is not None:
+        return connection_info.status, connection_info.rfc23_state or "", None
+    
+    connections_result = await agent.admin_request("GET", f"/connections/{connection_id}")
+    
+    if "error" in connections_result:
+        return None, None, connections_result["error"]
+    
+    if "state" not in connections_result:
+        return None, None, f"Failed to get connection status: {connections_result}"
+    
+    return connections_result["state"], connections_result.get("rfc23_state", ""), None
+
+async def get_credential_state(agent, connection_info: FlowRecord):
+    """Resolve credential exchange state, preferring webhook-fed state over the admin API
+
+    Returns a ``(state, error)`` tuple. Once ACA-Py has delivered an
+    ``issue_credential`` webhook for the exchange the answer comes straight
+    from the state store with no admin round trip.
+    """
+    if connection_info.credential_state:
+        return connection_info.credential_state, None
+
+    cred_ex_id = connection_info.credential_exchange_id
+    cred_status_result = await agent.admin_request("GET", f"/issue-credential/records/{cred_ex_id}")
+
+    if "state" not in cred_status_result:
+        return None, f"Failed to get credential status: {cred_status_result}"
+
+    return cred_status_result["state"], None
+
+async def advance_issuer_flow(store, agent, connection_id: str):
+    """Issue the credential once an issuer connection becomes active"""
+    connection_info = await store.get_connection(connection_id)
+    if not connection_info or connection_info.type != FlowType.ISSUER:
+        return
+    
+    # Issue credential when connection becomes active and we haven't issued yet
+    if connection_info.status != "active" or connection_info.stage != FlowStage.INVITED:
+        return
+    
+    # The claim keeps concurrent polls, webhooks and worker processes from issuing twice
+    if not await store.claim_connection(connection_id, "issuing"):
+        return
     try:
-        # If data is already a URL, use it directly
-        if data.startswith('http'):
-            qr_data = data
+        connection_info = await store.get_connection(connection_id)
+        if connection_info.stage != FlowStage.INVITED:
+            return
+        
+        logger.info("Auto-issuing credential for connection %s", connection_id)
+        credential_result = await agent.issue_credential(connection_id, connection_info.attributes or {})
+        
+        if "credential_exchange_id" in credential_result:
+            await store.update_connection(connection_id, {
+                "stage": FlowStage.CREDENTIAL_OFFERED,
+                "credential_exchange_id": credential_result["credential_exchange_id"]
+            })
+            logger.info("Credential auto-issued successfully: %s", credential_result["credential_exchange_id"])
         else:
-            # If it's JSON invitation data, try to parse and format properly
-            try:
-                invitation_json = json.loads(data) if isinstance(data, str) else data
-                encoded_invitation = urllib.parse.quote(json.dumps(invitation_json))
-                qr_data = f"https://didcomm.org/out-of-band/?oob={encoded_invitation}"
-            except (json.JSONDecodeError, TypeError):
-                qr_data = str(data)
-        
-        logger.info(f"Generating QR code for: {qr_data[:100]}...")
-        
-        qr = qrcode.QRCode(
-            version=1,
-            error_correction=qrcode.constants.ERROR_CORRECT_L,
-            box_size=10,
-            border=5
-        )
-        qr.add_data(qr_data)
-        qr.make(fit=True)
-        
-        img = qr.make_image(fill_color="black", back_color="white")
-        buffer = BytesIO()
-        img.save(buffer, format='PNG')
-        buffer.seek(0)
-        
-        return base64.b64encode(buffer.getvalue()).decode()
+            logger.error(f"Failed to auto-issue credential: {credential_result}")
+            
+    except Exception as cred_error:
+        logger.error(f"Error auto-issuing credential: {str(cred_error)}")
+    finally:
+        await store.update_connection(connection_id, remove=["issuing"], create=False)
+
+async def advance_verifier_flow(store, agent, connection_id: str):
+    """Send the proof request once a verifier connection becomes active"""
+    connection_info = await store.get_connection(connection_id)
+    if not connection_info or connection_info.type != FlowType.VERIFIER:
+        return
+    
+    # If connected and not already requested proof, request it
+    if connection_info.status != "active" or connection_info.stage != FlowStage.INVITED:
+        return
+    
+    if not await store.claim_connection(connection_id, "requesting_proof"):
+        return
+    try:
+        connection_info = await store.get_connection(connection_id)
+        if connection_info.stage != FlowStage.INVITED:
+            return
         
-    except Exception as e:
-        logger.error(f"Error generating QR code: {str(e)}")
-        qr = qrcode.QRCode(version=1, box_size=10, border=5)
-        qr.add_data(f"Error: {str(e)}")
-        qr.make(fit=True)
-        img = qr.make_image(fill_color="black", back_color="white")
-        buffer = BytesIO()
-        img.save(buffer, format='PNG')
-        buffer.seek(0)
-        return base64.b64encode(buffer.getvalue()).decode()
+        logger.info("Auto-requesting proof for connection %s", connection_id)
+        proof_result = await agent.request_proof(connection_id)
+        
+        if "presentation_exchange_id" in proof_result:
+            await store.update_connection(connection_id, {"stage": FlowStage.PROOF_REQUESTED})
+            await index_presentation_exchange(store, connection_id, proof_result["presentation_exchange_id"])
+            logger.info("Proof request sent successfully: %s", proof_result["presentation_exchange_id"])
+        else:
+            logger.error(f"Failed to request proof: {proof_result}")
+            
+    except Exception as proof_error:
+        logger.error(f"Error requesting proof: {str(proof_error)}")
+    finally:
+        await store.update_connection(connection_id, remove=["requesting_proof"], create=False)
 
 @routes.post('/api/issuer/create-invitation')
 async def api_issuer_create_invitation(request: Request) -> Response:
@@ -73,43 +314,28 @@ async def api_issuer_create_invitation(request: Request) -> Response:
     try:
         data = await request.json()
         
-        # Store the credential attributes for later use
-        app_state["pending_attributes"] = {
+        # Credential attributes issued once the connection becomes active
+        attributes = {
             "username": data.get("username", ""),
             "email": data.get("email", ""),
             "occupation": data.get("occupation", ""),
             "citizenship": data.get("citizenship", "")
         }
         
-        # Get the agent from the app
-        agent = request.app["ssi_agent"]
+        # Get the agent serving this request (base or tenant) and the state store
+        agent = get_agent(request)
+        store = request.app["state_store"]
         
         # Create invitation
         invitation_result = await agent.create_invitation("issuer")
-        logger.info(f"Invitation result: {invitation_result}")
+        logger.debug("Invitation result: %s", invitation_result)
         
         if "invitation" in invitation_result and "connection_id" in invitation_result:
             connection_id = invitation_result["connection_id"]
             invitation = invitation_result["invitation"]
             
-            # Generate QR code from invitation
-            qr_data = None
-            
-            if "invitation_url" in invitation_result:
-                qr_data = invitation_result["invitation_url"]
-                logger.info(f"Using invitation_url: {qr_data}")
-            elif "invitation_url" in invitation:
-                qr_data = invitation["invitation_url"]
-                logger.info(f"Using invitation.invitation_url: {qr_data}")
-            else:
-                try:
-                    invitation_json = json.dumps(invitation)
-                    encoded_invitation = urllib.parse.quote(invitation_json)
-                    qr_data = f"https://didcomm.org/out-of-band/?oob={encoded_invitation}"
-                    logger.info(f"Created invitation URL from object: {qr_data[:100]}...")
-                except Exception as e:
-                    logger.error(f"Error creating invitation URL: {e}")
-                    qr_data = json.dumps(invitation)
+            # URL encoded in the QR code served by /api/qr/{connection_id}
+            qr_data = invitation_url_from_result(invitation_result)
             
             if not qr_data:
                 logger.error("No valid QR data found")
@@ -118,30 +344,16 @@ async def api_issuer_create_invitation(request: Request) -> Response:
                     "error": "Failed to generate QR code data"
                 })
             
-            try:
-                qr_code = generate_qr_code(qr_data)
-            except Exception as e:
-                logger.error(f"QR code generation failed: {e}")
-                return web.json_response({
-                    "success": False,
-                    "error": f"QR code generation failed: {str(e)}"
-                })
-            
             # Store connection info
-            app_state["connections"][connection_id] = {
-                "type": "issuer",
-                "status": "invitation_sent",
-                "attributes": app_state["pending_attributes"].copy(),
-                "created_at": datetime.now().isoformat(),
-                "invitation": invitation
-            }
+            await register_invitation(store, connection_id, FlowType.ISSUER, invitation, qr_data,
+                                      tenant_id=request_tenant_id(request), attributes=attributes)
             
             return web.json_response({
                 "success": True,
                 "connection_id": connection_id,
-                "qr_code": qr_code,
                 "cred_def_id": agent.cred_def_id,
-                "invitation_data": qr_data[:200] + "..." if len(str(qr_data)) > 200 else str(qr_data)
+                "invitation_url": qr_data,
+                "qr_url": f"/api/qr/{connection_id}.png"
             })
         else:
             logger.error(f"Invalid invitation result: {invitation_result}")
@@ -161,8 +373,8 @@ async def api_issuer_create_invitation(request: Request) -> Response:
 async def api_verifier_create_invitation(request: Request) -> Response:
     """Create verifier connection invitation"""
     try:
-        # Get the agent from the app
-        agent = request.app["ssi_agent"]
+        # Get the agent serving this request (base or tenant)
+        agent = get_agent(request)
         
         if not agent.cred_def_id:
             return web.json_response({
@@ -172,30 +384,14 @@ async def api_verifier_create_invitation(request: Request) -> Response:
         
         # Create invitation
         invitation_result = await agent.create_invitation("verifier")
-        logger.info(f"Verifier invitation result: {invitation_result}")
+        logger.debug("Verifier invitation result: %s", invitation_result)
         
         if "invitation" in invitation_result and "connection_id" in invitation_result:
             connection_id = invitation_result["connection_id"]
             invitation = invitation_result["invitation"]
             
-            # Generate QR code from invitation
-            qr_data = None
-            
-            if "invitation_url" in invitation_result:
-                qr_data = invitation_result["invitation_url"]
-                logger.info(f"Using verifier invitation_url: {qr_data}")
-            elif "invitation_url" in invitation:
-                qr_data = invitation["invitation_url"]
-                logger.info(f"Using verifier invitation.invitation_url: {qr_data}")
-            else:
-                try:
-                    invitation_json = json.dumps(invitation)
-                    encoded_invitation = urllib.parse.quote(invitation_json)
-                    qr_data = f"https://didcomm.org/out-of-band/?oob={encoded_invitation}"
-                    logger.info(f"Created verifier invitation URL from object: {qr_data[:100]}...")
-                except Exception as e:
-                    logger.error(f"Error creating verifier invitation URL: {e}")
-                    qr_data = json.dumps(invitation)
+            # URL encoded in the QR code served by /api/qr/{connection_id}
+            qr_data = invitation_url_from_result(invitation_result)
             
             if not qr_data:
                 logger.error("No valid verifier QR data found")
@@ -204,30 +400,16 @@ async def api_verifier_create_invitation(request: Request) -> Response:
                     "error": "Failed to generate verifier QR code data"
                 })
             
-            try:
-                qr_code = generate_qr_code(qr_data)
-            except Exception as e:
-                logger.error(f"Verifier QR code generation failed: {e}")
-                return web.json_response({
-                    "success": False,
-                    "error": f"Verifier QR code generation failed: {str(e)}"
-                })
-            
             # Store connection info
-            app_state["connections"][connection_id] = {
-                "type": "verifier",
-                "status": "invitation_sent",
-                "cred_def_id": agent.cred_def_id,
-                "created_at": datetime.now().isoformat(),
-                "invitation": invitation
-            }
+            await register_invitation(request.app["state_store"], connection_id, FlowType.VERIFIER, invitation, qr_data,
+                                      tenant_id=request_tenant_id(request), cred_def_id=agent.cred_def_id)
             
             return web.json_response({
                 "success": True,
                 "connection_id": connection_id,
-                "qr_code": qr_code,
                 "cred_def_id": agent.cred_def_id,
-                "invitation_data": qr_data[:200] + "..." if len(str(qr_data)) > 200 else str(qr_data)
+                "invitation_url": qr_data,
+                "qr_url": f"/api/qr/{connection_id}.png"
             })
         else:
             logger.error(f"Invalid verifier invitation result: {invitation_result}")
@@ -243,67 +425,69 @@ async def api_verifier_create_invitation(request: Request) -> Response:
             "error": str(e)
         })
 
+@routes.get('/api/qr/{connection_id}.{fmt:png|svg}')
+async def api_qr_code(request: Request) -> Response:
+    """Serve the invitation QR code for a connection as raw PNG or SVG bytes"""
+    connection_id = request.match_info['connection_id']
+    fmt = request.match_info['fmt']
+    
+    connection_info = await request.app["state_store"].get_connection(connection_id)
+    if not connection_info or not connection_info.invitation_url:
+        raise web.HTTPNotFound(text="Connection not found")
+    
+    renderer = request.app["qr_renderer"]
+    qr_data = connection_info.invitation_url
+    etag = renderer.etag(qr_data, fmt)
+    headers = {
+        "ETag": etag,
+        "Cache-Control": f"private, max-age={QR_CACHE_MAX_AGE}, immutable"
+    }
+    
+    # The invitation behind a connection never changes, so a matching ETag skips rendering
+    if etag in request.headers.get("If-None-Match", ""):
+        return web.Response(status=304, headers=headers)
+    
+    try:
+        image = await renderer.render(qr_data, fmt)
+    except Exception as e:
+        logger.error(f"QR code generation failed: {e}")
+        raise web.HTTPInternalServerError(text=f"QR code generation failed: {str(e)}")
+    
+    return web.Response(body=image, content_type=QR_CONTENT_TYPES[fmt], headers=headers)
+
 @routes.get('/api/issuer/status/{connection_id}')
 async def api_issuer_status(request: Request) -> Response:
     """Get issuer connection status"""
     connection_id = request.match_info['connection_id']
     
     try:
-        agent = request.app["ssi_agent"]
+        agent = get_agent(request)
+        store = request.app["state_store"]
         
-        # Check connection status
-        connections_result = await agent.admin_request("GET", f"/connections/{connection_id}")
+        state, rfc23_state, error = await get_connection_state(store, agent, connection_id)
         
-        if "error" in connections_result:
+        if error:
             return web.json_response({
                 "connected": False,
-                "error": connections_result["error"]
+                "error": error
             })
         
-        if "state" in connections_result:
-            state = connections_result["state"]
-            rfc23_state = connections_result.get("rfc23_state", "")
-            
-            logger.info(f"Connection {connection_id} state: {state}, rfc23_state: {rfc23_state}")
-            
-            # Connection is active when state is "active"
-            is_connected = state == "active"
-            # Mobile wallet interaction detected if state changed from initial invitation
-            wallet_interacted = state != "invitation"
-            
-            if connection_id in app_state["connections"]:
-                current_status = app_state["connections"][connection_id].get("status", "")
-                app_state["connections"][connection_id]["status"] = state
-                
-                # Issue credential when connection becomes active and we haven't issued yet
-                if state == "active" and "credential_issued" not in app_state["connections"][connection_id]:
-                    attributes = app_state["connections"][connection_id].get("attributes", {})
-                    
-                    logger.info(f"Auto-issuing credential for connection {connection_id} (state: {state})")
-                    try:
-                        credential_result = await agent.issue_credential(connection_id, attributes)
-                        
-                        if "credential_exchange_id" in credential_result:
-                            app_state["connections"][connection_id]["credential_issued"] = True
-                            app_state["connections"][connection_id]["credential_exchange_id"] = credential_result["credential_exchange_id"]
-                            logger.info(f"Credential auto-issued successfully: {credential_result['credential_exchange_id']}")
-                        else:
-                            logger.error(f"Failed to auto-issue credential: {credential_result}")
-                            
-                    except Exception as cred_error:
-                        logger.error(f"Error auto-issuing credential: {str(cred_error)}")
-            
-            return web.json_response({
-                "connected": is_connected,
-                "state": state,
-                "rfc23_state": rfc23_state,
-                "wallet_interacted": wallet_interacted
-            })
-        else:
-            return web.json_response({
-                "connected": False,
-                "error": f"Failed to get connection status: {connections_result}"
-            })
+        logger.debug("Connection %s state: %s, rfc23_state: %s", connection_id, state, rfc23_state)
+        
+        # Connection is active when state is "active"
+        is_connected = state == "active"
+        # Mobile wallet interaction detected if state changed from initial invitation
+        wallet_interacted = state != "invitation"
+        
+        if await store.update_connection(connection_id, {"status": state}, create=False):
+            await advance_issuer_flow(store, agent, connection_id)
+        
+        return web.json_response({
+            "connected": is_connected,
+            "state": state,
+            "rfc23_state": rfc23_state,
+            "wallet_interacted": wallet_interacted
+        })
             
     except Exception as e:
         logger.error(f"Error checking issuer status: {str(e)}")
@@ -318,56 +502,30 @@ async def api_verifier_status(request: Request) -> Response:
     connection_id = request.match_info['connection_id']
     
     try:
-        agent = request.app["ssi_agent"]
+        agent = get_agent(request)
+        store = request.app["state_store"]
         
-        # Check connection status
-        connections_result = await agent.admin_request("GET", f"/connections/{connection_id}")
+        state, rfc23_state, error = await get_connection_state(store, agent, connection_id)
         
-        if "error" in connections_result:
+        if error:
             return web.json_response({
                 "connected": False,
-                "error": connections_result["error"]
+                "error": error
             })
         
-        if "state" in connections_result:
-            state = connections_result["state"]
-            rfc23_state = connections_result.get("rfc23_state", "")
-            
-            # Connection is active when state is "active"
-            is_connected = state == "active"
-            
-            logger.info(f"Verifier connection {connection_id} state: {state}, rfc23_state: {rfc23_state}")
-            
-            if connection_id in app_state["connections"]:
-                app_state["connections"][connection_id]["status"] = state
-                
-                # If connected and not already requested proof, request it
-                if is_connected and "proof_requested" not in app_state["connections"][connection_id]:
-                    logger.info(f"Auto-requesting proof for connection {connection_id}")
-                    
-                    try:
-                        proof_result = await agent.request_proof(connection_id)
-                        
-                        if "presentation_exchange_id" in proof_result:
-                            app_state["connections"][connection_id]["proof_requested"] = True
-                            app_state["connections"][connection_id]["presentation_exchange_id"] = proof_result["presentation_exchange_id"]
-                            logger.info(f"Proof request sent successfully: {proof_result['presentation_exchange_id']}")
-                        else:
-                            logger.error(f"Failed to request proof: {proof_result}")
-                            
-                    except Exception as proof_error:
-                        logger.error(f"Error requesting proof: {str(proof_error)}")
-            
-            return web.json_response({
-                "connected": is_connected,
-                "state": state,
-                "rfc23_state": rfc23_state
-            })
-        else:
-            return web.json_response({
-                "connected": False,
-                "error": f"Failed to get connection status: {connections_result}"
-            })
+        # Connection is active when state is "active"
+        is_connected = state == "active"
+        
+        logger.debug("Verifier connection %s state: %s, rfc23_state: %s", connection_id, state, rfc23_state)
+        
+        if await store.update_connection(connection_id, {"status": state}, create=False):
+            await advance_verifier_flow(store, agent, connection_id)
+        
+        return web.json_response({
+            "connected": is_connected,
+            "state": state,
+            "rfc23_state": rfc23_state
+        })
             
     except Exception as e:
         logger.error(f"Error checking verifier status: {str(e)}")
@@ -382,27 +540,24 @@ async def api_issuer_credential_status(request: Request) -> Response:
     connection_id = request.match_info['connection_id']
     
     try:
-        agent = request.app["ssi_agent"]
+        agent = get_agent(request)
         
-        if connection_id in app_state["connections"]:
-            connection_info = app_state["connections"][connection_id]
-            
-            if "credential_exchange_id" in connection_info:
-                cred_ex_id = connection_info["credential_exchange_id"]
+        connection_info = await request.app["state_store"].get_connection(connection_id)
+        if connection_info is not None:
+            if connection_info.credential_exchange_id is not None:
+                cred_ex_id = connection_info.credential_exchange_id
                 
                 # Check credential exchange status
-                cred_status_result = await agent.admin_request("GET", f"/issue-credential/records/{cred_ex_id}")
+                state, error = await get_credential_state(agent, connection_info)
                 
-                if "state" in cred_status_result:
-                    state = cred_status_result["state"]
-                    
+                if error is None:
                     # Different states of credential exchange
-                    is_issued = state in ["credential_acked", "done"]
+                    is_issued = state in CREDENTIAL_ISSUED_STATES
                     is_offered = state == "offer_sent"
                     is_requested = state == "request_received"
                     is_pending = state in ["offer_sent", "request_received"]
                     
-                    logger.info(f"Credential exchange {cred_ex_id} state: {state}")
+                    logger.debug("Credential exchange %s state: %s", cred_ex_id, state)
                     
                     return web.json_response({
                         "issued": is_issued,
@@ -415,7 +570,7 @@ async def api_issuer_credential_status(request: Request) -> Response:
                 else:
                     return web.json_response({
                         "issued": False,
-                        "error": f"Failed to get credential status: {cred_status_result}"
+                        "error": error
                     })
             else:
                 return web.json_response({
@@ -437,66 +592,38 @@ async def api_issuer_credential_status(request: Request) -> Response:
 
 @routes.get('/api/verifier/proof-status/{connection_id}')
 async def api_verifier_proof_status(request: Request) -> Response:
-    """Get proof verification status"""
+    """Get proof verification status
+    
+    A verified response carries the state and revealed attributes; the full
+    ACA-Py record is only included with ``?fields=...,proof_record``.
+    """
     connection_id = request.match_info['connection_id']
     
     try:
-        agent = request.app["ssi_agent"]
+        agent = get_agent(request)
         
-        # Get proof records for this connection
-        result = await agent.admin_request("GET", f"/present-proof/records")
+        # Get the proof record for this connection
+        record, error = await lookup_proof_record(request.app["state_store"], agent, connection_id)
         
-        if "error" in result:
+        if error:
             return web.json_response({
                 "verified": False,
                 "requested": False,
-                "error": result["error"]
+                "error": error
             })
         
-        # Look for proof records related to this connection
-        proof_records = result.get("results", [])
+        if record is None:
+            return web.json_response(project_fields(request, {
+                "verified": False,
+                "requested": False
+            }))
         
-        for record in proof_records:
-            if record.get("connection_id") == connection_id:
-                state = record.get("state", "")
-                verified = state == "verified"
-                requested = state in ["request_sent", "presentation_received", "verified"]
-                
-                if verified:
-                    # Extract verified attributes from the proof
-                    presentation = record.get("presentation", {})
-                    revealed_attrs = {}
-                    
-                    if presentation:
-                        try:
-                            requested_proof = presentation.get("requested_proof", {})
-                            if requested_proof:
-                                revealed_attrs_v1 = requested_proof.get("revealed_attrs", {})
-                                for attr_name, attr_data in revealed_attrs_v1.items():
-                                    if "raw" in attr_data:
-                                        # Extract the actual attribute name from referent
-                                        actual_name = attr_name.replace("_referent", "")
-                                        revealed_attrs[actual_name] = attr_data["raw"]
-                        except Exception as e:
-                            logger.error(f"Error extracting proof attributes: {str(e)}")
-                    
-                    return web.json_response({
-                        "verified": True,
-                        "requested": True,
-                        "attributes": revealed_attrs,
-                        "proof_record": record
-                    })
-                
-                return web.json_response({
-                    "verified": verified,
-                    "requested": requested,
-                    "state": state
-                })
+        state = record.get("state", "")
         
-        return web.json_response({
-            "verified": False,
-            "requested": False
-        })
+        # Only a verified proof has revealed attributes to extract
+        attributes = extract_revealed_attributes(record) if state == "verified" else None
+        
+        return web.json_response(project_fields(request, proof_event(state, attributes), {"proof_record": record}))
         
     except Exception as e:
         logger.error(f"Error getting proof status: {str(e)}")
@@ -512,17 +639,21 @@ async def api_force_issue_credential(request: Request) -> Response:
     connection_id = request.match_info['connection_id']
     
     try:
-        agent = request.app["ssi_agent"]
+        agent = get_agent(request)
+        store = request.app["state_store"]
+        connection_info = await store.get_connection(connection_id)
         
-        if connection_id in app_state["connections"]:
-            attributes = app_state["connections"][connection_id].get("attributes", {})
+        if connection_info is not None:
+            attributes = connection_info.attributes or {}
             
             logger.info(f"Force issuing credential for connection {connection_id}")
             credential_result = await agent.issue_credential(connection_id, attributes)
             
             if "credential_exchange_id" in credential_result:
-                app_state["connections"][connection_id]["credential_exchange_id"] = credential_result["credential_exchange_id"]
-                app_state["connections"][connection_id]["credential_issued"] = True
+                await store.update_connection(connection_id, {
+                    "credential_exchange_id": credential_result["credential_exchange_id"],
+                    "stage": FlowStage.CREDENTIAL_OFFERED
+                })
                 
                 return web.json_response({
                     "success": True,
@@ -553,17 +684,17 @@ async def api_force_proof_request(request: Request) -> Response:
     connection_id = request.match_info['connection_id']
     
     try:
-        agent = request.app["ssi_agent"]
+        agent = get_agent(request)
+        store = request.app["state_store"]
         
-        if connection_id in app_state["connections"]:
+        if await store.get_connection(connection_id) is not None:
             logger.info(f"Force requesting proof for connection {connection_id}")
             
             proof_result = await agent.request_proof(connection_id)
             
             if "presentation_exchange_id" in proof_result:
-                app_state["connections"][connection_id]["proof_requested"] = True
-                app_state["connections"][connection_id]["force_requested"] = True
-                app_state["connections"][connection_id]["presentation_exchange_id"] = proof_result["presentation_exchange_id"]
+                await store.update_connection(connection_id, {"stage": FlowStage.PROOF_REQUESTED, "forced": True})
+                await index_presentation_exchange(store, connection_id, proof_result["presentation_exchange_id"])
                 
                 return web.json_response({
                     "success": True,
@@ -592,7 +723,7 @@ async def api_force_proof_request(request: Request) -> Response:
 async def api_agent_info(request: Request) -> Response:
     """Get agent schema and credential definition information"""
     try:
-        agent = request.app["ssi_agent"]
+        agent = get_agent(request)
         
         return web.json_response({
             "success": True,
@@ -606,3 +737,57 @@ async def api_agent_info(request: Request) -> Response:
             "success": False,
             "error": str(e)
         })
+
+
+@routes.get('/api/events/{connection_id}')
+async def api_connection_events(request: Request) -> web.StreamResponse:
+    """Stream connection, credential and proof state changes as Server-Sent Events"""
+    connection_id = request.match_info['connection_id']
+    
+    response = web.StreamResponse(headers={
+        "Content-Type": "text/event-stream",
+        "Cache-Control": "no-cache",
+        "X-Accel-Buffering": "no"
+    })
+    await response.prepare(request)
+    
+    queue = event_bus.subscribe(connection_id)
+    
+    async def send(event: str, data: dict):
+        await response.write(f"event: {event}\ndata: {json.dumps(data)}\n\n".encode())
+    
+    try:
+        connection_info = await request.app["state_store"].get_connection(connection_id) or FlowRecord(connection_id)
+        
+        # Without webhooks nothing will be published, and with several workers the
+        # webhook may be handled by another process; tell the page to poll instead
+        push = webhooks_enabled(request.app) and request.app["settings"].workers == 1
+        await send("ready", {"push": push})
+        
+        # Replay the current state so late subscribers start in sync
+        if connection_info.status:
+            await send("connection", connection_event(connection_info.status, connection_info.rfc23_state or ""))
+        if connection_info.credential_state:
+            await send("credential", credential_event(connection_info.credential_state, connection_info.credential_exchange_id))
+        if connection_info.proof_state:
+            await send("proof", proof_event(connection_info.proof_state, connection_info.proof_attributes))
+        
+        while True:
+            try:
+                item = await asyncio.wait_for(queue.get(), timeout=EVENT_STREAM_HEARTBEAT)
+            except asyncio.TimeoutError:
+                await response.write(b": keep-alive\n\n")
+                continue
+            
+            if item is None:
+                break
+            
+            event, data = item
+            await send(event, data)
+            
+    except ConnectionResetError:
+        logger.debug("Event stream for %s closed by client", connection_id)
+    finally:
+        event_bus.unsubscribe(connection_id, queue)
+    
+    return response
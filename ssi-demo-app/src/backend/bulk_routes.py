@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+Bulk Issuance Routes for SSI Demo Application
+This module onboards cohorts of users in one call: attribute rows are read from
+a CSV or NDJSON upload, invitations are created concurrently under a bounded
+semaphore, and per-row results are streamed back as NDJSON while the upload is
+still being processed.
+"""
+
+import asyncio
+import csv
+import json
+import logging
+from typing import AsyncIterator, Tuple
+from aiohttp import web
+from aiohttp.web import Request, RouteTableDef
+
+from .api_routes import invitation_url_from_result, register_invitation
+from .flows import FlowType
+from .tenants import get_agent, request_tenant_id
+
+logger = logging.getLogger(__name__)
+routes = RouteTableDef()
+
+# Attributes every row must provide
+CREDENTIAL_ATTRIBUTES = ["username", "email", "occupation", "citizenship"]
+
+CSV_CONTENT_TYPES = ["text/csv", "application/csv"]
+
+# A CSV record (which may span lines inside quotes) longer than this is rejected
+MAX_CSV_RECORD_SIZE = 64 * 1024
+
+# Strong references to background QR renders until they finish
+_background_renders = set()
+
+async def csv_records(lines: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    """Join body lines into complete CSV records
+
+    A quoted field may contain newlines, so a record only ends once its double
+    quotes balance (an escaped ``""`` counts twice). An unterminated quote is
+    cut off at ``MAX_CSV_RECORD_SIZE`` rather than buffering the whole upload.
+    """
+    pending = ""
+    async for raw_line in lines:
+        pending += raw_line.decode("utf-8-sig")
+        if pending.count('"') % 2 == 0 or len(pending) > MAX_CSV_RECORD_SIZE:
+            yield pending
+            pending = ""
+    if pending:
+        yield pending
+
+async def read_rows(request: Request) -> AsyncIterator[Tuple[int, object]]:
+    """Yield ``(row_number, attributes)`` pairs from a CSV or NDJSON request body
+
+    Rows are parsed record by record as the body arrives. A row that cannot be
+    parsed is yielded as an error string instead of a dict.
+    """
+    is_csv = request.content_type in CSV_CONTENT_TYPES
+    header = None
+    row_number = 0
+
+    async for raw in (csv_records(request.content) if is_csv else request.content):
+        line = (raw if is_csv else raw.decode("utf-8-sig")).strip()
+        if not line:
+            continue
+
+        if is_csv:
+            try:
+                values = next(csv.reader(line.splitlines(keepends=True), strict=True))
+            except csv.Error as e:
+                if header is None:
+                    raise
+                row_number += 1
+                yield row_number, f"Invalid CSV: {str(e)}"
+                continue
+            if header is None:
+                header = [name.strip() for name in values]
+                continue
+            row_number += 1
+            if len(values) != len(header):
+                yield row_number, f"Expected {len(header)} columns, got {len(values)}"
+                continue
+            yield row_number, dict(zip(header, values))
+        else:
+            row_number += 1
+            try:
+                row = json.loads(line)
+            except json.JSONDecodeError as e:
+                yield row_number, f"Invalid JSON: {str(e)}"
+                continue
+            if not isinstance(row, dict):
+                yield row_number, "Row must be a JSON object"
+                continue
+            yield row_number, row
+
+async def create_row_invitation(request: Request, row_number: int, row) -> dict:
+    """Create and register an issuer invitation for one attribute row"""
+    if isinstance(row, str):
+        return {"row": row_number, "success": False, "error": row}
+
+    attributes = {name: str(row.get(name, "")).strip() for name in CREDENTIAL_ATTRIBUTES}
+    missing = [name for name, value in attributes.items() if not value]
+    if missing:
+        return {"row": row_number, "success": False, "error": f"Missing attributes: {', '.join(missing)}"}
+
+    try:
+        agent = get_agent(request)
+        invitation_result = await agent.create_invitation("issuer")
+
+        if "invitation" not in invitation_result or "connection_id" not in invitation_result:
+            return {
+                "row": row_number,
+                "success": False,
+                "error": f"Failed to create invitation: {invitation_result.get('error', 'Unknown error')}"
+            }
+
+        connection_id = invitation_result["connection_id"]
+        qr_data = invitation_url_from_result(invitation_result)
+        await register_invitation(request.app["state_store"], connection_id, FlowType.ISSUER,
+                                  invitation_result["invitation"], qr_data,
+                                  tenant_id=request_tenant_id(request), attributes=attributes)
+
+        # Warm the QR cache in the background so the image route answers instantly
+        render_task = asyncio.ensure_future(request.app["qr_renderer"].render(qr_data))
+        _background_renders.add(render_task)
+        render_task.add_done_callback(finish_background_render)
+
+        return {
+            "row": row_number,
+            "success": True,
+            "connection_id": connection_id,
+            "invitation_url": qr_data,
+            "qr_url": f"/api/qr/{connection_id}.png"
+        }
+
+    except Exception as e:
+        logger.error(f"Error creating bulk invitation for row {row_number}: {str(e)}")
+        return {"row": row_number, "success": False, "error": str(e)}
+
+def finish_background_render(task: asyncio.Future):
+    """Release a background QR render and log it if it failed"""
+    _background_renders.discard(task)
+    if not task.cancelled() and task.exception() is not None:
+        logger.error(f"Background QR code generation failed: {task.exception()}")
+
+@routes.post('/api/issuer/bulk-invitations')
+async def api_issuer_bulk_invitations(request: Request) -> web.StreamResponse:
+    """Create issuer invitations for many users and stream per-row results as NDJSON
+
+    Accepts ``text/csv`` (with a header row) or NDJSON (one JSON object per
+    line) containing username, email, occupation and citizenship. Credentials
+    are issued automatically as each connection becomes active.
+    """
+    settings = request.app["settings"]
+    semaphore = asyncio.Semaphore(settings.bulk_concurrency)
+    results: asyncio.Queue = asyncio.Queue()
+
+    async def run_row(row_number: int, row):
+        try:
+            results.put_nowait(await create_row_invitation(request, row_number, row))
+        finally:
+            semaphore.release()
+
+    async def feed_rows():
+        tasks = []
+        try:
+            async for row_number, row in read_rows(request):
+                if row_number > settings.bulk_max_rows:
+                    results.put_nowait({
+                        "row": row_number,
+                        "success": False,
+                        "error": f"Row limit of {settings.bulk_max_rows} exceeded; remaining rows ignored"
+                    })
+                    break
+                # Acquiring before spawning keeps parsing in step with the workers
+                await semaphore.acquire()
+                tasks.append(asyncio.ensure_future(run_row(row_number, row)))
+            await asyncio.gather(*tasks)
+        except asyncio.CancelledError:
+            # Client went away; stop creating invitations nobody will see
+            for task in tasks:
+                task.cancel()
+            raise
+        except Exception as e:
+            logger.error(f"Error reading bulk invitation rows: {str(e)}")
+            results.put_nowait({"success": False, "error": f"Failed to read rows: {str(e)}"})
+            for task in tasks:
+                task.cancel()
+        finally:
+            results.put_nowait(None)
+
+    response = web.StreamResponse(headers={"Content-Type": "application/x-ndjson"})
+    await response.prepare(request)
+
+    feeder = asyncio.ensure_future(feed_rows())
+    summary = {"total": 0, "succeeded": 0, "failed": 0}
+
+    try:
+        while True:
+            result = await results.get()
+            if result is None:
+                break
+            if "row" in result:
+                summary["total"] += 1
+                summary["succeeded" if result["success"] else "failed"] += 1
+            await response.write(json.dumps(result).encode() + b"\n")
+
+        await response.write(json.dumps({"summary": summary}).encode() + b"\n")
+        logger.info(f"Bulk invitations finished: {summary}")
+    finally:
+        if not feeder.done():
+            feeder.cancel()
+
+    await response.write_eof()
+    return response
@@ -0,0 +1,299 @@
+#!/usr/bin/env python3
+"""
+Proof Campaign Routes for SSI Demo Application
+This module broadcasts proof requests to many connections at once. A campaign
+targets an explicit list of connections or every connection matching a filter,
+sends the requests with bounded parallelism in the background, and tracks
+aggregate progress that can be read back page by page.
+"""
+
+import asyncio
+import logging
+import urllib.parse
+import uuid
+from datetime import datetime
+from aiohttp import web
+from aiohttp.web import Request, Response, RouteTableDef
+
+from .api_routes import index_presentation_exchange
+from .flows import TERMINAL_PROOF_STATES, FlowStage, FlowType
+from .tenants import get_agent, request_tenant_id
+
+logger = logging.getLogger(__name__)
+routes = RouteTableDef()
+
+# Filters forwarded to ACA-Py's GET /connections
+CONNECTION_QUERY_FILTERS = ["state", "alias", "their_role", "their_did", "their_public_did", "connection_protocol"]
+
+MAX_RESULTS_PAGE = 500
+
+# Connections per ACA-Py list request when resolving a filter
+CONNECTION_PAGE_SIZE = 500
+
+def set_entry_state(entry: dict, state: str) -> bool:
+    """Move a campaign entry to a new state, returning whether it changed"""
+    if entry.get("state") == state:
+        return False
+    entry["state"] = state
+    entry["updated_at"] = datetime.now().isoformat()
+    return True
+
+async def record_campaign_progress(store, pres_ex_id: str, state: str):
+    """Apply a presentation exchange state change to the campaign that sent it"""
+    if not pres_ex_id or not state:
+        return
+
+    match = await store.find_campaign_result(pres_ex_id)
+    if match is None:
+        return
+
+    campaign_id, entry = match
+    if set_entry_state(entry, state):
+        await store.put_campaign_results(campaign_id, [entry])
+
+async def campaign_summary(store, campaign: dict) -> dict:
+    """Aggregate view of a campaign without its per-connection results"""
+    states = await store.campaign_state_counts(campaign["campaign_id"])
+    pending = sum(count for state, count in states.items() if state not in TERMINAL_PROOF_STATES + ["send_failed"])
+    return {
+        "campaign_id": campaign["campaign_id"],
+        "created_at": campaign["created_at"],
+        "status": campaign["status"] if campaign["status"] != "sent" or pending else "completed",
+        "total": campaign["total"],
+        "states": states,
+        "verified": states.get("verified", 0),
+        "failed": states.get("send_failed", 0) + states.get("abandoned", 0) + states.get("failed", 0),
+        "pending": pending
+    }
+
+async def list_connections(agent, query: dict, max_records: int):
+    """Every connection matching an ACA-Py ``/connections`` query, up to ``max_records``
+
+    Pages through the list endpoint. An agent pool answers each page from all
+    of its agents, with ``limit``/``offset`` applied per agent, so a page
+    shorter than ``limit`` is the last one for every agent. Agents that ignore
+    ``limit``/``offset`` return everything in the first page. Returns a
+    ``(records, error)`` tuple.
+    """
+    records, offset, previous_first = [], 0, None
+    while len(records) <= max_records:
+        page_query = urllib.parse.urlencode({**query, "limit": CONNECTION_PAGE_SIZE, "offset": offset})
+        result = await agent.admin_request("GET", f"/connections?{page_query}")
+        if "error" in result:
+            return None, result["error"]
+        page = result.get("results", [])
+        if not page or page[0].get("connection_id") == previous_first:
+            break
+        records.extend(page)
+        if len(page) < CONNECTION_PAGE_SIZE:
+            break
+        previous_first = page[0].get("connection_id")
+        offset += CONNECTION_PAGE_SIZE
+    return records, None
+
+async def resolve_targets(store, agent, body: dict, max_connections: int):
+    """Resolve the connection ids a campaign should target
+
+    Filters are resolved against every agent, up to one more connection than
+    ``max_connections`` so the caller can tell the campaign is too large.
+    Returns a ``(connection_ids, error)`` tuple.
+    """
+    if body.get("connection_ids"):
+        connection_ids = body["connection_ids"]
+        if not isinstance(connection_ids, list) or not all(isinstance(cid, str) for cid in connection_ids):
+            return None, "connection_ids must be a list of strings"
+        # Keep the caller's order but drop duplicates
+        return list(dict.fromkeys(connection_ids)), None
+
+    filters = body.get("filter") or {}
+    query = {"state": "active"}
+    query.update({key: str(value) for key, value in filters.items() if key in CONNECTION_QUERY_FILTERS})
+
+    records, error = await list_connections(agent, query, max_connections)
+    if error:
+        return None, error
+
+    connection_ids = list(dict.fromkeys(record["connection_id"] for record in records if "connection_id" in record))
+
+    # "type" narrows to flows this application created (issuer or verifier)
+    if filters.get("type"):
+        typed = {record.connection_id for record in await store.query_connections(type=filters["type"])}
+        connection_ids = [cid for cid in connection_ids if cid in typed]
+
+    return connection_ids, None
+
+async def run_campaign(store, agent, campaign: dict, concurrency: int):
+    """Send a proof request to every campaign connection with bounded parallelism"""
+    semaphore = asyncio.Semaphore(concurrency)
+    campaign_id = campaign["campaign_id"]
+
+    async def send(connection_id: str):
+        entry = {"connection_id": connection_id, "state": "pending"}
+        async with semaphore:
+            try:
+                proof_result = await agent.request_proof(connection_id)
+            except Exception as e:
+                proof_result = {"error": str(e)}
+
+        if "presentation_exchange_id" in proof_result:
+            entry["presentation_exchange_id"] = proof_result["presentation_exchange_id"]
+            set_entry_state(entry, proof_result.get("state", "request_sent"))
+            # Record the exchange before indexing it so an early webhook finds the entry
+            await store.put_campaign_results(campaign_id, [entry])
+            # Connections this app did not create become verifier flows of the campaign's tenant,
+            # so their present_proof webhooks are recorded and the sweeper can expire them
+            await store.update_connection(connection_id, {"stage": FlowStage.PROOF_REQUESTED}, defaults={
+                "type": FlowType.VERIFIER,
+                "tenant_id": campaign.get("tenant_id"),
+                "status": "active",
+                "created_at": datetime.now().isoformat()
+            })
+            await index_presentation_exchange(store, connection_id, entry["presentation_exchange_id"])
+        else:
+            entry["error"] = proof_result.get("error", "Unknown error")
+            set_entry_state(entry, "send_failed")
+            await store.put_campaign_results(campaign_id, [entry])
+
+    try:
+        await asyncio.gather(*(send(connection_id) for connection_id in campaign["connection_ids"]))
+        campaign["status"] = "sent"
+    except asyncio.CancelledError:
+        campaign["status"] = "cancelled"
+        raise
+    except Exception:
+        campaign["status"] = "error"
+        raise
+    finally:
+        await store.put_campaign(campaign_id, {key: value for key, value in campaign.items() if key != "connection_ids"})
+
+    logger.info(f"Proof campaign {campaign_id} sent: {await campaign_summary(store, campaign)}")
+
+def finish_campaign_task(app: web.Application, campaign_id: str):
+    """Build the done-callback that releases a campaign task"""
+    def callback(task: asyncio.Future):
+        app["campaign_tasks"].discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logger.error(f"Proof campaign {campaign_id} failed: {task.exception()}")
+    return callback
+
+@routes.post('/api/verifier/campaigns')
+async def api_create_campaign(request: Request) -> Response:
+    """Start a proof-request campaign across many connections
+
+    Body: ``{"connection_ids": [...]}`` or ``{"filter": {"alias": ..., "type": ...}}``
+    (filters default to active connections).
+    """
+    try:
+        body = await request.json()
+        agent = get_agent(request)
+        store = request.app["state_store"]
+        settings = request.app["settings"]
+
+        if not agent.cred_def_id:
+            return web.json_response({
+                "success": False,
+                "error": "No credential definition available. Please issue a credential first."
+            })
+
+        connection_ids, error = await resolve_targets(store, agent, body, settings.campaign_max_connections)
+        if error:
+            return web.json_response({"success": False, "error": error})
+        if not connection_ids:
+            return web.json_response({"success": False, "error": "No connections matched"})
+        if len(connection_ids) > settings.campaign_max_connections:
+            return web.json_response({
+                "success": False,
+                "error": f"Campaign exceeds the limit of {settings.campaign_max_connections} connections"
+            })
+
+        campaign_id = str(uuid.uuid4())
+        campaign = {
+            "campaign_id": campaign_id,
+            "tenant_id": request_tenant_id(request),
+            "created_at": datetime.now().isoformat(),
+            "status": "sending",
+            "total": len(connection_ids)
+        }
+        await store.put_campaign(campaign_id, campaign)
+        await store.put_campaign_results(campaign_id, [
+            {"connection_id": cid, "state": "pending"} for cid in connection_ids
+        ])
+
+        campaign["connection_ids"] = connection_ids
+        task = asyncio.ensure_future(run_campaign(store, agent, campaign, settings.campaign_concurrency))
+        request.app["campaign_tasks"].add(task)
+        task.add_done_callback(finish_campaign_task(request.app, campaign_id))
+
+        logger.info(f"Started proof campaign {campaign_id} for {len(connection_ids)} connections")
+
+        return web.json_response({
+            "success": True,
+            "campaign_id": campaign_id,
+            "total": len(connection_ids)
+        })
+
+    except Exception as e:
+        logger.error(f"Error starting proof campaign: {str(e)}")
+        return web.json_response({
+            "success": False,
+            "error": str(e)
+        })
+
+@routes.get('/api/verifier/campaigns/{campaign_id}')
+async def api_campaign_status(request: Request) -> Response:
+    """Get aggregate progress of a proof campaign"""
+    store = request.app["state_store"]
+    campaign = await store.get_campaign(request.match_info['campaign_id'])
+    if not campaign:
+        return web.json_response({"success": False, "error": "Campaign not found"})
+
+    return web.json_response({"success": True, **await campaign_summary(store, campaign)})
+
+@routes.get('/api/verifier/campaigns/{campaign_id}/results')
+async def api_campaign_results(request: Request) -> Response:
+    """Get one page of per-connection campaign results
+
+    Query parameters: ``offset``, ``limit`` (max 500), optional ``state`` filter and
+    ``refresh=true`` to re-read unfinished exchanges on the page from ACA-Py
+    (useful when webhooks are not configured).
+    """
+    store = request.app["state_store"]
+    campaign = await store.get_campaign(request.match_info['campaign_id'])
+    if not campaign:
+        return web.json_response({"success": False, "error": "Campaign not found"})
+
+    try:
+        offset = max(int(request.query.get("offset", 0)), 0)
+        limit = min(max(int(request.query.get("limit", 100)), 1), MAX_RESULTS_PAGE)
+    except ValueError:
+        return web.json_response({"success": False, "error": "offset and limit must be integers"})
+
+    page, total = await store.get_campaign_results(
+        campaign["campaign_id"], state=request.query.get("state") or None, offset=offset, limit=limit
+    )
+
+    if request.query.get("refresh", "").lower() in ("1", "true", "yes"):
+        agent = get_agent(request)
+        unfinished = [
+            entry for entry in page
+            if entry.get("presentation_exchange_id") and entry["state"] not in TERMINAL_PROOF_STATES
+        ]
+        records = await asyncio.gather(*(
+            agent.admin_request("GET", f"/present-proof/records/{entry['presentation_exchange_id']}")
+            for entry in unfinished
+        ))
+        changed = [
+            entry for entry, record in zip(unfinished, records)
+            if "state" in record and set_entry_state(entry, record["state"])
+        ]
+        if changed:
+            await store.put_campaign_results(campaign["campaign_id"], changed)
+
+    return web.json_response({
+        "success": True,
+        "campaign_id": campaign["campaign_id"],
+        "offset": offset,
+        "limit": limit,
+        "total": total,
+        "results": page
+    })
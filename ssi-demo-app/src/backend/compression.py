@@ -0,0 +1,37 @@
+#!/usr/bin/env python3
+"""
+Response Compression for SSI Demo Application
+This module compresses JSON API responses for clients that send
+``Accept-Encoding``. Small bodies are left alone, since compressing them costs
+more than it saves, and so are streamed responses (event streams and NDJSON),
+other content types such as QR images, and anything already encoded. A strong
+``ETag`` on a compressed response is made weak.
+"""
+
+from aiohttp import web
+from aiohttp.web import Request
+
+# Payloads worth compressing; images are either compressed already (PNG) or served as-is
+COMPRESSIBLE_CONTENT_TYPES = {"application/json", "application/x-ndjson"}
+
+@web.middleware
+async def compression_middleware(request: Request, handler):
+    """Negotiate gzip/deflate for JSON ``/api/`` responses of at least ``compression_min_size`` bytes"""
+    response = await handler(request)
+    if (
+        # Plain responses only; a StreamResponse has already been sent or is streaming
+        type(response) is web.Response
+        and request.path.startswith("/api/")
+        and response.content_type in COMPRESSIBLE_CONTENT_TYPES
+        and isinstance(response.body, bytes)
+        and len(response.body) >= request.app["settings"].compression_min_size
+        and "Content-Encoding" not in response.headers
+    ):
+        response.headers.add("Vary", "Accept-Encoding")
+        # The body may go out encoded, and a strong validator promises byte-identical bodies
+        etag = response.headers.get("ETag")
+        if etag and not etag.startswith("W/"):
+            response.headers["ETag"] = f"W/{etag}"
+        # aiohttp picks the coding from Accept-Encoding and compresses large bodies off the event loop
+        response.enable_compression()
+    return response
@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+Configuration for SSI Demo Application
+This module reads runtime settings from ``SSI_*`` environment variables.
+"""
+
+import os
+from typing import Dict, List, Mapping, Optional
+
+def env_str(env: Mapping[str, str], name: str, default: str) -> str:
+    """Read a string setting"""
+    value = env.get(name)
+    return value if value not in (None, "") else default
+
+def env_int(env: Mapping[str, str], name: str, default: int) -> int:
+    """Read an integer setting"""
+    value = env.get(name)
+    return int(value) if value not in (None, "") else default
+
+def env_float(env: Mapping[str, str], name: str, default: float) -> float:
+    """Read a float setting"""
+    value = env.get(name)
+    return float(value) if value not in (None, "") else default
+
+def env_bool(env: Mapping[str, str], name: str, default: bool) -> bool:
+    """Read a boolean setting (1/true/yes/on)"""
+    value = env.get(name)
+    if value in (None, ""):
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+def env_list(env: Mapping[str, str], name: str, default: List[str]) -> List[str]:
+    """Read a comma-separated list setting"""
+    value = env.get(name)
+    if value in (None, ""):
+        return default
+    return [item.strip() for item in value.split(",") if item.strip()]
+
+def env_timeouts(env: Mapping[str, str], name: str) -> Optional[Dict[str, float]]:
+    """Read ``prefix=seconds`` pairs separated by commas, e.g. ``/schemas=60,/connections=5``"""
+    value = env.get(name)
+    if value in (None, ""):
+        return None
+    timeouts = {}
+    for item in value.split(","):
+        prefix, _, seconds = item.strip().partition("=")
+        if prefix and seconds:
+            timeouts[prefix.strip()] = float(seconds)
+    return timeouts
+
+class Settings:
+    """Runtime settings for the demo application"""
+
+    def __init__(self, environ: Optional[Mapping[str, str]] = None):
+        env = os.environ if environ is None else environ
+
+        # HTTP server
+        self.host = env_str(env, "SSI_HOST", "0.0.0.0")
+        self.port = env_int(env, "SSI_PORT", 8080)
+        self.workers = env_int(env, "SSI_WORKERS", 1)
+        self.uvloop = env_bool(env, "SSI_UVLOOP", False)
+        self.access_log = env_bool(env, "SSI_ACCESS_LOG", True)
+
+        # Ledger bootstrap; preset ids skip schema and cred def setup entirely
+        self.bootstrap = env_bool(env, "SSI_BOOTSTRAP", True)
+        self.schema_id = env_str(env, "SSI_SCHEMA_ID", None)
+        self.cred_def_id = env_str(env, "SSI_CRED_DEF_ID", None)
+        self.bootstrap_retry_delay = env_float(env, "SSI_BOOTSTRAP_RETRY_DELAY", 1.0)
+        self.bootstrap_max_retry_delay = env_float(env, "SSI_BOOTSTRAP_MAX_RETRY_DELAY", 30.0)
+        self.ledger_cache = env_bool(env, "SSI_LEDGER_CACHE", True)
+        self.ledger_cache_path = env_str(env, "SSI_LEDGER_CACHE_PATH", "ledger_cache.json")
+
+        # ACA-Py admin API
+        self.admin_url = env_str(env, "SSI_ADMIN_URL", "http://localhost:8021")
+        self.admin_pool_size = env_int(env, "SSI_ADMIN_POOL_SIZE", 100)
+        self.admin_per_host_limit = env_int(env, "SSI_ADMIN_PER_HOST_LIMIT", 0)
+        self.admin_keepalive_timeout = env_float(env, "SSI_ADMIN_KEEPALIVE_TIMEOUT", 30.0)
+        self.admin_dns_cache_ttl = env_int(env, "SSI_ADMIN_DNS_CACHE_TTL", 300)
+        self.admin_timeout = env_float(env, "SSI_ADMIN_TIMEOUT", 30.0)
+        self.admin_path_timeouts = env_timeouts(env, "SSI_ADMIN_PATH_TIMEOUTS")
+        self.admin_get_cache_ttl = env_float(env, "SSI_ADMIN_GET_CACHE_TTL", 0.0)
+
+        # Several ACA-Py instances sharing one DID and cred def are load balanced as a pool
+        self.admin_urls = env_list(env, "SSI_ADMIN_URLS", [self.admin_url])
+        self.agent_health_interval = env_float(env, "SSI_AGENT_HEALTH_INTERVAL", 5.0)
+        self.agent_eject_failures = env_int(env, "SSI_AGENT_EJECT_FAILURES", 3)
+        self.agent_eject_latency = env_float(env, "SSI_AGENT_EJECT_LATENCY", 5.0)
+        self.agent_eject_duration = env_float(env, "SSI_AGENT_EJECT_DURATION", 30.0)
+
+        # Multitenancy: per-tenant ACA-Py subwallets behind /api/tenants/{tenant_id}/...
+        self.multitenant = env_bool(env, "SSI_MULTITENANT", False)
+        self.tenant_token_ttl = env_float(env, "SSI_TENANT_TOKEN_TTL", 3600.0)
+        self.tenant_wallet_type = env_str(env, "SSI_TENANT_WALLET_TYPE", "askar")
+        # x-api-key required by the /api/tenants management routes; unset disables them
+        self.tenant_admin_key = env_str(env, "SSI_TENANT_ADMIN_KEY", None)
+
+        # ACA-Py webhooks (--webhook-url .../webhooks): "true", "false", or "auto" to treat them
+        # as configured once the first one arrives. Decides whether pages get pushed updates
+        self.webhooks = env_str(env, "SSI_WEBHOOKS", "auto").lower()
+        # Required x-api-key on webhooks; ACA-Py sends it with --webhook-url .../webhooks#<key>
+        self.webhook_api_key = env_str(env, "SSI_WEBHOOK_API_KEY", None)
+
+        # Connection and campaign state ("memory" or "sqlite")
+        self.state_store = env_str(env, "SSI_STATE_STORE", "memory")
+        self.state_db_path = env_str(env, "SSI_STATE_DB_PATH", "ssi_state.db")
+
+        # State retention (seconds since a record last changed; 0 keeps records forever)
+        self.state_idle_ttl = env_float(env, "SSI_STATE_IDLE_TTL", 3600.0)
+        self.state_completed_ttl = env_float(env, "SSI_STATE_COMPLETED_TTL", 86400.0)
+        self.state_sweep_interval = env_float(env, "SSI_STATE_SWEEP_INTERVAL", 60.0)
+
+        # Background sync of unfinished flows with ACA-Py (seconds; 0 disables)
+        self.reconcile_interval = env_float(env, "SSI_RECONCILE_INTERVAL", 15.0)
+        self.reconcile_batch_size = env_int(env, "SSI_RECONCILE_BATCH_SIZE", 100)
+        # Invitations unchanged for this long are no longer looked for (0 = no limit)
+        self.reconcile_max_age = env_float(env, "SSI_RECONCILE_MAX_AGE", 600.0)
+
+        # Metrics at /metrics; 0 disables event loop lag sampling
+        self.metrics = env_bool(env, "SSI_METRICS", True)
+        self.metrics_lag_interval = env_float(env, "SSI_METRICS_LAG_INTERVAL", 0.5)
+
+        # gzip/deflate for /api/ responses of at least SSI_COMPRESSION_MIN_SIZE bytes
+        self.compression = env_bool(env, "SSI_COMPRESSION", True)
+        self.compression_min_size = env_int(env, "SSI_COMPRESSION_MIN_SIZE", 1024)
+
+        # Logging: "text" or "json" lines, written from a background thread unless
+        # SSI_LOG_QUEUE is off. SSI_LOG_SAMPLE keeps a fraction of routine admin call
+        # lines per path prefix (same syntax as SSI_ADMIN_PATH_TIMEOUTS, e.g.
+        # "/connections=0.01"); request payloads and response bodies are logged at DEBUG
+        self.log_level = env_str(env, "SSI_LOG_LEVEL", "INFO")
+        self.log_format = env_str(env, "SSI_LOG_FORMAT", "text")
+        self.log_queue = env_bool(env, "SSI_LOG_QUEUE", True)
+        self.log_sample_rates = env_timeouts(env, "SSI_LOG_SAMPLE")
+
+        # Tracing: "none", "console" (log lines) or "file" (JSON lines at SSI_TRACE_PATH)
+        self.tracing = env_str(env, "SSI_TRACING", "none")
+        self.trace_path = env_str(env, "SSI_TRACE_PATH", "traces.jsonl")
+        self.trace_sample_rate = env_float(env, "SSI_TRACE_SAMPLE_RATE", 1.0)
+
+        # QR code rendering
+        self.qr_executor = env_str(env, "SSI_QR_EXECUTOR", "thread")
+        self.qr_workers = env_int(env, "SSI_QR_WORKERS", 2)
+        self.qr_cache_size = env_int(env, "SSI_QR_CACHE_SIZE", 256)
+
+        # Bulk issuance
+        self.bulk_concurrency = env_int(env, "SSI_BULK_CONCURRENCY", 10)
+        self.bulk_max_rows = env_int(env, "SSI_BULK_MAX_ROWS", 10000)
+
+        # Proof campaigns
+        self.campaign_concurrency = env_int(env, "SSI_CAMPAIGN_CONCURRENCY", 10)
+        self.campaign_max_connections = env_int(env, "SSI_CAMPAIGN_MAX_CONNECTIONS", 50000)
+
+    def pool_options(self) -> dict:
+        """Keyword arguments for ``AgentPool`` besides the admin URLs"""
+        return {
+            "health_interval": self.agent_health_interval,
+            "eject_failures": self.agent_eject_failures,
+            "eject_latency": self.agent_eject_latency,
+            "eject_duration": self.agent_eject_duration,
+            **self.agent_options()
+        }
+
+    def logging_options(self) -> dict:
+        """Keyword arguments for ``configure_logging``"""
+        return {
+            "level": self.log_level,
+            "fmt": self.log_format,
+            "sample_rates": self.log_sample_rates,
+            "use_queue": self.log_queue
+        }
+
+    def agent_options(self) -> dict:
+        """Keyword arguments for ``SSIAgent`` built from the admin client settings"""
+        return {
+            "pool_size": self.admin_pool_size,
+            "per_host_limit": self.admin_per_host_limit,
+            "keepalive_timeout": self.admin_keepalive_timeout,
+            "dns_cache_ttl": self.admin_dns_cache_ttl,
+            "timeout": self.admin_timeout,
+            "path_timeouts": self.admin_path_timeouts,
+            "get_cache_ttl": self.admin_get_cache_ttl,
+            "ledger_cache_path": self.ledger_cache_path if self.ledger_cache else None
+        }
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Event Bus for SSI Demo Application
+This module fans out connection, credential and proof state changes to the
+browser event streams subscribed to a connection.
+"""
+
+import asyncio
+import logging
+from typing import Dict, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+class EventBus:
+    """In-process publish/subscribe channel keyed by connection id"""
+
+    def __init__(self, queue_size: int = 100):
+        self.queue_size = queue_size
+        self._subscribers: Dict[str, Set[asyncio.Queue]] = {}
+
+    def subscribe(self, connection_id: str) -> asyncio.Queue:
+        """Register a new subscriber queue for a connection"""
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        self._subscribers.setdefault(connection_id, set()).add(queue)
+        return queue
+
+    def unsubscribe(self, connection_id: str, queue: asyncio.Queue):
+        """Remove a subscriber queue"""
+        queues = self._subscribers.get(connection_id)
+        if not queues:
+            return
+        queues.discard(queue)
+        if not queues:
+            del self._subscribers[connection_id]
+
+    def publish(self, connection_id: str, event: str, data: dict):
+        """Deliver an event to every subscriber of a connection without blocking"""
+        for queue in self._subscribers.get(connection_id, ()):
+            try:
+                queue.put_nowait((event, data))
+            except asyncio.QueueFull:
+                # A stalled client must not hold up the publisher
+                logger.warning(f"Dropping {event} event for slow subscriber of {connection_id}")
+
+    def close(self):
+        """Signal every subscriber to finish its stream"""
+        for queues in self._subscribers.values():
+            for queue in queues:
+                try:
+                    queue.put_nowait(None)
+                except asyncio.QueueFull:
+                    pass
+
+    def subscriber_count(self, connection_id: Optional[str] = None) -> int:
+        """Number of open subscriptions, optionally for a single connection"""
+        if connection_id is not None:
+            return len(self._subscribers.get(connection_id, ()))
+        return sum(len(queues) for queues in self._subscribers.values())
+
+# Shared bus used by the webhook receiver and the event stream route
+event_bus = EventBus()
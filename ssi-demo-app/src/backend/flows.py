@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Flow Records for SSI Demo Application
+This module defines the typed record kept for every issuer or verifier
+connection. Records use ``__slots__`` so each live flow carries no per-instance
+dict, and the application's own progress through a flow is an enum rather than
+a set of loose string flags.
+"""
+
+from enum import Enum
+from typing import Iterable, Optional
+
+class FlowType(str, Enum):
+    """Which side of the demo created the connection"""
+    ISSUER = "issuer"
+    VERIFIER = "verifier"
+
+class FlowStage(str, Enum):
+    """How far the application has driven a flow
+
+    Connection, credential and proof states reported by ACA-Py are kept as
+    plain strings next to this, since ACA-Py owns those vocabularies.
+    """
+    INVITED = "invited"
+    CREDENTIAL_OFFERED = "credential_offered"
+    PROOF_REQUESTED = "proof_requested"
+
+# ACA-Py states after which a flow no longer changes
+CREDENTIAL_ISSUED_STATES = ["credential_acked", "done"]
+TERMINAL_CREDENTIAL_STATES = CREDENTIAL_ISSUED_STATES + ["abandoned"]
+TERMINAL_PROOF_STATES = ["verified", "abandoned", "failed"]
+TERMINAL_CONNECTION_STATES = ["abandoned", "error"]
+
+def enum_value(value):
+    """Plain value of an enum member, or the value itself"""
+    return value.value if isinstance(value, Enum) else value
+
+class FlowRecord:
+    """State of one issuer or verifier connection
+
+    Unset fields are ``None`` and are left out of ``to_dict()``.
+    """
+
+    __slots__ = (
+        # admin_url is the pooled ACA-Py instance the connection lives on
+        "connection_id", "tenant_id", "admin_url", "type", "stage", "forced",
+        "status", "rfc23_state", "created_at", "updated_at", "webhook_updated_at", "compacted_at",
+        "invitation", "invitation_url", "attributes", "cred_def_id",
+        "credential_exchange_id", "credential_state",
+        "presentation_exchange_id", "proof_state", "proof_record", "proof_attributes",
+        # Claim timestamps guarding against duplicate issuance / proof requests
+        "issuing", "requesting_proof"
+    )
+
+    def __init__(self, connection_id: str, **fields):
+        for name in self.__slots__:
+            setattr(self, name, None)
+        self.connection_id = connection_id
+        self.update(fields)
+
+    def update(self, fields: dict):
+        """Set fields from a mapping, coercing enum-typed fields"""
+        for name, value in fields.items():
+            if name == "type" and value is not None:
+                value = FlowType(value)
+            elif name == "stage" and value is not None:
+                value = FlowStage(value)
+            setattr(self, name, value)
+
+    def clear(self, names: Iterable[str]):
+        """Unset fields"""
+        for name in names:
+            if name != "connection_id":
+                setattr(self, name, None)
+
+    def copy(self) -> "FlowRecord":
+        record = FlowRecord.__new__(FlowRecord)
+        for name in self.__slots__:
+            setattr(record, name, getattr(self, name))
+        return record
+
+    def set_fields(self) -> list:
+        """Names of the fields that are set"""
+        return [name for name in self.__slots__ if getattr(self, name) is not None]
+
+    def to_dict(self) -> dict:
+        return {name: enum_value(getattr(self, name)) for name in self.set_fields()}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> Optional["FlowRecord"]:
+        """Build a record from ``to_dict()`` output, ignoring unknown keys"""
+        if data is None:
+            return None
+        data = dict(data)
+        # Records persisted before flow stages existed used boolean flags
+        if data.pop("proof_requested", None):
+            data.setdefault("stage", FlowStage.PROOF_REQUESTED)
+        if data.pop("credential_issued", None):
+            data.setdefault("stage", FlowStage.CREDENTIAL_OFFERED)
+        if data.pop("force_requested", None):
+            data.setdefault("forced", True)
+        if data.get("type"):
+            data.setdefault("stage", FlowStage.INVITED)
+        connection_id = data.pop("connection_id")
+        return cls(connection_id, **{name: value for name, value in data.items() if name in cls.__slots__})
+
+def is_terminal(record: FlowRecord) -> bool:
+    """Whether a connection record belongs to a finished or failed flow"""
+    return (
+        record.status in TERMINAL_CONNECTION_STATES
+        or record.credential_state in TERMINAL_CREDENTIAL_STATES
+        or record.proof_state in TERMINAL_PROOF_STATES
+    )
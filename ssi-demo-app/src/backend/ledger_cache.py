@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Ledger Artifact Cache for SSI Demo Application
+This module remembers the schema and credential definition ids resolved at
+startup, keyed by admin URL and public DID, so a warm restart can validate the
+cached ids instead of recreating and re-scanning ledger artifacts.
+"""
+
+import json
+import logging
+import os
+from datetime import datetime
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+class LedgerCache:
+    """JSON file of ``{"<admin_url>|<did>": {"schema_id": ..., "cred_def_id": ...}}``"""
+
+    def __init__(self, path: str):
+        self.path = path
+
+    @staticmethod
+    def key(admin_url: str, did: str) -> str:
+        return f"{admin_url.rstrip('/')}|{did}"
+
+    def _load(self) -> dict:
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+            return data if isinstance(data, dict) else {}
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable ledger cache {self.path}: {e}")
+            return {}
+
+    def _save(self, data: dict):
+        # Write then rename so a crash never leaves a truncated cache behind
+        tmp_path = f"{self.path}.tmp"
+        try:
+            with open(tmp_path, "w") as f:
+                json.dump(data, f, indent=2)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.warning(f"Could not write ledger cache {self.path}: {e}")
+
+    def get(self, admin_url: str, did: str) -> Optional[dict]:
+        """Cached ids for an agent, or None"""
+        entry = self._load().get(self.key(admin_url, did))
+        if isinstance(entry, dict) and entry.get("schema_id") and entry.get("cred_def_id"):
+            return entry
+        return None
+
+    def put(self, admin_url: str, did: str, schema_id: str, cred_def_id: str):
+        """Remember the ids resolved for an agent"""
+        data = self._load()
+        data[self.key(admin_url, did)] = {
+            "schema_id": schema_id,
+            "cred_def_id": cred_def_id,
+            "updated_at": datetime.now().isoformat()
+        }
+        self._save(data)
+
+    def discard(self, admin_url: str, did: str):
+        """Forget the ids cached for an agent"""
+        data = self._load()
+        if data.pop(self.key(admin_url, did), None) is not None:
+            self._save(data)
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Logging Setup for SSI Demo Application
+This module configures the root logger for each server process: plain text or
+one JSON object per line, per-path sampling of routine admin API log lines,
+and a queue handler so request handlers only enqueue records while a
+background thread formats them and writes to stderr.
+"""
+
+import json
+import logging
+import queue
+import random
+from datetime import datetime
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, Optional
+
+TEXT_FORMAT = "%(levelname)s:%(name)s:%(message)s"
+
+# Attributes every LogRecord has; anything else was passed with ``extra=``
+STANDARD_ATTRIBUTES = set(vars(logging.makeLogRecord({}))) | {"message", "asctime", "taskName"}
+
+_listener: Optional[QueueListener] = None
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record, including fields passed with ``extra=``"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": datetime.fromtimestamp(record.created).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage()
+        }
+        for key, value in vars(record).items():
+            if key not in STANDARD_ATTRIBUTES:
+                entry[key] = value
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+class PathSampler(logging.Filter):
+    """Keeps a fraction of routine records per admin path prefix
+
+    Records carrying an ``admin_path`` attribute are kept with the rate of the
+    longest matching prefix in ``rates``; warnings and errors are always kept.
+    """
+
+    def __init__(self, rates: Optional[Dict[str, float]] = None):
+        super().__init__()
+        # Longest prefix first so the most specific rate wins
+        self.rates = sorted((rates or {}).items(), key=lambda item: len(item[0]), reverse=True)
+        self._resolved: Dict[str, float] = {}
+
+    def rate(self, path: str) -> float:
+        rate = self._resolved.get(path)
+        if rate is None:
+            rate = next((value for prefix, value in self.rates if path.startswith(prefix)), 1.0)
+            self._resolved[path] = rate
+        return rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        path = getattr(record, "admin_path", None)
+        if path is None:
+            return True
+        rate = self.rate(path)
+        return rate >= 1.0 or random.random() < rate
+
+class DeferredQueueHandler(QueueHandler):
+    """Enqueues records untouched so message formatting happens on the listener thread
+
+    ``QueueHandler.prepare`` formats the message before enqueueing, which is
+    the cost this handler exists to move off the event loop. Log arguments
+    must therefore not be mutated after the logging call.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+def configure_logging(level: str = "INFO", fmt: str = "text", sample_rates: Optional[Dict[str, float]] = None,
+                      use_queue: bool = True):
+    """Replace the root logger's handlers for this process"""
+    global _listener
+    if fmt not in ("text", "json"):
+        raise ValueError(f"Unknown log format: {fmt}")
+    stop_logging()
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.setLevel(level.upper())
+
+    output = logging.StreamHandler()
+    output.setFormatter(JsonFormatter() if fmt == "json" else logging.Formatter(TEXT_FORMAT))
+    sampler = PathSampler(sample_rates)
+
+    if use_queue:
+        handler = DeferredQueueHandler(queue.SimpleQueue())
+        handler.addFilter(sampler)
+        _listener = QueueListener(handler.queue, output)
+        _listener.start()
+        root.addHandler(handler)
+    else:
+        output.addFilter(sampler)
+        root.addHandler(output)
+
+def stop_logging():
+    """Flush queued records and stop the listener thread, if any"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+"""
+Metrics for SSI Demo Application
+This module keeps request counters, latency histograms and gauges in process
+and serves them at ``/metrics`` in the Prometheus text exposition format. It
+covers aiohttp routes, ACA-Py admin calls, QR rendering, in-flight requests,
+event loop lag and state store size. Values are per process, so with several
+workers each scrape sees the worker that happened to accept it.
+"""
+
+import asyncio
+import logging
+import math
+import re
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+from aiohttp import web
+from aiohttp.web import Request, Response, RouteTableDef
+
+logger = logging.getLogger(__name__)
+routes = RouteTableDef()
+
+EXPOSITION_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Latency buckets in seconds, from fast local routes up to ledger writes
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+# Admin path segments that are ids rather than fixed words: UUIDs and hex ids,
+# numbers, ledger ids (schema, cred def and DID URIs contain ':') and base58 DIDs
+ID_SEGMENT = re.compile(
+    r"^(?:[0-9a-fA-F-]{16,}|\d+|[^/]*:[^/]*|[1-9A-HJ-NP-Za-km-z]{21,22})$"
+)
+
+# Admin collections whose next path segment is a record id, whatever it looks like
+ID_COLLECTIONS = {
+    "/connections/", "/issue-credential/records/", "/present-proof/records/",
+    "/multitenancy/wallet/", "/schemas/", "/credential-definitions/"
+}
+
+# Fixed words that follow those collections
+COLLECTION_ACTIONS = {"create-invitation", "receive-invitation", "create-static", "created", ""}
+
+def format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+def escape_label(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def format_labels(names: Iterable[str], values: Iterable[str]) -> str:
+    pairs = [f'{name}="{escape_label(value)}"' for name, value in zip(names, values)]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+class Metric:
+    """A named family of samples keyed by label values"""
+
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def _key(self, labels: Tuple) -> Tuple[str, ...]:
+        if len(labels) != len(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {labels}")
+        return tuple(str(label) for label in labels)
+
+    def samples(self) -> List[Tuple[str, str, float]]:
+        return [(self.name, format_labels(self.labelnames, key), value) for key, value in self._values.items()]
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(f"{name}{labels} {format_value(value)}" for name, labels, value in self.samples())
+        return lines
+
+class Counter(Metric):
+    kind = "counter"
+
+    def inc(self, *labels, amount: float = 1.0):
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0.0) + amount
+
+class Gauge(Metric):
+    kind = "gauge"
+
+    def set(self, value: float, *labels):
+        self._values[self._key(labels)] = value
+
+    def inc(self, *labels, amount: float = 1.0):
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, *labels, amount: float = 1.0):
+        self.inc(*labels, amount=-amount)
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = (),
+                 buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        # Per label set: [bucket counts..., sum, count]
+        self._series: Dict[Tuple[str, ...], List[float]] = {}
+
+    def observe(self, value: float, *labels):
+        key = self._key(labels)
+        series = self._series.get(key)
+        if series is None:
+            series = self._series[key] = [0.0] * (len(self.buckets) + 2)
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                series[index] += 1
+                break
+        series[-2] += value
+        series[-1] += 1
+
+    def samples(self) -> List[Tuple[str, str, float]]:
+        samples = []
+        for key, series in self._series.items():
+            cumulative = 0.0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                labels = format_labels(self.labelnames + ("le",), key + (format_value(bound),))
+                samples.append((f"{self.name}_bucket", labels, cumulative))
+            labels = format_labels(self.labelnames, key)
+            samples.append((f"{self.name}_sum", labels, series[-2]))
+            samples.append((f"{self.name}_count", labels, series[-1]))
+        return samples
+
+class Registry:
+    """The metrics rendered by ``/metrics``"""
+
+    def __init__(self):
+        self.metrics: List[Metric] = []
+
+    def register(self, metric: Metric) -> Metric:
+        self.metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+REGISTRY = Registry()
+
+HTTP_REQUESTS = REGISTRY.register(Counter(
+    "ssi_http_requests_total", "HTTP requests served, by route template and status", ("method", "route", "status")))
+HTTP_DURATION = REGISTRY.register(Histogram(
+    "ssi_http_request_duration_seconds", "HTTP request latency by route template", ("method", "route")))
+HTTP_IN_FLIGHT = REGISTRY.register(Gauge(
+    "ssi_http_requests_in_flight", "HTTP requests currently being handled"))
+
+ADMIN_REQUESTS = REGISTRY.register(Counter(
+    "ssi_admin_requests_total", "ACA-Py admin API requests, by path template and status", ("method", "path", "status")))
+ADMIN_DURATION = REGISTRY.register(Histogram(
+    "ssi_admin_request_duration_seconds", "ACA-Py admin API latency by path template", ("method", "path")))
+ADMIN_IN_FLIGHT = REGISTRY.register(Gauge(
+    "ssi_admin_requests_in_flight", "ACA-Py admin API requests awaiting a response"))
+
+QR_RENDER_DURATION = REGISTRY.register(Histogram(
+    "ssi_qr_render_duration_seconds", "QR code render time (cache misses only)", ("format",),
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)))
+
+LOOP_LAG = REGISTRY.register(Histogram(
+    "ssi_event_loop_lag_seconds", "How late the event loop runs a scheduled wakeup",
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)))
+
+STATE_CONNECTIONS = REGISTRY.register(Gauge(
+    "ssi_state_connections", "Connection records in the state store"))
+
+def admin_path_template(path: str) -> str:
+    """Admin path with the query string dropped and ids replaced by ``{id}``"""
+    segments = path.split("?", 1)[0].split("/")
+    for index, segment in enumerate(segments):
+        parent = "/".join(segments[:index]) + "/"
+        if ID_SEGMENT.match(segment) or (parent in ID_COLLECTIONS and segment not in COLLECTION_ACTIONS):
+            segments[index] = "{id}"
+    return "/".join(segments)
+
+def route_template(request: Request) -> str:
+    """Route pattern that matched a request, e.g. ``/api/issuer/status/{connection_id}``"""
+    resource = request.match_info.route.resource
+    # Unmatched paths share one label so scanners cannot blow up the series count
+    return resource.canonical if resource is not None else "unmatched"
+
+@web.middleware
+async def metrics_middleware(request: Request, handler):
+    """Count and time every request by route template"""
+    started = time.perf_counter()
+    status = 500
+    HTTP_IN_FLIGHT.inc()
+    try:
+        response = await handler(request)
+        status = response.status
+        return response
+    except web.HTTPException as e:
+        status = e.status
+        raise
+    finally:
+        HTTP_IN_FLIGHT.dec()
+        template = route_template(request)
+        HTTP_REQUESTS.inc(request.method, template, status)
+        HTTP_DURATION.observe(time.perf_counter() - started, request.method, template)
+
+class LoopLagMonitor:
+    """Samples event loop lag by measuring how late a periodic sleep wakes up"""
+
+    def __init__(self, interval: float = 0.5):
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            scheduled = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            LOOP_LAG.observe(max(loop.time() - scheduled, 0.0))
+
+    def start(self):
+        """Start sampling in the background"""
+        if self._task is None and self.interval > 0:
+            self._task = asyncio.ensure_future(self.run())
+
+    async def stop(self):
+        """Stop sampling"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+@routes.get('/metrics')
+async def metrics(request: Request) -> Response:
+    """Prometheus text exposition of this process's metrics"""
+    try:
+        STATE_CONNECTIONS.set(await request.app["state_store"].count_connections())
+    except Exception as e:
+        logger.error(f"Could not count state store connections: {str(e)}")
+    return Response(body=REGISTRY.render().encode(), headers={"Content-Type": EXPOSITION_CONTENT_TYPE})
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+QR Code Rendering for SSI Demo Application
+This module renders invitation QR codes in a bounded worker pool so encoding
+and PNG compression never block the event loop, and keeps recently rendered
+images in an LRU cache.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import time
+import urllib.parse
+from collections import OrderedDict
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from io import BytesIO
+from typing import Dict, Tuple
+
+from .metrics import QR_RENDER_DURATION
+from .tracing import span
+
+logger = logging.getLogger(__name__)
+
+def build_qr_payload(data: str) -> str:
+    """Normalise invitation data into the string encoded in the QR code"""
+    # If data is already a URL, use it directly
+    if data.startswith('http'):
+        return data
+
+    # If it's JSON invitation data, try to parse and format properly
+    try:
+        invitation_json = json.loads(data) if isinstance(data, str) else data
+        encoded_invitation = urllib.parse.quote(json.dumps(invitation_json))
+        return f"https://didcomm.org/out-of-band/?oob={encoded_invitation}"
+    except (json.JSONDecodeError, TypeError):
+        return str(data)
+
+def render_qr_image(qr_data: str, fmt: str = "png", box_size: int = 10, border: int = 5) -> bytes:
+    """Render a QR code as PNG or SVG bytes (runs inside the worker pool)"""
+    # qrcode and PIL are imported on first render, keeping them off the startup path
+    import qrcode
+    import qrcode.image.svg
+
+    qr = qrcode.QRCode(
+        version=1,
+        error_correction=qrcode.constants.ERROR_CORRECT_L,
+        box_size=box_size,
+        border=border
+    )
+    qr.add_data(qr_data)
+    qr.make(fit=True)
+
+    buffer = BytesIO()
+    if fmt == "svg":
+        # Vector output skips rasterising and PNG compression entirely
+        img = qr.make_image(image_factory=qrcode.image.svg.SvgPathImage)
+        img.save(buffer)
+    else:
+        img = qr.make_image(fill_color="black", back_color="white")
+        img.save(buffer, format='PNG')
+    return buffer.getvalue()
+
+class QRCodeRenderer:
+    """Renders QR codes off the event loop with an LRU result cache"""
+
+    def __init__(self, executor: str = "thread", max_workers: int = 2, cache_size: int = 256,
+                 box_size: int = 10, border: int = 5):
+        self.box_size = box_size
+        self.border = border
+        self.cache_size = cache_size
+        self._executor_kind = executor
+        self._max_workers = max_workers
+        self._executor: Executor = None
+        self._cache: "OrderedDict[Tuple, bytes]" = OrderedDict()
+        self._inflight: Dict[Tuple, asyncio.Future] = {}
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self._executor_kind == "process":
+                self._executor = ProcessPoolExecutor(max_workers=self._max_workers)
+            else:
+                self._executor = ThreadPoolExecutor(max_workers=self._max_workers, thread_name_prefix="qr-render")
+        return self._executor
+
+    def _cache_get(self, key: Tuple):
+        image = self._cache.get(key)
+        if image is not None:
+            self._cache.move_to_end(key)
+        return image
+
+    def _cache_put(self, key: Tuple, image: bytes):
+        if self.cache_size <= 0:
+            return
+        self._cache[key] = image
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    def etag(self, data: str, fmt: str = "png") -> str:
+        """Strong ETag for the image a payload renders to with the current parameters"""
+        key = f"{build_qr_payload(data)}|{fmt}|{self.box_size}|{self.border}"
+        return '"' + hashlib.sha256(key.encode()).hexdigest()[:32] + '"'
+
+    async def render(self, data: str, fmt: str = "png") -> bytes:
+        """Render invitation data to PNG or SVG bytes"""
+        with span("qr.render", format=fmt) as render_span:
+            image = await self._render(data, fmt, render_span)
+            render_span.set(bytes=len(image))
+            return image
+
+    async def _render(self, data: str, fmt: str, render_span) -> bytes:
+        qr_data = build_qr_payload(data)
+        key = (qr_data, fmt, self.box_size, self.border)
+
+        image = self._cache_get(key)
+        if image is not None:
+            render_span.set(cache="hit")
+            return image
+
+        # Share a single render between concurrent callers of the same payload
+        pending = self._inflight.get(key)
+        if pending is not None:
+            render_span.set(cache="shared")
+            return await asyncio.shield(pending)
+
+        render_span.set(cache="miss")
+
+        logger.debug("Generating QR code for: %s", qr_data)
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(self._get_executor(), render_qr_image, qr_data, fmt, self.box_size, self.border)
+        self._inflight[key] = future
+        started = time.perf_counter()
+        try:
+            image = await asyncio.shield(future)
+        finally:
+            self._inflight.pop(key, None)
+        # Includes executor queueing, which is what a caller waits for
+        QR_RENDER_DURATION.observe(time.perf_counter() - started, fmt)
+
+        self._cache_put(key, image)
+        return image
+
+    def close(self):
+        """Shut down the worker pool"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Readiness for SSI Demo Application
+This module lets the server accept traffic before the agent is bootstrapped.
+Bootstrap runs as a supervised background task with retries, ``/healthz`` and
+``/readyz`` report liveness and readiness to orchestrators, and a middleware
+answers 503 on routes that need the agent until it is ready.
+"""
+
+import asyncio
+import logging
+from datetime import datetime
+from typing import Awaitable, Callable, Optional
+from aiohttp import web
+from aiohttp.web import Request, Response, RouteTableDef
+
+logger = logging.getLogger(__name__)
+routes = RouteTableDef()
+
+# Path prefixes that need a bootstrapped agent. Webhooks are not gated: their
+# handlers only record state, and events refused during a cold start could be lost
+# once ACA-Py runs out of retries
+GATED_PREFIXES = ["/api/"]
+
+class Readiness:
+    """Bootstrap progress shared by the supervisor, middleware and probes"""
+
+    def __init__(self):
+        self.ready = False
+        self.attempts = 0
+        self.last_error: Optional[str] = None
+        self.ready_at: Optional[str] = None
+
+    def mark_ready(self):
+        self.ready = True
+        self.last_error = None
+        self.ready_at = datetime.now().isoformat()
+
+    def as_dict(self) -> dict:
+        return {
+            "ready": self.ready,
+            "attempts": self.attempts,
+            "last_error": self.last_error,
+            "ready_at": self.ready_at
+        }
+
+async def supervise_bootstrap(readiness: Readiness, setup: Callable[[], Awaitable[bool]],
+                              retry_delay: float = 1.0, max_retry_delay: float = 30.0):
+    """Run ``setup`` until it succeeds, backing off exponentially between attempts"""
+    delay = retry_delay
+    while True:
+        readiness.attempts += 1
+        try:
+            if await setup():
+                readiness.mark_ready()
+                return
+            readiness.last_error = "Bootstrap did not complete"
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            readiness.last_error = str(e)
+            logger.error(f"Bootstrap attempt {readiness.attempts} failed: {str(e)}")
+
+        logger.warning(f"Agent not ready after attempt {readiness.attempts}; retrying in {delay:.1f}s")
+        await asyncio.sleep(delay)
+        delay = min(delay * 2, max_retry_delay)
+
+@web.middleware
+async def readiness_middleware(request: Request, handler):
+    """Fail fast with 503 on agent-backed routes until bootstrap has finished"""
+    readiness = request.app["readiness"]
+    if (not readiness.ready and request.method != "OPTIONS"
+            and any(request.path.startswith(prefix) for prefix in GATED_PREFIXES)):
+        return web.json_response(
+            {"success": False, "error": "Agent is starting up, please retry shortly"},
+            status=503,
+            headers={"Retry-After": "1"}
+        )
+    return await handler(request)
+
+@routes.get('/healthz')
+async def healthz(request: Request) -> Response:
+    """Liveness: the process is up and its event loop is serving requests"""
+    return web.json_response({"status": "ok"})
+
+@routes.get('/readyz')
+async def readyz(request: Request) -> Response:
+    """Readiness: the agent is bootstrapped and routes can be served"""
+    readiness = request.app["readiness"]
+    agent = request.app.get("ssi_agent")
+    body = readiness.as_dict()
+    if agent is not None:
+        body["schema_id"] = agent.schema_id
+        body["cred_def_id"] = agent.cred_def_id
+        if hasattr(agent, "health"):
+            # Per-agent state when balancing over an agent pool
+            body["agents"] = agent.health()
+    return web.json_response(body, status=200 if readiness.ready else 503)
@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+Flow Reconciliation for SSI Demo Application
+This module keeps flows moving when nobody is watching. Without webhooks a
+flow only advances while a browser polls its status routes, so a closed tab
+means the credential is never issued. A background reconciler periodically
+collects every unfinished flow from the state store, fetches the matching
+ACA-Py records in bulk (list endpoints filtered by state, one page of
+``batch_size`` at a time, from each pooled agent in turn) and applies them
+exactly as the webhook receiver would: connections that became active get their credential offer or proof
+request, and finished exchanges are recorded and pushed to event streams.
+Invitations nobody has scanned for ``max_age`` seconds are no longer looked
+for; the state sweeper evicts them.
+"""
+
+import asyncio
+import logging
+import urllib.parse
+from datetime import datetime, timedelta
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+from .agent_pool import AgentPool
+from .api_routes import advance_issuer_flow, advance_verifier_flow
+from .flows import TERMINAL_CREDENTIAL_STATES, TERMINAL_PROOF_STATES, FlowRecord, FlowStage, FlowType
+from .webhooks import apply_connection_record, apply_proof_record, handle_issue_credential_event
+
+logger = logging.getLogger(__name__)
+
+class PendingFlows:
+    """Unfinished flows from one pass over the state store, keyed by the id ACA-Py lists them under"""
+
+    def __init__(self, connecting_since: str = ""):
+        # Invitations not yet accepted, by connection id; only those changed since ``connecting_since``
+        self.connecting_since = connecting_since
+        self.connecting: Dict[str, FlowRecord] = {}
+        # Active connections whose credential offer or proof request was never sent
+        self.advancing: Dict[str, FlowRecord] = {}
+        self.credentials: Dict[str, FlowRecord] = {}
+        self.proofs: Dict[str, FlowRecord] = {}
+
+    def add(self, record: FlowRecord):
+        if record.status != "active":
+            if (record.updated_at or "") >= self.connecting_since:
+                self.connecting[record.connection_id] = record
+        elif record.stage == FlowStage.INVITED:
+            self.advancing[record.connection_id] = record
+        elif record.stage == FlowStage.CREDENTIAL_OFFERED and record.credential_exchange_id:
+            self.credentials[record.credential_exchange_id] = record
+        elif record.stage == FlowStage.PROOF_REQUESTED and record.presentation_exchange_id:
+            self.proofs[record.presentation_exchange_id] = record
+
+    def __bool__(self) -> bool:
+        return bool(self.connecting or self.advancing or self.credentials or self.proofs)
+
+class FlowReconciler:
+    """Periodically syncs unfinished flows with ACA-Py and advances them
+
+    Every ``interval`` seconds the reconciler reads the unfinished flows from
+    the state store's index, then asks each agent (every pooled agent, or the
+    base agent and, with multitenancy, every ready tenant) for its active
+    connections and finished exchanges, ``batch_size`` per request.
+    Invitations unchanged for ``max_age`` seconds (0 = no limit) are skipped,
+    so abandoned QR codes do not keep the active connection list walk going.
+    """
+
+    def __init__(self, app, interval: float = 15.0, batch_size: int = 100, max_age: float = 600.0):
+        self.app = app
+        self.interval = interval
+        self.batch_size = batch_size
+        self.max_age = max_age
+        self._task: Optional[asyncio.Task] = None
+
+    async def pending_flows(self) -> PendingFlows:
+        """Unfinished flows in the state store"""
+        connecting_since = ""
+        if self.max_age > 0:
+            connecting_since = (datetime.now() - timedelta(seconds=self.max_age)).isoformat()
+        pending = PendingFlows(connecting_since)
+        # Finished flows are left out by the store's index rather than scanned past
+        for record in await self.app["state_store"].query_connections(finished=False):
+            pending.add(record)
+        return pending
+
+    async def agents(self) -> List[Tuple[object, object]]:
+        """``(lister, agent)`` pairs: whose records to list, and the agent to act on them with
+
+        Pooled agents each only list their own records, so they are walked one
+        by one and paged separately; follow-up calls still go through the pool.
+        """
+        agent = self.app["ssi_agent"]
+        if isinstance(agent, AgentPool):
+            agents = [(member.agent, agent) for member in agent.members]
+        else:
+            agents = [(agent, agent)]
+        tenants = self.app.get("tenants")
+        if tenants is not None:
+            for tenant in await tenants.list_tenants():
+                tenant_agent = await tenants.get_agent(tenant["tenant_id"])
+                if tenant_agent is not None:
+                    agents.append((tenant_agent, tenant_agent))
+        return agents
+
+    async def list_records(self, agent, path: str, state: str, id_key: str,
+                           wanted: Dict[str, FlowRecord]) -> AsyncIterator[List[dict]]:
+        """Pages of records in ``state`` whose ids are still in ``wanted``
+
+        Stops early once every wanted id has been seen. Agents that ignore
+        ``limit``/``offset`` return everything in the first page.
+        """
+        offset = 0
+        previous_first = None
+        while wanted:
+            query = urllib.parse.urlencode({"state": state, "limit": self.batch_size, "offset": offset})
+            result = await agent.admin_request("GET", f"{path}?{query}")
+            if "error" in result:
+                logger.warning("Reconciler could not list %s (state %s): %s", path, state, result["error"])
+                return
+            page = result.get("results", [])
+            if not page or page[0].get(id_key) == previous_first:
+                return
+            yield [record for record in page if record.get(id_key) in wanted]
+            if len(page) < self.batch_size:
+                return
+            previous_first = page[0].get(id_key)
+            offset += len(page)
+
+    async def reconcile_agent(self, agent, pending: PendingFlows, stats: dict, lister=None):
+        """Apply one agent's records to the flows still pending
+
+        ``lister`` is the agent whose records are listed when that is not
+        ``agent`` itself, i.e. one member of an agent pool.
+        """
+        store = self.app["state_store"]
+        lister = lister or agent
+
+        # Connections accepted while nobody was polling, and active ones left unadvanced
+        waiting = {**pending.connecting, **pending.advancing}
+        async for records in self.list_records(lister, "/connections", "active", "connection_id", waiting):
+            for record in records:
+                connection_id = record["connection_id"]
+                if waiting.pop(connection_id).status != "active":
+                    # Recorded and advanced as a connections webhook would be, but not stamped as one
+                    await apply_connection_record(self.app, record, agent)
+                    pending.connecting.pop(connection_id, None)
+                    stats["connected"] += 1
+                else:
+                    flow = pending.advancing.pop(connection_id)
+                    if flow.type == FlowType.ISSUER:
+                        await advance_issuer_flow(store, agent, connection_id)
+                    else:
+                        await advance_verifier_flow(store, agent, connection_id)
+                    stats["advanced"] += 1
+
+        for state in TERMINAL_CREDENTIAL_STATES:
+            async for records in self.list_records(lister, "/issue-credential/records", state,
+                                                   "credential_exchange_id", pending.credentials):
+                for record in records:
+                    pending.credentials.pop(record["credential_exchange_id"])
+                    await handle_issue_credential_event(self.app, record, agent)
+                    stats["credentials"] += 1
+
+        for state in TERMINAL_PROOF_STATES:
+            async for records in self.list_records(lister, "/present-proof/records", state,
+                                                   "presentation_exchange_id", pending.proofs):
+                for record in records:
+                    pending.proofs.pop(record["presentation_exchange_id"])
+                    # Listed by the admin API, so no confirmation round trip is needed
+                    await apply_proof_record(self.app, record)
+                    stats["proofs"] += 1
+
+    async def reconcile(self) -> dict:
+        """Run one reconciliation pass, returning what it changed"""
+        stats = {"connected": 0, "advanced": 0, "credentials": 0, "proofs": 0}
+        if not self.app["readiness"].ready:
+            return stats
+
+        pending = await self.pending_flows()
+        if not pending:
+            return stats
+
+        for lister, agent in await self.agents():
+            if not pending:
+                break
+            try:
+                await self.reconcile_agent(agent, pending, stats, lister)
+            except Exception as e:
+                logger.error("Reconciling flows with %s failed: %s", lister.admin_url, e)
+
+        if any(stats.values()):
+            logger.info("Flow reconciliation: %s", stats)
+        return stats
+
+    async def run(self):
+        """Reconcile every ``interval`` seconds until cancelled"""
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.reconcile()
+            except Exception as e:
+                logger.error("Flow reconciliation failed: %s", e)
+
+    def start(self):
+        """Start the background reconciler"""
+        if self._task is None and self.interval > 0:
+            self._task = asyncio.ensure_future(self.run())
+
+    async def stop(self):
+        """Stop the background reconciler"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+State Retention for SSI Demo Application
+This module keeps the state store bounded on long-running instances. A
+background sweeper compacts finished flows down to a small summary, evicts
+them once they are older than the completed-flow TTL, and evicts invitations
+and flows that stopped making progress.
+"""
+
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Optional
+
+from .flows import FlowRecord, is_terminal
+
+logger = logging.getLogger(__name__)
+
+# Fields a finished flow keeps; invitations, attributes and full proof records are dropped.
+# The invitation URL stays so a reloaded page can still fetch its QR image
+SUMMARY_FIELDS = [
+    "connection_id", "tenant_id", "admin_url", "type", "stage", "forced",
+    "status", "rfc23_state", "created_at", "updated_at", "webhook_updated_at", "compacted_at",
+    "invitation_url",
+    "credential_exchange_id", "credential_state",
+    "presentation_exchange_id", "proof_state", "proof_attributes"
+]
+
+def compactable_fields(record: FlowRecord) -> list:
+    """Fields a terminal record still carries beyond its summary"""
+    return [name for name in record.set_fields() if name not in SUMMARY_FIELDS]
+
+class StateSweeper:
+    """Periodically compacts and evicts connection records and old campaigns
+
+    ``idle_ttl`` applies to flows that have not finished (typically invitations
+    nobody scanned) and ``completed_ttl`` to finished ones, both measured from
+    the record's last update. A TTL of 0 keeps those records forever.
+    """
+
+    def __init__(self, store, idle_ttl: float = 3600, completed_ttl: float = 86400,
+                 interval: float = 60, batch_size: int = 500):
+        self.store = store
+        self.idle_ttl = idle_ttl
+        self.completed_ttl = completed_ttl
+        self.interval = interval
+        self.batch_size = batch_size
+        self._task: Optional[asyncio.Task] = None
+        self._last_sweep: Optional[str] = None
+
+    @staticmethod
+    def _cutoff(now: datetime, ttl: float) -> Optional[str]:
+        return (now - timedelta(seconds=ttl)).isoformat() if ttl > 0 else None
+
+    async def sweep(self) -> dict:
+        """Run one compaction and eviction pass, returning what it did"""
+        now = datetime.now()
+        idle_cutoff = self._cutoff(now, self.idle_ttl)
+        completed_cutoff = self._cutoff(now, self.completed_ttl)
+        stats = {"compacted": 0, "evicted": 0, "campaigns_expired": 0}
+
+        # A flow becomes terminal through an update, so only records changed since
+        # the previous pass need to be looked at for compaction
+        offset = 0
+        while True:
+            batch = await self.store.query_connections(updated_after=self._last_sweep, offset=offset,
+                                                       limit=self.batch_size)
+            for record in batch:
+                if is_terminal(record) and compactable_fields(record):
+                    await self.store.update_connection(record.connection_id, {"compacted_at": now.isoformat()},
+                                                       remove=compactable_fields(record), create=False)
+                    stats["compacted"] += 1
+            offset += len(batch)
+            if len(batch) < self.batch_size:
+                break
+        self._last_sweep = now.isoformat()
+
+        # Only records idle past the shorter TTL can be due for eviction
+        cutoffs = [cutoff for cutoff in (idle_cutoff, completed_cutoff) if cutoff is not None]
+        if cutoffs:
+            offset = 0
+            while True:
+                batch = await self.store.query_connections(updated_before=max(cutoffs), offset=offset,
+                                                           limit=self.batch_size)
+                expired = []
+                for record in batch:
+                    cutoff = completed_cutoff if is_terminal(record) else idle_cutoff
+                    if cutoff is not None and (record.updated_at or "") < cutoff:
+                        expired.append(record.connection_id)
+                stats["evicted"] += await self.store.delete_connections(expired)
+                # Evicted records leave the result set, the rest are skipped over
+                offset += len(batch) - len(expired)
+                if len(batch) < self.batch_size:
+                    break
+
+        if completed_cutoff is not None:
+            stats["campaigns_expired"] = await self.store.expire_campaigns(completed_cutoff)
+
+        if any(stats.values()):
+            logger.info(f"State sweep: {stats}")
+        return stats
+
+    async def run(self):
+        """Sweep every ``interval`` seconds until cancelled"""
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.sweep()
+            except Exception as e:
+                logger.error(f"State sweep failed: {str(e)}")
+
+    def start(self):
+        """Start the background sweeper"""
+        if self._task is None and self.interval > 0:
+            self._task = asyncio.ensure_future(self.run())
+
+    async def stop(self):
+        """Stop the background sweeper"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
@@ -7,54 +7,244 @@ This module contains the core SSI agent functionality for credential issuance an
 import asyncio
 import json
 import logging
+import time
 import uuid
-from typing import Dict, Any, Optional
-from aiohttp import ClientSession
+from typing import Dict, Any, Optional, Tuple
+from aiohttp import ClientSession, ClientTimeout, TCPConnector
+
+from .ledger_cache import LedgerCache
+from .metrics import ADMIN_DURATION, ADMIN_IN_FLIGHT, ADMIN_REQUESTS, admin_path_template
+from .tracing import current_span, id_attributes, span, trace_headers
 
 logger = logging.getLogger(__name__)
 
+# Ledger writes can take far longer than ordinary admin calls
+DEFAULT_PATH_TIMEOUTS = {
+    "/schemas": 60.0,
+    "/credential-definitions": 120.0
+}
+
+# Upper bound on micro-cached GET results before expired entries are pruned
+GET_CACHE_MAX_ENTRIES = 1024
+
+# How long and how often to poll for a new schema to become readable
+LEDGER_READY_TIMEOUT = 10.0
+LEDGER_READY_INTERVAL = 0.25
+
 class SSIAgent:
     """Single SSI Agent that can both issue and verify credentials"""
     
-    def __init__(self, admin_url: str):
+    def __init__(self, admin_url: str, pool_size: int = 100, per_host_limit: int = 0,
+                 keepalive_timeout: float = 30.0, dns_cache_ttl: int = 300,
+                 timeout: float = 30.0, path_timeouts: Optional[Dict[str, float]] = None,
+                 get_cache_ttl: float = 0.0, ledger_cache_path: Optional[str] = None):
+        """
+        Args:
+            admin_url: Base URL of the ACA-Py admin API
+            pool_size: Maximum number of pooled admin connections (0 = unlimited)
+            per_host_limit: Maximum connections per admin host (0 = unlimited)
+            keepalive_timeout: Seconds an idle pooled connection is kept open
+            dns_cache_ttl: Seconds resolved admin host addresses are cached
+            timeout: Default total timeout in seconds for an admin request
+            path_timeouts: Per-path-prefix timeouts overriding ``timeout``
+            get_cache_ttl: Seconds a successful GET result is reused (0 disables)
+            ledger_cache_path: JSON file remembering schema/cred def ids between starts
+        """
         self.admin_url = admin_url
         self.session: Optional[ClientSession] = None
         self.schema_id = None
         self.cred_def_id = None
+        self.pool_size = pool_size
+        self.per_host_limit = per_host_limit
+        self.keepalive_timeout = keepalive_timeout
+        self.dns_cache_ttl = dns_cache_ttl
+        self.timeout = ClientTimeout(total=timeout)
+        # Longest prefix first so the most specific override wins
+        self.path_timeouts = sorted(
+            ((prefix, ClientTimeout(total=seconds))
+             for prefix, seconds in (DEFAULT_PATH_TIMEOUTS if path_timeouts is None else path_timeouts).items()),
+            key=lambda item: len(item[0]),
+            reverse=True
+        )
+        self.get_cache_ttl = get_cache_ttl
+        self._inflight_gets: Dict[str, asyncio.Future] = {}
+        self._get_cache: Dict[str, Tuple[float, dict]] = {}
+        self.ledger_cache = LedgerCache(ledger_cache_path) if ledger_cache_path else None
         
     async def start_session(self):
         """Start HTTP session"""
-        self.session = ClientSession()
+        connector = TCPConnector(
+            limit=self.pool_size,
+            limit_per_host=self.per_host_limit,
+            keepalive_timeout=self.keepalive_timeout,
+            ttl_dns_cache=self.dns_cache_ttl,
+            use_dns_cache=True
+        )
+        self.session = ClientSession(connector=connector, timeout=self.timeout)
         
     async def close_session(self):
         """Close HTTP session"""
         if self.session:
             await self.session.close()
             
+    def request_timeout(self, path: str) -> ClientTimeout:
+        """Timeout for an admin path, honouring per-path overrides"""
+        for prefix, timeout in self.path_timeouts:
+            if path.startswith(prefix):
+                return timeout
+        return self.timeout
+            
     async def admin_request(self, method: str, path: str, data: dict = None) -> dict:
-        """Make request to agent admin API"""
+        """Make request to agent admin API
+        
+        Concurrent identical GETs share a single in-flight request, and with
+        ``get_cache_ttl`` set a successful GET result is reused for that long.
+        Results may be shared between callers and must be treated as read-only.
+        """
+        if method.upper() == "GET" and data is None:
+            return await self._coalesced_get(path)
+        
+        # Writes can change what subsequent GETs return
+        self._get_cache.clear()
+        return await self._send_admin_request(method, path, data)
+    
+    async def _coalesced_get(self, path: str) -> dict:
+        """Single-flight GET with an optional micro-TTL result cache"""
+        loop = asyncio.get_running_loop()
+        
+        cached = self._get_cache.get(path)
+        if cached is not None:
+            if cached[0] > loop.time():
+                return cached[1]
+            del self._get_cache[path]
+        
+        future = self._inflight_gets.get(path)
+        if future is None:
+            future = asyncio.ensure_future(self._send_admin_request("GET", path))
+            self._inflight_gets[path] = future
+            future.add_done_callback(lambda done: self._finish_get(path, done))
+        
+        # Shield so one cancelled poller does not abort the request for the others
+        return await asyncio.shield(future)
+    
+    def _finish_get(self, path: str, future: asyncio.Future):
+        """Release a completed in-flight GET and cache its result if enabled"""
+        self._inflight_gets.pop(path, None)
+        if self.get_cache_ttl <= 0 or future.cancelled() or future.exception() is not None:
+            return
+        
+        result = future.result()
+        if "error" in result:
+            return
+        
+        now = asyncio.get_running_loop().time()
+        if len(self._get_cache) >= GET_CACHE_MAX_ENTRIES:
+            for key in [key for key, (expires, _) in self._get_cache.items() if expires <= now]:
+                del self._get_cache[key]
+            if len(self._get_cache) >= GET_CACHE_MAX_ENTRIES:
+                return
+        self._get_cache[path] = (now + self.get_cache_ttl, result)
+    
+    async def _send_admin_request(self, method: str, path: str, data: dict = None, headers: dict = None) -> dict:
+        """Send a single request to the agent admin API in its own trace span"""
+        template = admin_path_template(path)
+        with span(f"admin {method} {template}", **{"admin.url": self.admin_url, "admin.path": path},
+                  **id_attributes(data)) as admin_span:
+            # Let ACA-Py (or a proxy in front of it) join the trace
+            propagated = trace_headers()
+            if propagated:
+                headers = {**(headers or {}), **propagated}
+            
+            result = await self._http_request(method, path, template, data, headers)
+            admin_span.set(**id_attributes(result))
+            if "error" in result:
+                admin_span.status = "error"
+                admin_span.set(error=str(result["error"])[:200])
+            return result
+    
+    async def _http_request(self, method: str, path: str, template: str, data: dict = None,
+                            headers: dict = None) -> dict:
+        """Perform an admin HTTP request and record its metrics"""
         url = f"{self.admin_url}{path}"
-        headers = {"Content-Type": "application/json"}
+        started = time.perf_counter()
+        status = "error"
+        ADMIN_IN_FLIGHT.inc()
         
         try:
-            async with self.session.request(method, url, json=data, headers=headers) as resp:
-                response_text = await resp.text()
-                logger.info(f"{method} {path} -> {resp.status}: {response_text[:200]}...")
+            # json= already sets the content type; the body is decoded straight from bytes
+            async with self.session.request(method, url, json=data, headers=headers,
+                                            timeout=self.request_timeout(path)) as resp:
+                body = await resp.read()
+                status = resp.status
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug("%s %s response body: %s", method, path, body[:2000].decode(errors="replace"),
+                                 extra={"admin_path": template})
                 
                 if resp.status == 200:
-                    if response_text:
+                    if body:
                         try:
-                            return json.loads(response_text)
-                        except json.JSONDecodeError:
-                            return {"success": True, "response": response_text}
+                            return json.loads(body)
+                        except (json.JSONDecodeError, UnicodeDecodeError):
+                            return {"success": True, "response": body.decode(errors="replace")}
                     else:
                         return {"success": True}
                 else:
-                    logger.error(f"Admin API error: {resp.status} - {response_text}")
+                    response_text = body.decode(errors="replace")
+                    logger.error("Admin API error: %s - %s", resp.status, response_text)
                     return {"error": f"Status {resp.status}: {response_text}"}
+        except asyncio.TimeoutError:
+            status = "timeout"
+            logger.error("Admin API request timed out: %s %s", method, path)
+            return {"error": f"Timeout calling {method} {path}"}
         except Exception as e:
-            logger.error(f"Admin API request failed: {str(e)}")
+            logger.error("Admin API request failed: %s", e)
             return {"error": str(e)}
+        finally:
+            duration = time.perf_counter() - started
+            ADMIN_IN_FLIGHT.dec()
+            current_span().set(**{"http.status_code": status})
+            ADMIN_REQUESTS.inc(method, template, status)
+            ADMIN_DURATION.observe(duration, method, template)
+            # Formatted later (and only if kept by SSI_LOG_SAMPLE) on the log listener thread
+            logger.info("%s %s -> %s in %.1f ms", method, path, status, duration * 1000,
+                        extra={"admin_method": method, "admin_path": template, "status": status,
+                               "duration_ms": round(duration * 1000, 1)})
+    
+    async def load_cached_ledger_ids(self, public_did: str) -> bool:
+        """Use cached schema and cred def ids if the ledger still resolves both
+        
+        The two lookups run concurrently; a stale entry is dropped from the cache.
+        """
+        cached = self.ledger_cache.get(self.admin_url, public_did) if self.ledger_cache else None
+        if not cached:
+            return False
+        
+        schema_result, cred_def_result = await asyncio.gather(
+            self.admin_request("GET", f"/schemas/{cached['schema_id']}"),
+            self.admin_request("GET", f"/credential-definitions/{cached['cred_def_id']}")
+        )
+        if not schema_result.get("schema") or not cred_def_result.get("credential_definition"):
+            logger.warning("Cached schema/credential definition ids are no longer valid, setting up again")
+            self.ledger_cache.discard(self.admin_url, public_did)
+            return False
+        
+        self.schema_id = cached["schema_id"]
+        self.cred_def_id = cached["cred_def_id"]
+        logger.info(f"Using cached UserIdentity schema {self.schema_id} and credential definition {self.cred_def_id}")
+        return True
+    
+    async def wait_for_schema(self, schema_id: str) -> bool:
+        """Poll until a newly written schema can be read back from the ledger"""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + LEDGER_READY_TIMEOUT
+        while True:
+            result = await self.admin_request("GET", f"/schemas/{schema_id}")
+            if result.get("schema"):
+                return True
+            if loop.time() >= deadline:
+                logger.warning(f"Schema {schema_id} not readable after {LEDGER_READY_TIMEOUT}s, continuing anyway")
+                return False
+            await asyncio.sleep(LEDGER_READY_INTERVAL)
     
     async def setup_schema_and_cred_def(self):
         """Setup schema and credential definition for user identity"""
@@ -68,6 +258,10 @@ class SSIAgent:
             public_did = dids_result["result"]["did"]
             logger.info(f"Using public DID: {public_did}")
             
+            # Warm start: reuse the ids resolved last time for this agent and DID
+            if await self.load_cached_ledger_ids(public_did):
+                return True
+            
             # Create fresh UserIdentity schema and credential definition
             schema_data = {
                 "schema_name": "UserIdentityCredential",
@@ -103,7 +297,7 @@ class SSIAgent:
                 return False
                 
             # Wait for schema to be available
-            await asyncio.sleep(2)
+            await self.wait_for_schema(self.schema_id)
             
             # Create credential definition
             cred_def_data = {
@@ -154,6 +348,8 @@ class SSIAgent:
             verify_result = await self.admin_request("GET", f"/credential-definitions/{self.cred_def_id}")
             if "error" not in verify_result:
                 logger.info(f"✅ Verified UserIdentity credential definition is accessible")
+                if self.ledger_cache:
+                    self.ledger_cache.put(self.admin_url, public_did, self.schema_id, self.cred_def_id)
                 return True
             else:
                 logger.error(f"❌ UserIdentity credential definition verification failed: {verify_result}")
@@ -196,7 +392,7 @@ class SSIAgent:
             "trace": False
         }
         
-        logger.info(f"Issuing credential with UserIdentity schema: {credential_data}")
+        logger.debug("Issuing credential with UserIdentity schema: %s", credential_data)
         result = await self.admin_request("POST", "/issue-credential/send", credential_data)
         return result
         
@@ -234,6 +430,6 @@ class SSIAgent:
             "trace": False
         }
         
-        logger.info(f"Requesting proof with data: {proof_request_data}")
+        logger.debug("Requesting proof with data: %s", proof_request_data)
         result = await self.admin_request("POST", "/present-proof/send-request", proof_request_data)
         return result
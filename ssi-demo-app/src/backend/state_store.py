@@ -0,0 +1,694 @@
+#!/usr/bin/env python3
+"""
+State Store for SSI Demo Application
+This module keeps connection flows, proof campaigns and tenants behind a small async
+storage interface with two backends: an in-memory store for single-process
+runs and a SQLite (WAL) store that survives restarts and can be shared by
+several worker processes.
+"""
+
+import asyncio
+import functools
+import json
+import logging
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from .flows import FlowRecord, enum_value, is_terminal
+
+logger = logging.getLogger(__name__)
+
+# Connection fields promoted to indexed columns in the SQLite backend
+INDEXED_CONNECTION_FIELDS = [
+    "type", "status", "credential_exchange_id", "presentation_exchange_id", "created_at", "updated_at"
+]
+
+class StateStore:
+    """Interface shared by the state store backends
+
+    Connections are ``FlowRecord`` objects; campaigns and tenants are plain dicts.
+    ``get_*`` methods return copies, so changes must be written back through
+    ``put_*``/``update_*`` to take effect.
+    """
+
+    async def open(self):
+        """Prepare the backend for use"""
+
+    async def close(self):
+        """Release backend resources"""
+
+    async def get_connection(self, connection_id: str) -> Optional[FlowRecord]:
+        """Get a connection record, or None"""
+        raise NotImplementedError
+
+    async def update_connection(self, connection_id: str, fields: dict = None, remove: Iterable[str] = (),
+                                defaults: dict = None, create: bool = True,
+                                only_if: Callable[[FlowRecord], bool] = None) -> Optional[FlowRecord]:
+        """Set ``fields`` on a connection record and unset the ``remove`` fields
+
+        ``defaults`` are only applied to fields that are not set yet. An update
+        that changes nothing is not written and does not stamp ``updated_at``,
+        so repeated polls of an idle flow do not keep it from expiring. Creates
+        the record when it does not exist and ``create`` is set. An existing
+        record is left alone when ``only_if(record)`` is false; the check and
+        the write are atomic. Returns the (possibly unchanged) record, or None
+        if it does not exist.
+        """
+        raise NotImplementedError
+
+    async def claim_connection(self, connection_id: str, flag: str, stale_after: float = 60.0) -> bool:
+        """Atomically set ``flag`` on an existing record unless another caller holds it
+
+        Used to make sure only one task (or process) acts on a flow at a time; a
+        claim older than ``stale_after`` seconds is treated as abandoned.
+        """
+        raise NotImplementedError
+
+    async def delete_connections(self, connection_ids: Iterable[str]) -> int:
+        """Delete connection records, returning how many were removed"""
+        raise NotImplementedError
+
+    async def find_connection_by_exchange(self, credential_exchange_id: str = None,
+                                          presentation_exchange_id: str = None) -> Optional[FlowRecord]:
+        """Find the connection currently bound to a credential or presentation exchange"""
+        raise NotImplementedError
+
+    async def query_connections(self, type: str = None, status: str = None,
+                                created_before: str = None, created_after: str = None,
+                                updated_before: str = None, updated_after: str = None,
+                                finished: bool = None, offset: int = 0, limit: int = None) -> List[FlowRecord]:
+        """List connection records matching the filters, oldest first
+
+        ``finished`` selects terminal (or, when false, unfinished) flows from an index.
+        """
+        raise NotImplementedError
+
+    async def count_connections(self) -> int:
+        """Number of stored connection records"""
+        raise NotImplementedError
+
+    async def get_campaign(self, campaign_id: str) -> Optional[dict]:
+        """Get a campaign record (without its results), or None"""
+        raise NotImplementedError
+
+    async def expire_campaigns(self, created_before: str) -> int:
+        """Delete finished campaigns created before a timestamp, with their results"""
+        raise NotImplementedError
+
+    async def put_campaign(self, campaign_id: str, campaign: dict):
+        """Insert or replace a campaign record"""
+        raise NotImplementedError
+
+    async def put_campaign_results(self, campaign_id: str, entries: List[dict]):
+        """Insert or replace per-connection campaign results"""
+        raise NotImplementedError
+
+    async def get_campaign_results(self, campaign_id: str, state: str = None,
+                                   offset: int = 0, limit: int = 100) -> Tuple[List[dict], int]:
+        """One page of campaign results in creation order, plus the matching total"""
+        raise NotImplementedError
+
+    async def find_campaign_result(self, presentation_exchange_id: str) -> Optional[Tuple[str, dict]]:
+        """Find the ``(campaign_id, entry)`` that sent a presentation exchange"""
+        raise NotImplementedError
+
+    async def campaign_state_counts(self, campaign_id: str) -> Dict[str, int]:
+        """Number of campaign results in each state"""
+        raise NotImplementedError
+
+    async def get_tenant(self, tenant_id: str) -> Optional[dict]:
+        """Get a tenant record, or None"""
+        raise NotImplementedError
+
+    async def put_tenant(self, tenant_id: str, tenant: dict):
+        """Insert or replace a tenant record"""
+        raise NotImplementedError
+
+    async def list_tenants(self) -> List[dict]:
+        """Every tenant record in creation order"""
+        raise NotImplementedError
+
+    async def find_tenant_by_wallet(self, wallet_id: str) -> Optional[dict]:
+        """Find the tenant owning an ACA-Py subwallet"""
+        raise NotImplementedError
+
+def apply_update(record: FlowRecord, fields: dict = None, remove: Iterable[str] = (), defaults: dict = None,
+                 created: bool = False) -> bool:
+    """Apply an ``update_connection`` change to a record in place, returning whether it needs writing
+
+    ``updated_at`` is only stamped when a field actually changed (or the record is new).
+    """
+    before = record.to_dict()
+    record.update({name: value for name, value in (defaults or {}).items() if getattr(record, name) is None})
+    record.update(fields or {})
+    record.clear(remove)
+    if not created and record.to_dict() == before:
+        return False
+    record.updated_at = datetime.now().isoformat()
+    return True
+
+def claim_is_free(record: FlowRecord, flag: str, stale_after: float) -> bool:
+    """Whether a claim flag is unset or old enough to be considered abandoned"""
+    claimed_at = getattr(record, flag)
+    return claimed_at is None or time.time() - claimed_at > stale_after
+
+class MemoryStateStore(StateStore):
+    """Process-local store with dict indexes on exchange ids, type and status"""
+
+    def __init__(self):
+        self._connections: Dict[str, FlowRecord] = {}
+        self._by_credential_exchange: Dict[str, str] = {}
+        self._by_presentation_exchange: Dict[str, str] = {}
+        self._by_type: Dict[str, set] = {}
+        self._by_status: Dict[str, set] = {}
+        self._unfinished: set = set()
+        self._campaigns: Dict[str, dict] = {}
+        self._campaign_results: Dict[str, Dict[str, dict]] = {}
+        self._campaign_exchanges: Dict[str, Tuple[str, str]] = {}
+        self._tenants: Dict[str, dict] = {}
+
+    def _unindex(self, record: FlowRecord):
+        connection_id = record.connection_id
+        if self._by_credential_exchange.get(record.credential_exchange_id) == connection_id:
+            del self._by_credential_exchange[record.credential_exchange_id]
+        if self._by_presentation_exchange.get(record.presentation_exchange_id) == connection_id:
+            del self._by_presentation_exchange[record.presentation_exchange_id]
+        for index, key in ((self._by_type, enum_value(record.type)), (self._by_status, record.status)):
+            members = index.get(key)
+            if members is not None:
+                members.discard(connection_id)
+                if not members:
+                    del index[key]
+        self._unfinished.discard(connection_id)
+
+    def _index(self, record: FlowRecord):
+        connection_id = record.connection_id
+        if record.credential_exchange_id:
+            self._by_credential_exchange[record.credential_exchange_id] = connection_id
+        if record.presentation_exchange_id:
+            self._by_presentation_exchange[record.presentation_exchange_id] = connection_id
+        self._by_type.setdefault(enum_value(record.type), set()).add(connection_id)
+        self._by_status.setdefault(record.status, set()).add(connection_id)
+        if not is_terminal(record):
+            self._unfinished.add(connection_id)
+
+    async def get_connection(self, connection_id: str) -> Optional[FlowRecord]:
+        record = self._connections.get(connection_id)
+        return record.copy() if record is not None else None
+
+    async def update_connection(self, connection_id: str, fields: dict = None, remove: Iterable[str] = (),
+                                defaults: dict = None, create: bool = True,
+                                only_if: Callable[[FlowRecord], bool] = None) -> Optional[FlowRecord]:
+        record = self._connections.get(connection_id)
+        created = record is None
+        if created:
+            if not create:
+                return None
+            record = FlowRecord(connection_id)
+        elif only_if is not None and not only_if(record):
+            return record.copy()
+        else:
+            self._unindex(record)
+        apply_update(record, fields, remove, defaults, created=created)
+        self._connections[connection_id] = record
+        self._index(record)
+        return record.copy()
+
+    async def claim_connection(self, connection_id: str, flag: str, stale_after: float = 60.0) -> bool:
+        record = self._connections.get(connection_id)
+        if record is None or not claim_is_free(record, flag, stale_after):
+            return False
+        setattr(record, flag, time.time())
+        return True
+
+    async def delete_connections(self, connection_ids: Iterable[str]) -> int:
+        removed = 0
+        for connection_id in connection_ids:
+            record = self._connections.pop(connection_id, None)
+            if record is not None:
+                self._unindex(record)
+                removed += 1
+        return removed
+
+    async def find_connection_by_exchange(self, credential_exchange_id: str = None,
+                                          presentation_exchange_id: str = None) -> Optional[FlowRecord]:
+        if credential_exchange_id:
+            connection_id = self._by_credential_exchange.get(credential_exchange_id)
+        else:
+            connection_id = self._by_presentation_exchange.get(presentation_exchange_id)
+        return await self.get_connection(connection_id) if connection_id else None
+
+    async def query_connections(self, type: str = None, status: str = None,
+                                created_before: str = None, created_after: str = None,
+                                updated_before: str = None, updated_after: str = None,
+                                finished: bool = None, offset: int = 0, limit: int = None) -> List[FlowRecord]:
+        candidates = None
+        for index, key in ((self._by_type, enum_value(type)), (self._by_status, status)):
+            if key is not None:
+                members = index.get(key, set())
+                candidates = members if candidates is None else candidates & members
+        if finished is False:
+            candidates = self._unfinished if candidates is None else candidates & self._unfinished
+        elif finished:
+            candidates = (self._connections.keys() if candidates is None else candidates) - self._unfinished
+        if candidates is None:
+            candidates = self._connections.keys()
+
+        records = []
+        for connection_id in candidates:
+            record = self._connections[connection_id]
+            created_at = record.created_at or ""
+            if created_before is not None and not created_at < created_before:
+                continue
+            if created_after is not None and not created_at > created_after:
+                continue
+            updated_at = record.updated_at or ""
+            if updated_before is not None and not updated_at < updated_before:
+                continue
+            if updated_after is not None and not updated_at > updated_after:
+                continue
+            records.append(record)
+
+        records.sort(key=lambda r: r.created_at or "")
+        end = None if limit is None else offset + limit
+        return [record.copy() for record in records[offset:end]]
+
+    async def count_connections(self) -> int:
+        return len(self._connections)
+
+    async def get_campaign(self, campaign_id: str) -> Optional[dict]:
+        campaign = self._campaigns.get(campaign_id)
+        return dict(campaign) if campaign is not None else None
+
+    async def expire_campaigns(self, created_before: str) -> int:
+        expired = [
+            campaign_id for campaign_id, campaign in self._campaigns.items()
+            if campaign.get("status") != "sending" and (campaign.get("created_at") or "") < created_before
+        ]
+        for campaign_id in expired:
+            del self._campaigns[campaign_id]
+            for entry in self._campaign_results.pop(campaign_id, {}).values():
+                self._campaign_exchanges.pop(entry.get("presentation_exchange_id"), None)
+        return len(expired)
+
+    async def put_campaign(self, campaign_id: str, campaign: dict):
+        self._campaigns[campaign_id] = dict(campaign)
+        self._campaign_results.setdefault(campaign_id, {})
+
+    async def put_campaign_results(self, campaign_id: str, entries: List[dict]):
+        results = self._campaign_results.setdefault(campaign_id, {})
+        for entry in entries:
+            results[entry["connection_id"]] = dict(entry)
+            if entry.get("presentation_exchange_id"):
+                self._campaign_exchanges[entry["presentation_exchange_id"]] = (campaign_id, entry["connection_id"])
+
+    async def get_campaign_results(self, campaign_id: str, state: str = None,
+                                   offset: int = 0, limit: int = 100) -> Tuple[List[dict], int]:
+        entries = self._campaign_results.get(campaign_id, {}).values()
+        if state is not None:
+            entries = [entry for entry in entries if entry.get("state") == state]
+        else:
+            entries = list(entries)
+        return [dict(entry) for entry in entries[offset:offset + limit]], len(entries)
+
+    async def find_campaign_result(self, presentation_exchange_id: str) -> Optional[Tuple[str, dict]]:
+        match = self._campaign_exchanges.get(presentation_exchange_id)
+        if match is None:
+            return None
+        campaign_id, connection_id = match
+        entry = self._campaign_results.get(campaign_id, {}).get(connection_id)
+        return (campaign_id, dict(entry)) if entry is not None else None
+
+    async def campaign_state_counts(self, campaign_id: str) -> Dict[str, int]:
+        counts: Dict[str, int] = {}
+        for entry in self._campaign_results.get(campaign_id, {}).values():
+            counts[entry.get("state")] = counts.get(entry.get("state"), 0) + 1
+        return counts
+
+    async def get_tenant(self, tenant_id: str) -> Optional[dict]:
+        tenant = self._tenants.get(tenant_id)
+        return dict(tenant) if tenant is not None else None
+
+    async def put_tenant(self, tenant_id: str, tenant: dict):
+        self._tenants[tenant_id] = dict(tenant)
+
+    async def list_tenants(self) -> List[dict]:
+        tenants = sorted(self._tenants.values(), key=lambda tenant: tenant.get("created_at") or "")
+        return [dict(tenant) for tenant in tenants]
+
+    async def find_tenant_by_wallet(self, wallet_id: str) -> Optional[dict]:
+        for tenant in self._tenants.values():
+            if tenant.get("wallet_id") == wallet_id:
+                return dict(tenant)
+        return None
+
+def on_db_thread(method):
+    """Turn a blocking ``SQLiteStateStore`` method into a coroutine run on the store's database thread"""
+    @functools.wraps(method)
+    async def run(self, *args, **kwargs):
+        return await asyncio.get_running_loop().run_in_executor(
+            self._executor, functools.partial(method, self, *args, **kwargs)
+        )
+    return run
+
+class SQLiteStateStore(StateStore):
+    """SQLite store in WAL mode with indexed lookup columns
+
+    Records are kept as JSON documents next to the indexed columns. sqlite3
+    calls block (fsyncs, and waits for other processes' write locks), so every
+    operation runs on one dedicated database thread rather than on the event loop.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS connections (
+            connection_id TEXT PRIMARY KEY,
+            type TEXT,
+            status TEXT,
+            credential_exchange_id TEXT,
+            presentation_exchange_id TEXT,
+            created_at TEXT,
+            updated_at TEXT,
+            finished INTEGER,
+            data TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_connections_type ON connections (type);
+        CREATE INDEX IF NOT EXISTS idx_connections_status ON connections (status);
+        CREATE INDEX IF NOT EXISTS idx_connections_cred_ex ON connections (credential_exchange_id);
+        CREATE INDEX IF NOT EXISTS idx_connections_pres_ex ON connections (presentation_exchange_id);
+        CREATE INDEX IF NOT EXISTS idx_connections_created_at ON connections (created_at);
+        CREATE INDEX IF NOT EXISTS idx_connections_updated_at ON connections (updated_at);
+        CREATE INDEX IF NOT EXISTS idx_connections_finished ON connections (finished);
+
+        CREATE TABLE IF NOT EXISTS campaigns (
+            campaign_id TEXT PRIMARY KEY,
+            created_at TEXT,
+            data TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_campaigns_created_at ON campaigns (created_at);
+
+        CREATE TABLE IF NOT EXISTS campaign_results (
+            campaign_id TEXT NOT NULL,
+            connection_id TEXT NOT NULL,
+            position INTEGER NOT NULL,
+            state TEXT,
+            presentation_exchange_id TEXT,
+            data TEXT NOT NULL,
+            PRIMARY KEY (campaign_id, connection_id)
+        );
+        CREATE INDEX IF NOT EXISTS idx_campaign_results_order ON campaign_results (campaign_id, position);
+        CREATE INDEX IF NOT EXISTS idx_campaign_results_state ON campaign_results (campaign_id, state);
+        CREATE INDEX IF NOT EXISTS idx_campaign_results_pres_ex ON campaign_results (presentation_exchange_id);
+
+        CREATE TABLE IF NOT EXISTS tenants (
+            tenant_id TEXT PRIMARY KEY,
+            wallet_id TEXT,
+            created_at TEXT,
+            data TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_tenants_wallet ON tenants (wallet_id);
+    """
+
+    def __init__(self, path: str, busy_timeout: float = 5.0):
+        self.path = path
+        self.busy_timeout = busy_timeout
+        self._db: Optional[sqlite3.Connection] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    async def open(self):
+        # One thread owns the connection, which also serialises this process's transactions
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sqlite-state")
+        await self._open()
+
+    @on_db_thread
+    def _open(self):
+        # Autocommit mode; write paths open explicit transactions
+        self._db = sqlite3.connect(self.path, timeout=self.busy_timeout, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        columns = [row[1] for row in self._db.execute("PRAGMA table_info(connections)")]
+        if columns and "updated_at" not in columns:
+            # Databases created before retention support lack the updated_at column
+            self._db.execute("ALTER TABLE connections ADD COLUMN updated_at TEXT")
+        if columns and "finished" not in columns:
+            # Likewise the finished flag, which is filled in from the stored records
+            self._db.execute("ALTER TABLE connections ADD COLUMN finished INTEGER")
+            rows = self._db.execute("SELECT connection_id, data FROM connections").fetchall()
+            self._db.executemany("UPDATE connections SET finished = ? WHERE connection_id = ?", [
+                (int(is_terminal(FlowRecord.from_dict(json.loads(data)))), connection_id) for connection_id, data in rows
+            ])
+        self._db.executescript(self.SCHEMA)
+        logger.info(f"SQLite state store opened at {self.path}")
+
+    async def close(self):
+        if self._executor is not None:
+            await self._close()
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    @on_db_thread
+    def _close(self):
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+    @staticmethod
+    def _load(row) -> Optional[dict]:
+        return json.loads(row[0]) if row else None
+
+    def _read_connection(self, connection_id: str) -> Optional[FlowRecord]:
+        row = self._db.execute("SELECT data FROM connections WHERE connection_id = ?", (connection_id,)).fetchone()
+        return FlowRecord.from_dict(self._load(row))
+
+    def _write_connection(self, record: FlowRecord):
+        self._db.execute(
+            "INSERT OR REPLACE INTO connections (connection_id, type, status, credential_exchange_id, "
+            "presentation_exchange_id, created_at, updated_at, finished, data) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (record.connection_id, *(enum_value(getattr(record, field)) for field in INDEXED_CONNECTION_FIELDS),
+             int(is_terminal(record)), json.dumps(record.to_dict()))
+        )
+
+    @on_db_thread
+    def get_connection(self, connection_id: str) -> Optional[FlowRecord]:
+        return self._read_connection(connection_id)
+
+    @on_db_thread
+    def update_connection(self, connection_id: str, fields: dict = None, remove: Iterable[str] = (),
+                          defaults: dict = None, create: bool = True,
+                          only_if: Callable[[FlowRecord], bool] = None) -> Optional[FlowRecord]:
+        # Most status polls change nothing; settle those without taking the write lock
+        current = self._read_connection(connection_id)
+        if current is not None and ((only_if is not None and not only_if(current))
+                                    or not apply_update(current.copy(), fields, remove, defaults)):
+            return current
+
+        # IMMEDIATE takes the write lock up front so concurrent processes cannot interleave
+        self._db.execute("BEGIN IMMEDIATE")
+        try:
+            record = self._read_connection(connection_id)
+            created = record is None
+            if created:
+                if not create:
+                    self._db.execute("ROLLBACK")
+                    return None
+                record = FlowRecord(connection_id)
+            elif only_if is not None and not only_if(record):
+                self._db.execute("ROLLBACK")
+                return record
+            if not apply_update(record, fields, remove, defaults, created=created):
+                self._db.execute("ROLLBACK")
+                return record
+            self._write_connection(record)
+            self._db.execute("COMMIT")
+            return record
+        except Exception:
+            self._db.execute("ROLLBACK")
+            raise
+
+    @on_db_thread
+    def claim_connection(self, connection_id: str, flag: str, stale_after: float = 60.0) -> bool:
+        self._db.execute("BEGIN IMMEDIATE")
+        try:
+            record = self._read_connection(connection_id)
+            if record is None or not claim_is_free(record, flag, stale_after):
+                self._db.execute("ROLLBACK")
+                return False
+            setattr(record, flag, time.time())
+            self._write_connection(record)
+            self._db.execute("COMMIT")
+            return True
+        except Exception:
+            self._db.execute("ROLLBACK")
+            raise
+
+    @on_db_thread
+    def delete_connections(self, connection_ids: Iterable[str]) -> int:
+        connection_ids = list(connection_ids)
+        if not connection_ids:
+            return 0
+        self._db.execute("BEGIN IMMEDIATE")
+        try:
+            removed = self._db.executemany(
+                "DELETE FROM connections WHERE connection_id = ?", ((cid,) for cid in connection_ids)
+            ).rowcount
+            self._db.execute("COMMIT")
+            return removed
+        except Exception:
+            self._db.execute("ROLLBACK")
+            raise
+
+    @on_db_thread
+    def find_connection_by_exchange(self, credential_exchange_id: str = None,
+                                    presentation_exchange_id: str = None) -> Optional[FlowRecord]:
+        if credential_exchange_id:
+            row = self._db.execute(
+                "SELECT data FROM connections WHERE credential_exchange_id = ?", (credential_exchange_id,)
+            ).fetchone()
+        else:
+            row = self._db.execute(
+                "SELECT data FROM connections WHERE presentation_exchange_id = ?", (presentation_exchange_id,)
+            ).fetchone()
+        return FlowRecord.from_dict(self._load(row))
+
+    @on_db_thread
+    def query_connections(self, type: str = None, status: str = None,
+                          created_before: str = None, created_after: str = None,
+                          updated_before: str = None, updated_after: str = None,
+                          finished: bool = None, offset: int = 0, limit: int = None) -> List[FlowRecord]:
+        clauses, params = [], []
+        for column, operator, value in (("type", "=", enum_value(type)), ("status", "=", status),
+                                        ("created_at", "<", created_before), ("created_at", ">", created_after),
+                                        ("updated_at", "<", updated_before), ("updated_at", ">", updated_after),
+                                        ("finished", "=", None if finished is None else int(finished))):
+            if value is not None:
+                clauses.append(f"{column} {operator} ?")
+                params.append(value)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        params.extend([-1 if limit is None else limit, offset])
+        rows = self._db.execute(
+            f"SELECT data FROM connections {where} ORDER BY created_at LIMIT ? OFFSET ?", params
+        ).fetchall()
+        return [FlowRecord.from_dict(json.loads(row[0])) for row in rows]
+
+    @on_db_thread
+    def count_connections(self) -> int:
+        return self._db.execute("SELECT COUNT(*) FROM connections").fetchone()[0]
+
+    @on_db_thread
+    def get_campaign(self, campaign_id: str) -> Optional[dict]:
+        row = self._db.execute("SELECT data FROM campaigns WHERE campaign_id = ?", (campaign_id,)).fetchone()
+        return self._load(row)
+
+    @on_db_thread
+    def expire_campaigns(self, created_before: str) -> int:
+        rows = self._db.execute(
+            "SELECT campaign_id, data FROM campaigns WHERE created_at < ?", (created_before,)
+        ).fetchall()
+        expired = [(campaign_id,) for campaign_id, data in rows if json.loads(data).get("status") != "sending"]
+        if not expired:
+            return 0
+        self._db.execute("BEGIN IMMEDIATE")
+        try:
+            self._db.executemany("DELETE FROM campaign_results WHERE campaign_id = ?", expired)
+            self._db.executemany("DELETE FROM campaigns WHERE campaign_id = ?", expired)
+            self._db.execute("COMMIT")
+        except Exception:
+            self._db.execute("ROLLBACK")
+            raise
+        return len(expired)
+
+    @on_db_thread
+    def put_campaign(self, campaign_id: str, campaign: dict):
+        self._db.execute(
+            "INSERT OR REPLACE INTO campaigns (campaign_id, created_at, data) VALUES (?, ?, ?)",
+            (campaign_id, campaign.get("created_at"), json.dumps(campaign))
+        )
+
+    @on_db_thread
+    def put_campaign_results(self, campaign_id: str, entries: List[dict]):
+        self._db.execute("BEGIN IMMEDIATE")
+        try:
+            position = self._db.execute(
+                "SELECT COALESCE(MAX(position), -1) FROM campaign_results WHERE campaign_id = ?", (campaign_id,)
+            ).fetchone()[0]
+            for entry in entries:
+                # Keep the original position when an existing entry is rewritten
+                existing = self._db.execute(
+                    "SELECT position FROM campaign_results WHERE campaign_id = ? AND connection_id = ?",
+                    (campaign_id, entry["connection_id"])
+                ).fetchone()
+                if existing:
+                    entry_position = existing[0]
+                else:
+                    position += 1
+                    entry_position = position
+                self._db.execute(
+                    "INSERT OR REPLACE INTO campaign_results (campaign_id, connection_id, position, state, "
+                    "presentation_exchange_id, data) VALUES (?, ?, ?, ?, ?, ?)",
+                    (campaign_id, entry["connection_id"], entry_position, entry.get("state"),
+                     entry.get("presentation_exchange_id"), json.dumps(entry))
+                )
+            self._db.execute("COMMIT")
+        except Exception:
+            self._db.execute("ROLLBACK")
+            raise
+
+    @on_db_thread
+    def get_campaign_results(self, campaign_id: str, state: str = None,
+                             offset: int = 0, limit: int = 100) -> Tuple[List[dict], int]:
+        where, params = "WHERE campaign_id = ?", [campaign_id]
+        if state is not None:
+            where += " AND state = ?"
+            params.append(state)
+        total = self._db.execute(f"SELECT COUNT(*) FROM campaign_results {where}", params).fetchone()[0]
+        rows = self._db.execute(
+            f"SELECT data FROM campaign_results {where} ORDER BY position LIMIT ? OFFSET ?", params + [limit, offset]
+        ).fetchall()
+        return [json.loads(row[0]) for row in rows], total
+
+    @on_db_thread
+    def find_campaign_result(self, presentation_exchange_id: str) -> Optional[Tuple[str, dict]]:
+        row = self._db.execute(
+            "SELECT campaign_id, data FROM campaign_results WHERE presentation_exchange_id = ?",
+            (presentation_exchange_id,)
+        ).fetchone()
+        return (row[0], json.loads(row[1])) if row else None
+
+    @on_db_thread
+    def campaign_state_counts(self, campaign_id: str) -> Dict[str, int]:
+        rows = self._db.execute(
+            "SELECT state, COUNT(*) FROM campaign_results WHERE campaign_id = ? GROUP BY state", (campaign_id,)
+        ).fetchall()
+        return {state: count for state, count in rows}
+
+    @on_db_thread
+    def get_tenant(self, tenant_id: str) -> Optional[dict]:
+        row = self._db.execute("SELECT data FROM tenants WHERE tenant_id = ?", (tenant_id,)).fetchone()
+        return self._load(row)
+
+    @on_db_thread
+    def put_tenant(self, tenant_id: str, tenant: dict):
+        self._db.execute(
+            "INSERT OR REPLACE INTO tenants (tenant_id, wallet_id, created_at, data) VALUES (?, ?, ?, ?)",
+            (tenant_id, tenant.get("wallet_id"), tenant.get("created_at"), json.dumps(tenant))
+        )
+
+    @on_db_thread
+    def list_tenants(self) -> List[dict]:
+        rows = self._db.execute("SELECT data FROM tenants ORDER BY created_at").fetchall()
+        return [json.loads(data) for data, in rows]
+
+    @on_db_thread
+    def find_tenant_by_wallet(self, wallet_id: str) -> Optional[dict]:
+        row = self._db.execute("SELECT data FROM tenants WHERE wallet_id = ?", (wallet_id,)).fetchone()
+        return self._load(row)
+
+def create_state_store(backend: str = "memory", path: str = "ssi_state.db") -> StateStore:
+    """Build the configured state store backend"""
+    if backend == "sqlite":
+        return SQLiteStateStore(path)
+    if backend == "memory":
+        return MemoryStateStore()
+    raise ValueError(f"Unknown state store backend: {backend}")
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Tenant Routes for SSI Demo Application
+This module manages tenants and namespaces the API per tenant: every
+``/api/...`` route is also served as ``/api/tenants/{tenant_id}/...``, where
+it runs against that tenant's subwallet and credential definition. Flows and
+campaigns belong to the tenant (or the base routes) that created them, and
+managing tenants requires the ``SSI_TENANT_ADMIN_KEY``.
+"""
+
+import hmac
+import logging
+import re
+from typing import List, Optional
+from aiohttp import web
+from aiohttp.web import Request, Response, RouteTableDef
+
+from .tenants import request_tenant_id
+
+logger = logging.getLogger(__name__)
+routes = RouteTableDef()
+
+TENANT_PREFIX = "/api/tenants/{tenant_id}"
+
+TENANT_ID_PATTERN = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+
+def tenant_route_defs(*tables: RouteTableDef) -> List[web.RouteDef]:
+    """Copies of the ``/api/`` routes in ``tables`` namespaced under ``TENANT_PREFIX``"""
+    return [
+        web.route(route.method, TENANT_PREFIX + route.path[len("/api"):], route.handler, **route.kwargs)
+        for table in tables
+        for route in table
+        if isinstance(route, web.RouteDef) and route.path.startswith("/api/")
+    ]
+
+async def owns_resources(request: Request) -> bool:
+    """Whether the connection or campaign a route names was created under the request's tenant"""
+    tenant_id = request_tenant_id(request)
+    store = request.app["state_store"]
+    connection_id = request.match_info.get("connection_id")
+    if connection_id is not None:
+        record = await store.get_connection(connection_id)
+        if record is not None and record.tenant_id != tenant_id:
+            return False
+    campaign_id = request.match_info.get("campaign_id")
+    if campaign_id is not None:
+        campaign = await store.get_campaign(campaign_id)
+        if campaign is not None and campaign.get("tenant_id") != tenant_id:
+            return False
+    return True
+
+def admin_key_error(request: Request) -> Optional[Response]:
+    """Error response unless the request carries ``SSI_TENANT_ADMIN_KEY`` as ``x-api-key``"""
+    admin_key = request.app["settings"].tenant_admin_key
+    if not admin_key:
+        return web.json_response(
+            {"success": False, "error": "Tenant management is disabled; set SSI_TENANT_ADMIN_KEY"},
+            status=403
+        )
+    if not hmac.compare_digest(request.headers.get("x-api-key", ""), admin_key):
+        return web.json_response({"success": False, "error": "Invalid admin API key"}, status=401)
+    return None
+
+@web.middleware
+async def tenant_middleware(request: Request, handler):
+    """Resolve the tenant agent for namespaced routes and keep each tenant to its own flows
+
+    Unknown tenants answer 404, and so do connections and campaigns created
+    under another tenant or under the base ``/api/`` routes.
+    """
+    resource = request.match_info.route.resource
+    if (request.method != "OPTIONS" and resource is not None
+            and resource.canonical.startswith(f"{TENANT_PREFIX}/")):
+        tenant_id = request.match_info["tenant_id"]
+        agent = await request.app["tenants"].get_agent(tenant_id)
+        if agent is None:
+            return web.json_response(
+                {"success": False, "error": f"Tenant {tenant_id} not found or not provisioned"},
+                status=404
+            )
+        request["tenant_agent"] = agent
+    if not await owns_resources(request):
+        return web.json_response({"success": False, "error": "Not found"}, status=404)
+    return await handler(request)
+
+@routes.post('/api/tenants')
+async def api_create_tenant(request: Request) -> Response:
+    """Create and provision a tenant
+
+    Body: ``{"tenant_id": ..., "name": ..., "label": ...}`` (all optional).
+    Posting an existing ``tenant_id`` whose provisioning failed retries it.
+    """
+    error = admin_key_error(request)
+    if error is not None:
+        return error
+    try:
+        body = await request.json() if request.can_read_body else {}
+        tenant_id = body.get("tenant_id")
+        if tenant_id is not None and not TENANT_ID_PATTERN.match(str(tenant_id)):
+            return web.json_response({
+                "success": False,
+                "error": "tenant_id may only contain letters, digits, '-' and '_' (at most 64)"
+            })
+
+        tenant = await request.app["tenants"].create_tenant(tenant_id, body.get("name"), body.get("label"))
+        return web.json_response({
+            "success": tenant["status"] == "ready",
+            "tenant": tenant,
+            "api_prefix": TENANT_PREFIX.format(tenant_id=tenant["tenant_id"])
+        })
+
+    except Exception as e:
+        logger.error(f"Error creating tenant: {str(e)}")
+        return web.json_response({
+            "success": False,
+            "error": str(e)
+        })
+
+@routes.get('/api/tenants')
+async def api_list_tenants(request: Request) -> Response:
+    """List tenants and their provisioning status"""
+    error = admin_key_error(request)
+    if error is not None:
+        return error
+    return web.json_response({"success": True, "tenants": await request.app["tenants"].list_tenants()})
+
+@routes.get('/api/tenants/{tenant_id}')
+async def api_tenant_info(request: Request) -> Response:
+    """Get a tenant's wallet, DID and ledger ids"""
+    error = admin_key_error(request)
+    if error is not None:
+        return error
+    tenant = await request.app["state_store"].get_tenant(request.match_info['tenant_id'])
+    if not tenant:
+        return web.json_response({"success": False, "error": "Tenant not found"})
+    return web.json_response({"success": True, "tenant": tenant})
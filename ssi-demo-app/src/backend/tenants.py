@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+"""
+Multitenancy for SSI Demo Application
+This module serves several issuing organisations from one ACA-Py instance
+started with ``--multitenant``. Each tenant owns a managed subwallet with its
+own public DID, schema and credential definition. Admin calls made for a
+tenant carry a bearer token from ``/multitenancy/wallet/{id}/token``; tokens
+are cached until shortly before they expire, so a request costs one admin
+round trip rather than two.
+"""
+
+import asyncio
+import base64
+import json
+import logging
+import secrets
+import time
+import urllib.parse
+import uuid
+from datetime import datetime
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+from .ssi_agent import SSIAgent
+
+logger = logging.getLogger(__name__)
+
+# Tokens are refreshed this many seconds before they expire
+TOKEN_REFRESH_MARGIN = 30.0
+
+def token_lifetime(token: str) -> Optional[float]:
+    """Seconds until a JWT's ``exp`` claim, or None when it has none"""
+    try:
+        payload = token.split(".")[1]
+        claims = json.loads(base64.urlsafe_b64decode(payload + "=" * (-len(payload) % 4)))
+        return float(claims["exp"]) - time.time()
+    except (IndexError, KeyError, TypeError, ValueError):
+        return None
+
+class TokenCache:
+    """Bearer tokens per wallet id, refreshed by a single in-flight fetch"""
+
+    def __init__(self, ttl: float = 3600.0):
+        self.ttl = ttl
+        self._tokens: Dict[str, Tuple[float, str]] = {}
+        self._inflight: Dict[str, asyncio.Future] = {}
+
+    def put(self, wallet_id: str, token: str):
+        """Cache a token until its ``exp`` claim or the TTL, whichever is sooner"""
+        lifetime = token_lifetime(token)
+        lifetime = self.ttl if lifetime is None else min(lifetime, self.ttl)
+        expires = asyncio.get_running_loop().time() + lifetime - TOKEN_REFRESH_MARGIN
+        self._tokens[wallet_id] = (expires, token)
+
+    def invalidate(self, wallet_id: str):
+        self._tokens.pop(wallet_id, None)
+
+    async def get(self, wallet_id: str, fetch: Callable[[], Awaitable[str]]) -> str:
+        """Cached token for a wallet, fetching a new one when it is missing or expiring"""
+        cached = self._tokens.get(wallet_id)
+        if cached is not None:
+            if cached[0] > asyncio.get_running_loop().time():
+                return cached[1]
+            del self._tokens[wallet_id]
+
+        future = self._inflight.get(wallet_id)
+        if future is None:
+            future = asyncio.ensure_future(fetch())
+            self._inflight[wallet_id] = future
+            future.add_done_callback(lambda done: self._finish(wallet_id, done))
+
+        # Shield so one cancelled caller does not abort the fetch for the others
+        return await asyncio.shield(future)
+
+    def _finish(self, wallet_id: str, future: asyncio.Future):
+        self._inflight.pop(wallet_id, None)
+        if not future.cancelled() and future.exception() is None:
+            self.put(wallet_id, future.result())
+
+class TenantAgent(SSIAgent):
+    """``SSIAgent`` acting on a tenant subwallet over the base agent's connections"""
+
+    def __init__(self, base: SSIAgent, tenant: dict, tokens: TokenCache):
+        super().__init__(
+            base.admin_url,
+            timeout=base.timeout.total,
+            path_timeouts={prefix: timeout.total for prefix, timeout in base.path_timeouts},
+            get_cache_ttl=base.get_cache_ttl
+        )
+        self.base = base
+        self.session = base.session
+        self.tokens = tokens
+        self.tenant_id = tenant["tenant_id"]
+        self.wallet_id = tenant["wallet_id"]
+        self.schema_id = tenant.get("schema_id")
+        self.cred_def_id = tenant.get("cred_def_id")
+
+    async def start_session(self):
+        """Tenants share the base agent's session"""
+
+    async def close_session(self):
+        """The base agent owns the session"""
+
+    async def _fetch_token(self) -> str:
+        result = await self.base.admin_request("POST", f"/multitenancy/wallet/{self.wallet_id}/token", {})
+        if "token" not in result:
+            raise RuntimeError(f"Could not get a token for wallet {self.wallet_id}: {result.get('error', 'no token')}")
+        return result["token"]
+
+    async def _send_admin_request(self, method: str, path: str, data: dict = None, headers: dict = None) -> dict:
+        """Send a request as the tenant, retrying once with a fresh token on 401"""
+        for attempt in range(2):
+            try:
+                token = await self.tokens.get(self.wallet_id, self._fetch_token)
+            except RuntimeError as e:
+                logger.error(str(e))
+                return {"error": str(e)}
+
+            result = await super()._send_admin_request(
+                method, path, data, {**(headers or {}), "Authorization": f"Bearer {token}"}
+            )
+            if attempt == 0 and str(result.get("error", "")).startswith("Status 401"):
+                # Revoked or expired early (e.g. the JWT secret rotated)
+                self.tokens.invalidate(self.wallet_id)
+                continue
+            return result
+
+class TenantRegistry:
+    """Tenant records kept in the state store, with their cached ``TenantAgent``"""
+
+    def __init__(self, store, base: SSIAgent, token_ttl: float = 3600.0, wallet_type: str = "askar"):
+        """
+        Args:
+            store: State store holding tenant records
+            base: Agent for the base wallet (``--multitenant-admin``)
+            token_ttl: Seconds a tenant token is reused when it carries no expiry
+            wallet_type: Wallet type of new subwallets
+        """
+        self.store = store
+        self.base = base
+        self.wallet_type = wallet_type
+        self.tokens = TokenCache(token_ttl)
+        self._agents: Dict[str, TenantAgent] = {}
+
+    def _agent(self, tenant: dict) -> TenantAgent:
+        agent = self._agents.get(tenant["tenant_id"])
+        if agent is None:
+            agent = TenantAgent(self.base, tenant, self.tokens)
+            # Only provisioned tenants are cached; others may still gain ledger ids
+            if tenant.get("status") == "ready":
+                self._agents[tenant["tenant_id"]] = agent
+        return agent
+
+    async def get_agent(self, tenant_id: str) -> Optional[TenantAgent]:
+        """Agent for a provisioned tenant, or None"""
+        agent = self._agents.get(tenant_id)
+        if agent is not None:
+            return agent
+        tenant = await self.store.get_tenant(tenant_id)
+        if tenant is None or tenant.get("status") != "ready":
+            return None
+        return self._agent(tenant)
+
+    async def agent_for_wallet(self, wallet_id: str) -> Optional[TenantAgent]:
+        """Agent owning a subwallet, used to route webhook events"""
+        for agent in self._agents.values():
+            if agent.wallet_id == wallet_id:
+                return agent
+        tenant = await self.store.find_tenant_by_wallet(wallet_id)
+        return self._agent(tenant) if tenant else None
+
+    async def list_tenants(self) -> List[dict]:
+        return await self.store.list_tenants()
+
+    async def create_tenant(self, tenant_id: str = None, name: str = None, label: str = None) -> dict:
+        """Create a subwallet for a new tenant and provision it
+
+        Calling again for a tenant whose provisioning failed resumes it.
+        """
+        tenant_id = tenant_id or uuid.uuid4().hex[:12]
+        tenant = await self.store.get_tenant(tenant_id)
+        if tenant is None:
+            label = label or name or tenant_id
+            result = await self.base.admin_request("POST", "/multitenancy/wallet", {
+                "wallet_name": f"ssi-demo-{tenant_id}",
+                "wallet_key": secrets.token_urlsafe(32),
+                "wallet_type": self.wallet_type,
+                "key_management_mode": "managed",
+                # Deliver subwallet events to this application's webhook URL
+                "wallet_dispatch_type": "base",
+                "label": label
+            })
+            if "wallet_id" not in result:
+                raise RuntimeError(f"Failed to create subwallet: {result.get('error', 'Unknown error')}")
+            if result.get("token"):
+                self.tokens.put(result["wallet_id"], result["token"])
+
+            tenant = {
+                "tenant_id": tenant_id,
+                "name": name or tenant_id,
+                "label": label,
+                "wallet_id": result["wallet_id"],
+                "did": None,
+                "schema_id": None,
+                "cred_def_id": None,
+                "status": "provisioning",
+                "created_at": datetime.now().isoformat()
+            }
+            await self.store.put_tenant(tenant_id, tenant)
+            logger.info(f"Created subwallet {tenant['wallet_id']} for tenant {tenant_id}")
+
+        if tenant.get("status") != "ready":
+            await self.provision(tenant)
+        return tenant
+
+    async def provision(self, tenant: dict):
+        """Give a tenant a public DID, schema and credential definition
+
+        The base wallet's DID must be allowed to write NYMs (an endorser or
+        steward), since it registers the tenant's DID on the ledger.
+        """
+        agent = TenantAgent(self.base, tenant, self.tokens)
+        try:
+            if not tenant.get("did"):
+                did_result = await agent.admin_request("POST", "/wallet/did/create", {
+                    "method": "sov",
+                    "options": {"key_type": "ed25519"}
+                })
+                if "result" not in did_result:
+                    raise RuntimeError(f"Failed to create DID: {did_result.get('error', 'Unknown error')}")
+                did, verkey = did_result["result"]["did"], did_result["result"]["verkey"]
+
+                query = urllib.parse.urlencode({"did": did, "verkey": verkey, "alias": tenant["name"]})
+                nym_result = await self.base.admin_request("POST", f"/ledger/register-nym?{query}")
+                if "error" in nym_result:
+                    raise RuntimeError(f"Failed to register DID on the ledger: {nym_result['error']}")
+
+                public_result = await agent.admin_request("POST", f"/wallet/did/public?did={did}")
+                if "error" in public_result:
+                    raise RuntimeError(f"Failed to set public DID: {public_result['error']}")
+
+                tenant["did"] = did
+                await self.store.put_tenant(tenant["tenant_id"], tenant)
+
+            if not await agent.setup_schema_and_cred_def():
+                raise RuntimeError("Failed to set up schema and credential definition")
+
+            tenant.update(schema_id=agent.schema_id, cred_def_id=agent.cred_def_id, status="ready")
+            tenant.pop("error", None)
+            logger.info(f"✅ Tenant {tenant['tenant_id']} ready with credential definition {agent.cred_def_id}")
+        except RuntimeError as e:
+            tenant.update(status="error", error=str(e))
+            logger.error(f"Provisioning tenant {tenant['tenant_id']} failed: {str(e)}")
+        await self.store.put_tenant(tenant["tenant_id"], tenant)
+
+def get_agent(request) -> SSIAgent:
+    """Agent serving a request: the tenant's under ``/api/tenants/{tenant_id}/``, otherwise the base agent"""
+    return request.get("tenant_agent") or request.app["ssi_agent"]
+
+def request_tenant_id(request) -> Optional[str]:
+    """Tenant a request is namespaced under, or None for the base ``/api/`` routes"""
+    agent = request.get("tenant_agent")
+    return agent.tenant_id if agent is not None else None
+
+async def agent_for_webhook(app, wallet_id: Optional[str]) -> Optional[SSIAgent]:
+    """Agent owning a webhook event; base wallet events carry no wallet id"""
+    tenants = app.get("tenants")
+    if wallet_id and tenants is not None:
+        return await tenants.agent_for_wallet(wallet_id)
+    return app.get("ssi_agent")
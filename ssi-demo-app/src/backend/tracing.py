@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+"""
+Tracing for SSI Demo Application
+This module records spans for each incoming request and, as its children, for
+admin API calls, QR renders and state store operations, so a slow flow can be
+broken down by where the time went. The current span lives in a context
+variable, trace context is exchanged with W3C ``traceparent`` headers, and
+finished spans go to a pluggable exporter (console or JSON-lines file).
+"""
+
+import asyncio
+import json
+import logging
+import random
+import re
+import secrets
+import time
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Optional
+from aiohttp import web
+from aiohttp.web import Request
+
+logger = logging.getLogger(__name__)
+
+TRACEPARENT_PATTERN = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$")
+
+# Span attributes taken from route parameters and admin request bodies/results
+ID_ATTRIBUTES = ["connection_id", "credential_exchange_id", "presentation_exchange_id", "campaign_id", "tenant_id"]
+
+_current_span: ContextVar = ContextVar("ssi_current_span", default=None)
+
+class Span:
+    """A timed operation within a trace"""
+
+    __slots__ = ("name", "trace_id", "span_id", "parent_id", "start", "duration", "status",
+                 "attributes", "_started", "_token")
+
+    recording = True
+
+    def __init__(self, name: str, trace_id: str, parent_id: Optional[str], attributes: dict):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent_id
+        self.start = time.time()
+        self.duration = None
+        self.status = None
+        self.attributes = {key: value for key, value in attributes.items() if value is not None}
+        self._started = time.perf_counter()
+        self._token = None
+
+    def set(self, **attributes):
+        """Add attributes, skipping None values"""
+        self.attributes.update((key, value) for key, value in attributes.items() if value is not None)
+
+    def traceparent(self) -> str:
+        return f"00-{self.trace_id}-{self.span_id}-01"
+
+    def __enter__(self):
+        self._token = _current_span.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.duration = time.perf_counter() - self._started
+        if self.status is None:
+            if exc_type is None:
+                self.status = "ok"
+            elif issubclass(exc_type, asyncio.CancelledError):
+                self.status = "cancelled"
+            else:
+                self.status = "error"
+                self.attributes["error"] = f"{exc_type.__name__}: {exc}"
+        _current_span.reset(self._token)
+        if tracer.exporter is not None:
+            tracer.exporter.export(self.to_dict())
+        return False
+
+    def to_dict(self) -> dict:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start": datetime.fromtimestamp(self.start).isoformat(),
+            "duration_ms": round(self.duration * 1000, 3) if self.duration is not None else None,
+            "status": self.status,
+            "attributes": self.attributes
+        }
+
+class NonRecordingSpan:
+    """Stands in for a span that was not sampled, so its children are not either"""
+
+    __slots__ = ("_token",)
+
+    recording = False
+
+    def set(self, **attributes):
+        pass
+
+    def traceparent(self) -> Optional[str]:
+        return None
+
+    def __enter__(self):
+        self._token = _current_span.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        _current_span.reset(self._token)
+        return False
+
+class _DisabledSpan(NonRecordingSpan):
+    """Shared no-op returned while tracing is off; touches no context at all"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+DISABLED_SPAN = _DisabledSpan()
+
+class ConsoleExporter:
+    """Writes each finished span as a JSON log line"""
+
+    def export(self, span: dict):
+        logger.info(json.dumps(span))
+
+    def close(self):
+        pass
+
+class FileExporter:
+    """Appends each finished span to a JSON-lines file"""
+
+    def __init__(self, path: str):
+        self.path = path
+        # Line buffered so a crash loses at most the span being written
+        self._file = open(path, "a", buffering=1)
+
+    def export(self, span: dict):
+        self._file.write(json.dumps(span) + "\n")
+
+    def close(self):
+        self._file.close()
+
+def create_exporter(kind: str = "none", path: str = "traces.jsonl"):
+    """Build the configured span exporter (None disables tracing)"""
+    if kind == "none":
+        return None
+    if kind == "console":
+        return ConsoleExporter()
+    if kind == "file":
+        return FileExporter(path)
+    raise ValueError(f"Unknown trace exporter: {kind}")
+
+class Tracer:
+    """Starts spans and hands finished ones to the exporter"""
+
+    def __init__(self):
+        self.exporter = None
+        self.sample_rate = 1.0
+
+    def configure(self, exporter, sample_rate: float = 1.0):
+        self.exporter = exporter
+        self.sample_rate = sample_rate
+
+    def close(self):
+        if self.exporter is not None:
+            self.exporter.close()
+            self.exporter = None
+
+    def span(self, name: str, traceparent: str = None, **attributes):
+        """Child of the current span, or a new (sampled) root
+
+        ``traceparent`` continues a trace started elsewhere when there is no
+        current span.
+        """
+        if self.exporter is None:
+            return DISABLED_SPAN
+        parent = _current_span.get()
+        if parent is not None:
+            if not parent.recording:
+                return NonRecordingSpan()
+            return Span(name, parent.trace_id, parent.span_id, attributes)
+
+        match = TRACEPARENT_PATTERN.match(traceparent or "")
+        if match:
+            trace_id, parent_id, flags = match.groups()
+            if not int(flags, 16) & 1:
+                return NonRecordingSpan()
+            return Span(name, trace_id, parent_id, attributes)
+        if self.sample_rate < 1.0 and random.random() >= self.sample_rate:
+            return NonRecordingSpan()
+        return Span(name, secrets.token_hex(16), None, attributes)
+
+tracer = Tracer()
+
+def span(name: str, **attributes):
+    """Open a span under the current one: ``with span("qr.render", format="png"):``"""
+    return tracer.span(name, **attributes)
+
+def current_span():
+    return _current_span.get() or DISABLED_SPAN
+
+def trace_headers() -> Optional[dict]:
+    """``traceparent`` header propagating the current span, or None"""
+    value = current_span().traceparent()
+    return {"traceparent": value} if value else None
+
+def id_attributes(*sources) -> dict:
+    """Connection/exchange ids found in dicts such as route parameters or admin results"""
+    attributes = {}
+    for source in sources:
+        if isinstance(source, dict):
+            for key in ID_ATTRIBUTES:
+                if source.get(key) is not None and key not in attributes:
+                    attributes[key] = source[key]
+    return attributes
+
+@web.middleware
+async def tracing_middleware(request: Request, handler):
+    """Open a root span per request, continuing the caller's trace if it sent one"""
+    resource = request.match_info.route.resource
+    route = resource.canonical if resource is not None else "unmatched"
+    with tracer.span(f"{request.method} {route}", traceparent=request.headers.get("traceparent"),
+                     **{"http.method": request.method, "http.route": route, "http.target": request.path_qs},
+                     **id_attributes(dict(request.match_info))) as request_span:
+        try:
+            response = await handler(request)
+        except web.HTTPException as e:
+            request_span.set(**{"http.status_code": e.status})
+            request_span.status = "error" if e.status >= 500 else "ok"
+            raise
+        request_span.set(**{"http.status_code": response.status})
+        if response.status >= 500:
+            request_span.status = "error"
+        return response
+
+class TracedStateStore:
+    """Wraps a state store so every operation runs in a ``store.<method>`` span"""
+
+    def __init__(self, store):
+        self.store = store
+
+    def __getattr__(self, name: str):
+        attr = getattr(self.store, name)
+        if not asyncio.iscoroutinefunction(attr):
+            return attr
+
+        async def traced(*args, **kwargs):
+            attributes = id_attributes(kwargs)
+            if args and isinstance(args[0], str) and name.endswith("_connection"):
+                attributes["connection_id"] = args[0]
+            elif args and isinstance(args[0], str) and "campaign" in name:
+                attributes["campaign_id"] = args[0]
+            with tracer.span(f"store.{name}", **attributes):
+                return await attr(*args, **kwargs)
+
+        return traced
@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+Webhook Receiver for SSI Demo Application
+This module receives ACA-Py webhook events (``--webhook-url``) and keeps the
+connection state store up to date, so status routes do not need to
+query the admin API on every browser poll.
+"""
+
+import hmac
+import logging
+from datetime import datetime
+from aiohttp import web
+from aiohttp.web import Request, Response, RouteTableDef
+
+from .api_routes import (
+    advance_issuer_flow, advance_verifier_flow,
+    connection_event, credential_event, proof_event, index_presentation_exchange
+)
+from .campaign_routes import record_campaign_progress
+from .events import event_bus
+from .tenants import agent_for_webhook
+
+logger = logging.getLogger(__name__)
+routes = RouteTableDef()
+
+# ACA-Py connection states in protocol order ("active" and "completed" are the same state)
+CONNECTION_STATE_RANKS = {
+    "start": 0, "init": 0, "invitation": 1, "request": 2, "response": 3,
+    "active": 4, "completed": 4, "error": 5, "abandoned": 5
+}
+
+def is_connection_regression(current: str, state: str) -> bool:
+    """Whether ``state`` is behind the stored ``current`` state, i.e. a late delivery"""
+    if current not in CONNECTION_STATE_RANKS or state not in CONNECTION_STATE_RANKS:
+        return False
+    return CONNECTION_STATE_RANKS[state] < CONNECTION_STATE_RANKS[current]
+
+async def apply_connection_record(app: web.Application, record: dict, agent, from_webhook: bool = False):
+    """Record a connection state change and advance the matching flow
+
+    Only connections this app created are tracked, and a state behind the
+    stored one (ACA-Py does not guarantee webhook order) is dropped rather
+    than rolling the flow back. Only webhook deliveries stamp
+    ``webhook_updated_at``, which lets status routes answer from the store
+    alone; records fetched from the admin API (by the reconciler) do not.
+    """
+    connection_id = record.get("connection_id")
+    state = record.get("state")
+    if not connection_id or not state:
+        return
+
+    store = app["state_store"]
+    fields = {"status": state, "rfc23_state": record.get("rfc23_state", "")}
+    if from_webhook:
+        fields["webhook_updated_at"] = datetime.now().isoformat()
+    connection_info = await store.update_connection(
+        connection_id, fields, create=False,
+        only_if=lambda current: not is_connection_regression(current.status, state)
+    )
+    if connection_info is None:
+        logger.debug("Ignoring connection %s, which this app did not create", connection_id)
+        return
+    if connection_info.status != state:
+        logger.debug("Ignoring late connection %s state %s; already %s", connection_id, state, connection_info.status)
+        return
+
+    logger.info("%s: connection %s -> %s", "Webhook" if from_webhook else "Reconciled", connection_id, state)
+    event_bus.publish(connection_id, "connection", connection_event(state, connection_info.rfc23_state))
+
+    # Sending offers needs the bootstrapped cred def; until then the status routes
+    # and the reconciler pick the flow up once the agent is ready
+    if agent and state == "active" and app["readiness"].ready:
+        await advance_issuer_flow(store, agent, connection_id)
+        await advance_verifier_flow(store, agent, connection_id)
+
+async def handle_connections_event(app: web.Application, payload: dict, agent):
+    """Record a connections webhook"""
+    await apply_connection_record(app, payload, agent, from_webhook=True)
+
+async def handle_issue_credential_event(app: web.Application, payload: dict, agent):
+    """Record a credential exchange state change"""
+    connection_id = payload.get("connection_id")
+    if not connection_id:
+        return
+
+    connection_info = await app["state_store"].update_connection(connection_id, {
+        "credential_exchange_id": payload.get("credential_exchange_id"),
+        "credential_state": payload.get("state")
+    }, create=False)
+    if connection_info is None:
+        return
+
+    logger.info("Webhook: credential exchange %s -> %s", payload.get("credential_exchange_id"), payload.get("state"))
+    event_bus.publish(connection_id, "credential", credential_event(payload.get("state"), payload.get("credential_exchange_id")))
+
+async def confirmed_proof_record(agent, payload: dict) -> dict:
+    """The payload, or for a claimed verification ACA-Py's own copy of the record
+
+    Webhooks are not proof of anything: a verified state and its revealed
+    attributes are only stored once the admin API confirms them for the same
+    connection. Anything else is reduced to an unverified state change.
+    """
+    if payload.get("state") != "verified" or agent is None:
+        return payload
+    pres_ex_id = payload.get("presentation_exchange_id")
+    record = await agent.admin_request("GET", f"/present-proof/records/{pres_ex_id}") if pres_ex_id else {}
+    if record.get("state") == "verified" and record.get("connection_id") == payload.get("connection_id"):
+        return record
+    logger.warning("Webhook claims presentation exchange %s is verified; ACA-Py does not confirm it", pres_ex_id)
+    return {
+        "connection_id": payload.get("connection_id"),
+        "presentation_exchange_id": pres_ex_id,
+        "state": record.get("state") or "presentation_received"
+    }
+
+async def apply_proof_record(app: web.Application, record: dict):
+    """Record a presentation exchange state change ACA-Py has vouched for"""
+    connection_id = record.get("connection_id")
+    store = app["state_store"]
+    connection_info = await index_presentation_exchange(store, connection_id, record.get("presentation_exchange_id"), record)
+    await record_campaign_progress(store, record.get("presentation_exchange_id"), record.get("state"))
+    attributes = connection_info.proof_attributes if connection_info else None
+
+    logger.info("Presentation exchange %s -> %s", record.get("presentation_exchange_id"), record.get("state"))
+    event_bus.publish(connection_id, "proof", proof_event(record.get("state"), attributes))
+
+async def handle_present_proof_event(app: web.Application, payload: dict, agent):
+    """Record a present_proof webhook once ACA-Py confirms any claimed verification"""
+    connection_id = payload.get("connection_id")
+    if not connection_id or await app["state_store"].get_connection(connection_id) is None:
+        return
+
+    await apply_proof_record(app, await confirmed_proof_record(agent, payload))
+
+async def detect_webhooks(app: web.Application):
+    """Enable pushed updates if ACA-Py reports a webhook URL (``SSI_WEBHOOKS=auto``)"""
+    result = await app["ssi_agent"].admin_request("GET", "/status/config")
+    webhook_urls = result.get("config", {}).get("admin.webhook_urls")
+    if webhook_urls:
+        app["webhook_state"]["enabled"] = True
+        logger.info("ACA-Py sends webhooks to %s", ", ".join(webhook_urls))
+    elif "error" not in result:
+        logger.warning("⚠️ ACA-Py has no --webhook-url; pages will poll for status")
+
+# Handlers receive the agent owning the event's wallet (base or tenant)
+TOPIC_HANDLERS = {
+    "connections": handle_connections_event,
+    "issue_credential": handle_issue_credential_event,
+    "present_proof": handle_present_proof_event,
+}
+
+@routes.post('/webhooks/topic/{topic}/')
+@routes.post('/webhooks/topic/{topic}')
+async def webhook_receiver(request: Request) -> Response:
+    """Receive an ACA-Py webhook event"""
+    topic = request.match_info['topic']
+
+    # ACA-Py sends the part after '#' in --webhook-url as x-api-key
+    api_key = request.app["settings"].webhook_api_key
+    if api_key and not hmac.compare_digest(request.headers.get("x-api-key", ""), api_key):
+        return web.json_response({"success": False, "error": "Invalid webhook API key"}, status=401)
+
+    try:
+        payload = await request.json()
+    except Exception as e:
+        logger.error(f"Invalid webhook payload for topic {topic}: {str(e)}")
+        return web.json_response({"success": False, "error": "Invalid JSON"}, status=400)
+
+    # Lets event streams opened from now on rely on pushed updates (SSI_WEBHOOKS=auto)
+    request.app["webhook_state"]["enabled"] = True
+    
+    handler = TOPIC_HANDLERS.get(topic)
+    if handler is None:
+        return web.json_response({"success": True, "ignored": topic})
+
+    try:
+        # Subwallet events are dispatched to the base webhook URL with the wallet id in a header
+        agent = await agent_for_webhook(request.app, request.headers.get("x-wallet-id"))
+        await handler(request.app, payload, agent)
+    except Exception as e:
+        # Always acknowledge so ACA-Py does not keep retrying the event
+        logger.error(f"Error handling webhook topic {topic}: {str(e)}")
+
+    return web.json_response({"success": True})
@@ -0,0 +1,292 @@
+let issuerConnectionId = null;
+let verifierConnectionId = null;
+let credDefId = null;
+
+function showStatus(elementId, message, type = 'warning') {
+    const element = document.getElementById(elementId);
+    element.innerHTML = `<div class="status ${type}">${message}</div>`;
+}
+
+function updateStep(stepId, completed = false, current = false) {
+    const step = document.getElementById(stepId);
+    step.className = 'step';
+    if (completed) step.className += ' completed';
+    if (current) step.className += ' current';
+}
+
+function validateForm() {
+    const username = document.getElementById('username').value.trim();
+    const email = document.getElementById('email').value.trim();
+    const occupation = document.getElementById('occupation').value.trim();
+    const citizenship = document.getElementById('citizenship').value.trim();
+
+    if (!username || !email || !occupation || !citizenship) {
+        showStatus('issuer-status', '❌ Please fill in all fields', 'error');
+        return null;
+    }
+
+    const emailRegex = /^[^\s@]+@[^\s@]+\.[^\s@]+$/;
+    if (!emailRegex.test(email)) {
+        showStatus('issuer-status', '❌ Please enter a valid email', 'error');
+        return null;
+    }
+
+    return { username, email, occupation, citizenship };
+}
+
+async function startIssuerFlow() {
+    const formData = validateForm();
+    if (!formData) return;
+
+    document.getElementById('issuer-steps').style.display = 'block';
+    updateStep('issuer-step-1', false, true);
+
+    try {
+        showStatus('issuer-status', '🔄 Creating invitation...', 'warning');
+
+        const response = await fetch('/api/issuer/create-invitation', {
+            method: 'POST',
+            headers: {'Content-Type': 'application/json'},
+            body: JSON.stringify(formData)
+        });
+
+        const data = await response.json();
+
+        if (data.success) {
+            issuerConnectionId = data.connection_id;
+            credDefId = data.cred_def_id;
+
+            document.getElementById('issuer-qr').src = data.qr_url;
+            document.getElementById('issuer-qr-container').style.display = 'block';
+
+            updateStep('issuer-step-1', true);
+            updateStep('issuer-step-2', false, true);
+
+            showStatus('issuer-status', '✅ QR Code generated! Scan with your wallet.', 'success');
+
+            watchIssuerEvents();
+        } else {
+            showStatus('issuer-status', `❌ Error: ${data.error}`, 'error');
+        }
+    } catch (error) {
+        showStatus('issuer-status', `❌ Error: ${error.message}`, 'error');
+    }
+}
+
+async function startVerifierFlow() {
+    if (!credDefId) {
+        showStatus('verifier-status', '❌ Please complete issuer flow first', 'error');
+        return;
+    }
+
+    document.getElementById('verifier-steps').style.display = 'block';
+    updateStep('verifier-step-1', false, true);
+
+    try {
+        showStatus('verifier-status', '🔄 Creating invitation...', 'warning');
+
+        const response = await fetch('/api/verifier/create-invitation', {
+            method: 'POST',
+            headers: {'Content-Type': 'application/json'},
+            body: JSON.stringify({})
+        });
+
+        const data = await response.json();
+
+        if (data.success) {
+            verifierConnectionId = data.connection_id;
+
+            document.getElementById('verifier-qr').src = data.qr_url;
+            document.getElementById('verifier-qr-container').style.display = 'block';
+
+            updateStep('verifier-step-1', true);
+            updateStep('verifier-step-2', false, true);
+
+            showStatus('verifier-status', '✅ QR Code generated! Scan with your wallet.', 'success');
+
+            watchVerifierEvents();
+        } else {
+            showStatus('verifier-status', `❌ Error: ${data.error}`, 'error');
+        }
+    } catch (error) {
+        showStatus('verifier-status', `❌ Error: ${error.message}`, 'error');
+    }
+}
+
+function showProofResults(attributes) {
+    document.getElementById('proof-results').style.display = 'block';
+    document.getElementById('proof-data').innerHTML = `
+        <div class="status success">
+            <h4>✅ Verified Attributes:</h4>
+            <div class="attribute">
+                <span class="attribute-name">👤 Username:</span>
+                <span class="attribute-value">${attributes.username || 'N/A'}</span>
+            </div>
+            <div class="attribute">
+                <span class="attribute-name">📧 Email:</span>
+                <span class="attribute-value">${attributes.email || 'N/A'}</span>
+            </div>
+            <div class="attribute">
+                <span class="attribute-name">💼 Occupation:</span>
+                <span class="attribute-value">${attributes.occupation || 'N/A'}</span>
+            </div>
+            <div class="attribute">
+                <span class="attribute-name">🌍 Citizenship:</span>
+                <span class="attribute-value">${attributes.citizenship || 'N/A'}</span>
+            </div>
+        </div>
+    `;
+}
+
+// Subscribe to pushed state changes; fall back to polling when the
+// browser or server cannot push (no EventSource, no webhooks, stream error)
+function openEventStream(connectionId, handlers, fallback) {
+    if (!window.EventSource) {
+        fallback();
+        return;
+    }
+
+    const source = new EventSource(`/api/events/${connectionId}`);
+    let fellBack = false;
+
+    const useFallback = () => {
+        if (fellBack) return;
+        fellBack = true;
+        source.close();
+        fallback();
+    };
+
+    source.addEventListener('ready', (event) => {
+        if (!JSON.parse(event.data).push) useFallback();
+    });
+
+    for (const [name, handler] of Object.entries(handlers)) {
+        source.addEventListener(name, (event) => {
+            if (handler(JSON.parse(event.data))) source.close();
+        });
+    }
+
+    source.onerror = useFallback;
+}
+
+function watchIssuerEvents() {
+    openEventStream(issuerConnectionId, {
+        connection: (data) => {
+            if (data.connected) {
+                updateStep('issuer-step-2', true);
+                updateStep('issuer-step-3', false, true);
+                showStatus('issuer-status', '🔄 Connected! Issuing credential...', 'warning');
+            } else {
+                showStatus('issuer-status', '⏳ Waiting for mobile wallet...', 'warning');
+            }
+        },
+        credential: (data) => {
+            if (!data.issued) return false;
+            updateStep('issuer-step-2', true);
+            updateStep('issuer-step-3', true);
+            updateStep('issuer-step-4', true);
+            showStatus('issuer-status', '🎉 Credential issued successfully!', 'success');
+            return true;
+        }
+    }, pollIssuerConnection);
+}
+
+function watchVerifierEvents() {
+    openEventStream(verifierConnectionId, {
+        connection: (data) => {
+            if (data.connected) {
+                updateStep('verifier-step-2', true);
+                updateStep('verifier-step-3', false, true);
+                showStatus('verifier-status', '🔄 Connected! Sending proof request...', 'warning');
+            }
+        },
+        proof: (data) => {
+            if (data.verified) {
+                updateStep('verifier-step-2', true);
+                updateStep('verifier-step-3', true);
+                updateStep('verifier-step-4', true);
+                updateStep('verifier-step-5', true);
+                showStatus('verifier-status', '🎉 Proof verified successfully!', 'success');
+                showProofResults(data.attributes || {});
+                return true;
+            }
+            if (data.requested) {
+                updateStep('verifier-step-3', true);
+                updateStep('verifier-step-4', false, true);
+                showStatus('verifier-status', '⏳ Proof request sent. Waiting...', 'warning');
+            }
+            return false;
+        }
+    }, pollVerifierConnection);
+}
+
+async function pollIssuerConnection() {
+    try {
+        const response = await fetch(`/api/issuer/status/${issuerConnectionId}`);
+        const data = await response.json();
+
+        if (data.connected) {
+            updateStep('issuer-step-2', true);
+            updateStep('issuer-step-3', false, true);
+            showStatus('issuer-status', '🔄 Connected! Issuing credential...', 'warning');
+
+            setTimeout(async () => {
+                const credResponse = await fetch(`/api/issuer/credential-status/${issuerConnectionId}`);
+                const credData = await credResponse.json();
+
+                if (credData.issued) {
+                    updateStep('issuer-step-3', true);
+                    updateStep('issuer-step-4', true);
+                    showStatus('issuer-status', '🎉 Credential issued successfully!', 'success');
+                } else {
+                    setTimeout(pollIssuerConnection, 3000);
+                }
+            }, 3000);
+        } else {
+            showStatus('issuer-status', '⏳ Waiting for mobile wallet...', 'warning');
+            setTimeout(pollIssuerConnection, 3000);
+        }
+    } catch (error) {
+        console.error('Error polling issuer:', error);
+        setTimeout(pollIssuerConnection, 3000);
+    }
+}
+
+async function pollVerifierConnection() {
+    try {
+        const response = await fetch(`/api/verifier/status/${verifierConnectionId}`);
+        const data = await response.json();
+
+        if (data.connected) {
+            updateStep('verifier-step-2', true);
+            updateStep('verifier-step-3', false, true);
+            showStatus('verifier-status', '🔄 Connected! Sending proof request...', 'warning');
+
+            setTimeout(async () => {
+                const proofResponse = await fetch(`/api/verifier/proof-status/${verifierConnectionId}`);
+                const proofData = await proofResponse.json();
+
+                if (proofData.verified) {
+                    updateStep('verifier-step-3', true);
+                    updateStep('verifier-step-4', true);
+                    updateStep('verifier-step-5', true);
+                    showStatus('verifier-status', '🎉 Proof verified successfully!', 'success');
+
+                    showProofResults(proofData.attributes);
+                } else if (proofData.requested) {
+                    updateStep('verifier-step-3', true);
+                    updateStep('verifier-step-4', false, true);
+                    showStatus('verifier-status', '⏳ Proof request sent. Waiting...', 'warning');
+                    setTimeout(pollVerifierConnection, 3000);
+                } else {
+                    setTimeout(pollVerifierConnection, 3000);
+                }
+            }, 3000);
+        } else {
+            setTimeout(pollVerifierConnection, 3000);
+        }
+    } catch (error) {
+        console.error('Error polling verifier:', error);
+        setTimeout(pollVerifierConnection, 3000);
+    }
+}
@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+"""
+Shared fixtures for the SSI demo application tests.
+
+``async def`` tests run on a fresh event loop each, so the suite needs no
+asyncio plugin beyond pytest itself.
+"""
+
+import asyncio
+import inspect
+import os
+import sys
+
+import pytest
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, APP_DIR)
+
+from src.backend.state_store import MemoryStateStore, SQLiteStateStore
+
+@pytest.hookimpl(tryfirst=True)
+def pytest_pyfunc_call(pyfuncitem):
+    """Run coroutine test functions with ``asyncio.run``"""
+    if inspect.iscoroutinefunction(pyfuncitem.obj):
+        arguments = {name: pyfuncitem.funcargs[name] for name in pyfuncitem._fixtureinfo.argnames}
+        asyncio.run(pyfuncitem.obj(**arguments))
+        return True
+    return None
+
+@pytest.fixture(params=["memory", "sqlite"])
+def store(request, tmp_path):
+    """An opened state store, once per backend"""
+    if request.param == "sqlite":
+        store = SQLiteStateStore(str(tmp_path / "state.db"))
+    else:
+        store = MemoryStateStore()
+    # The SQLite store keeps its connection on its own thread, so it outlives this loop
+    asyncio.run(store.open())
+    yield store
+    asyncio.run(store.close())
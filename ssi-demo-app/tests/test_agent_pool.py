@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""AgentPool selection, ejection, list fan-out and store-backed affinity"""
+
+import asyncio
+from contextlib import asynccontextmanager
+
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from src.backend.agent_pool import AgentPool
+
+class FakeAgent:
+    """An ACA-Py admin API that only knows the records it created itself"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.connections = {}
+        self.exchanges = {}
+        self.failing = False
+        self.paths = []
+
+    @web.middleware
+    async def middleware(self, request, handler):
+        self.paths.append(request.path_qs)
+        if self.failing:
+            return web.Response(status=500, text="Internal Server Error")
+        return await handler(request)
+
+    async def create_invitation(self, request):
+        connection_id = f"{self.name}-c{len(self.connections) + 1}"
+        self.connections[connection_id] = {"connection_id": connection_id, "state": "invitation"}
+        return web.json_response({**self.connections[connection_id], "invitation": {"@id": connection_id}})
+
+    async def get_connection(self, request):
+        connection = self.connections.get(request.match_info["connection_id"])
+        if connection is None:
+            return web.Response(status=404, text="Record not found")
+        return web.json_response(connection)
+
+    async def list_connections(self, request):
+        return web.json_response({"results": list(self.connections.values())})
+
+    async def send_credential(self, request):
+        data = await request.json()
+        if data["connection_id"] not in self.connections:
+            return web.Response(status=404, text="Connection not found")
+        cred_ex_id = f"{self.name}-cx{len(self.exchanges) + 1}"
+        self.exchanges[cred_ex_id] = {"credential_exchange_id": cred_ex_id, "state": "offer_sent"}
+        return web.json_response(self.exchanges[cred_ex_id])
+
+    async def get_exchange(self, request):
+        exchange = self.exchanges.get(request.match_info["cred_ex_id"])
+        if exchange is None:
+            return web.Response(status=404, text="Record not found")
+        return web.json_response(exchange)
+
+    def app(self) -> web.Application:
+        app = web.Application(middlewares=[self.middleware])
+        app.router.add_post("/connections/create-invitation", self.create_invitation)
+        app.router.add_get("/connections", self.list_connections)
+        app.router.add_get("/connections/{connection_id}", self.get_connection)
+        app.router.add_post("/issue-credential/send", self.send_credential)
+        app.router.add_get("/issue-credential/records/{cred_ex_id}", self.get_exchange)
+        return app
+
+@asynccontextmanager
+async def fake_agents(*names: str):
+    agents = [FakeAgent(name) for name in names]
+    servers = [TestServer(agent.app()) for agent in agents]
+    for agent, server in zip(agents, servers):
+        await server.start_server()
+        agent.admin_url = str(server.make_url("")).rstrip("/")
+    try:
+        yield agents
+    finally:
+        for server in servers:
+            await server.close()
+
+@asynccontextmanager
+async def agent_pool(agents, store=None, **options):
+    options = {"health_interval": 0, "eject_failures": 2, "eject_latency": 0, "eject_duration": 30, **options}
+    pool = AgentPool([agent.admin_url for agent in agents], store=store, **options)
+    await pool.start_session()
+    try:
+        yield pool
+    finally:
+        await pool.close_session()
+
+async def test_concurrent_invitations_are_spread_over_the_agents(store):
+    async with fake_agents("a", "b") as agents, agent_pool(agents, store) as pool:
+        # Each request goes to the agent with the fewest outstanding requests
+        created = await asyncio.gather(*(pool.create_invitation() for _ in range(4)))
+        assert sorted(len(agent.connections) for agent in agents) == [2, 2]
+
+        # The owning agent is recorded on the connection's record
+        for result in created:
+            owner = next(agent for agent in agents if result["connection_id"] in agent.connections)
+            assert (await store.get_connection(result["connection_id"])).admin_url == owner.admin_url
+
+async def test_connection_calls_follow_the_owner_across_pools(store):
+    async with fake_agents("a", "b") as agents:
+        async with agent_pool(agents, store) as pool:
+            created = await asyncio.gather(*(pool.create_invitation() for _ in range(4)))
+            connection_ids = [result["connection_id"] for result in created]
+        assert all(agent.connections for agent in agents)
+
+        # A restarted process, or another worker sharing the store, has an empty cache
+        async with agent_pool(agents, store) as pool:
+            for connection_id in connection_ids * 2:
+                assert (await pool.admin_request("GET", f"/connections/{connection_id}"))["state"] == "invitation"
+
+            result = await pool.issue_credential(connection_ids[0], {"username": "alice"})
+            assert "error" not in result
+            await store.update_connection(connection_ids[0], {"credential_exchange_id": result["credential_exchange_id"]})
+
+        async with agent_pool(agents, store) as pool:
+            record = await pool.admin_request("GET", f"/issue-credential/records/{result['credential_exchange_id']}")
+            assert record["state"] == "offer_sent"
+
+async def test_list_calls_are_merged_from_every_agent():
+    async with fake_agents("a", "b", "c") as agents:
+        async with agent_pool(agents) as pool:
+            for _ in range(6):
+                await pool.create_invitation()
+
+            result = await pool.admin_request("GET", "/connections?state=invitation&limit=10&offset=0")
+            assert sorted(record["connection_id"] for record in result["results"]) == sorted(
+                connection_id for agent in agents for connection_id in agent.connections
+            )
+            assert all(agent.paths[-1] == "/connections?state=invitation&limit=10&offset=0" for agent in agents)
+
+        # A pool that only listed the connections still knows where each one lives
+        async with agent_pool(agents) as pool:
+            for record in (await pool.admin_request("GET", "/connections"))["results"]:
+                assert "error" not in await pool.admin_request("GET", f"/connections/{record['connection_id']}")
+
+            # A listing missing one agent's records is not passed off as complete
+            agents[1].failing = True
+            result = await pool.admin_request("GET", "/connections?state=invitation")
+            assert result["error"].startswith(agents[1].admin_url)
+
+async def test_failing_agents_are_ejected():
+    async with fake_agents("a", "b") as agents, agent_pool(agents) as pool:
+        agents[0].failing = True
+        # Two requests at a time keep both agents busy, so each round reaches the failing one
+        for _ in range(2):
+            await asyncio.gather(*(pool.admin_request("POST", "/connections/create-invitation", {}) for _ in range(2)))
+        assert len(agents[0].paths) == 2
+
+        health = {member["admin_url"]: member for member in pool.health()}
+        assert not health[agents[0].admin_url]["available"]
+        assert health[agents[0].admin_url]["ejected_for"] > 0
+        assert health[agents[1].admin_url]["available"]
+
+        served = len(agents[0].paths)
+        for _ in range(4):
+            assert "error" not in await pool.create_invitation()
+        assert len(agents[0].paths) == served
+
+async def test_client_errors_do_not_eject_an_agent():
+    async with fake_agents("a", "b") as agents, agent_pool(agents) as pool:
+        for _ in range(6):
+            assert "error" in await pool.admin_request("GET", "/connections/unknown")
+        assert all(member["available"] for member in pool.health())
+
+async def test_every_agent_ejected_fails_open():
+    async with fake_agents("a", "b") as agents, agent_pool(agents) as pool:
+        for agent in agents:
+            agent.failing = True
+        for _ in range(8):
+            await pool.admin_request("POST", "/connections/create-invitation", {})
+        assert not any(member["available"] for member in pool.health())
+
+        for agent in agents:
+            agent.failing = False
+        assert "error" not in await pool.create_invitation()
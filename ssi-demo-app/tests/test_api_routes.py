@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""Response shaping and store-first state resolution in the API routes"""
+
+from aiohttp.test_utils import make_mocked_request
+
+from src.backend.api_routes import (get_connection_state, get_credential_state, index_presentation_exchange,
+                                   lookup_proof_record, project_fields, proof_event)
+from src.backend.flows import FlowRecord
+
+PROOF_RECORD = {"presentation_exchange_id": "px1", "state": "verified", "presentation": {"large": "document"}}
+
+class RecordingAgent:
+    """Answers every admin request with ``result`` and remembers the paths"""
+
+    def __init__(self, result: dict):
+        self.result = result
+        self.paths = []
+
+    async def admin_request(self, method: str, path: str, data: dict = None) -> dict:
+        self.paths.append(path)
+        return self.result
+
+def project(query: str) -> dict:
+    request = make_mocked_request("GET", f"/api/verifier/proof-status/c1{query}")
+    return project_fields(request, proof_event("verified", {"username": "alice"}), {"proof_record": PROOF_RECORD})
+
+def test_project_fields_without_fields_returns_the_payload_unchanged():
+    assert project("") == {"verified": True, "requested": True, "state": "verified", "attributes": {"username": "alice"}}
+
+def test_project_fields_selects_named_fields():
+    assert project("?fields=verified,state") == {"verified": True, "state": "verified"}
+
+def test_project_fields_only_includes_optional_fields_by_name():
+    assert project("?fields=verified,proof_record") == {"verified": True, "proof_record": PROOF_RECORD}
+
+def test_project_fields_skips_unknown_names_and_whitespace():
+    assert project("?fields=%20state%20,nonexistent,") == {"state": "verified"}
+
+async def test_connection_state_prefers_webhook_state(store):
+    agent = RecordingAgent({"state": "active", "rfc23_state": "completed"})
+    await store.update_connection("c1", {"status": "request", "rfc23_state": "request-received",
+                                         "webhook_updated_at": "2026-01-01T00:00:00"})
+
+    assert await get_connection_state(store, agent, "c1") == ("request", "request-received", None)
+    assert agent.paths == []
+
+async def test_connection_state_asks_the_agent_without_webhooks(store):
+    agent = RecordingAgent({"state": "active", "rfc23_state": "completed"})
+    await store.update_connection("c1", {"status": "invitation"})
+
+    assert await get_connection_state(store, agent, "c1") == ("active", "completed", None)
+    assert agent.paths == ["/connections/c1"]
+
+async def test_credential_state_prefers_webhook_state():
+    agent = RecordingAgent({"state": "offer_sent"})
+    record = FlowRecord("c1", credential_exchange_id="cx1", credential_state="credential_acked")
+    assert await get_credential_state(agent, record) == ("credential_acked", None)
+    assert agent.paths == []
+
+async def test_credential_state_asks_the_agent_without_webhooks():
+    agent = RecordingAgent({"state": "offer_sent"})
+    assert await get_credential_state(agent, FlowRecord("c1", credential_exchange_id="cx1")) == ("offer_sent", None)
+    assert agent.paths == ["/issue-credential/records/cx1"]
+
+    state, error = await get_credential_state(RecordingAgent({"error": "Status 404"}), FlowRecord("c1", credential_exchange_id="cx1"))
+    assert state is None and "Status 404" in error
+
+async def test_verified_proof_records_are_served_from_the_store(store):
+    agent = RecordingAgent({"results": [{"connection_id": "c1", **PROOF_RECORD}]})
+    await store.update_connection("c1", {"status": "active"})
+
+    assert await lookup_proof_record(store, agent, "c1") == ({"connection_id": "c1", **PROOF_RECORD}, None)
+    assert agent.paths == ["/present-proof/records?connection_id=c1"]
+    assert (await store.find_connection_by_exchange(presentation_exchange_id="px1")).connection_id == "c1"
+
+    # Once verified, polls do not reach the agent again
+    assert (await lookup_proof_record(store, agent, "c1"))[0]["state"] == "verified"
+    assert agent.paths == ["/present-proof/records?connection_id=c1"]
+
+async def test_known_exchanges_are_fetched_by_id(store):
+    agent = RecordingAgent({"connection_id": "c1", "presentation_exchange_id": "px2", "state": "request_sent"})
+    await store.update_connection("c1", {"status": "active"})
+    await index_presentation_exchange(store, "c1", "px2")
+
+    record, error = await lookup_proof_record(store, agent, "c1")
+    assert record["state"] == "request_sent" and error is None
+    assert agent.paths == ["/present-proof/records/px2"]
+    assert (await store.get_connection("c1")).proof_state == "request_sent"
+
+async def test_connection_filtered_lookup_picks_the_latest_exchange(store):
+    agent = RecordingAgent({"results": [
+        {"connection_id": "c1", "presentation_exchange_id": "px1", "state": "abandoned", "updated_at": "2026-01-01"},
+        {"connection_id": "c1", "presentation_exchange_id": "px2", "state": "request_sent", "updated_at": "2026-01-02"},
+        {"connection_id": "c2", "presentation_exchange_id": "px3", "state": "verified", "updated_at": "2026-01-03"}
+    ]})
+    await store.update_connection("c1", {"status": "active"})
+
+    record, error = await lookup_proof_record(store, agent, "c1")
+    assert record["presentation_exchange_id"] == "px2" and error is None
+    assert (await store.get_connection("c1")).presentation_exchange_id == "px2"
+
+    assert await lookup_proof_record(store, RecordingAgent({"results": []}), "c1") == (None, None)
+    assert await lookup_proof_record(store, RecordingAgent({"error": "Status 500"}), "c9") == (None, "Status 500")
+
+async def test_a_new_exchange_supersedes_the_previous_proof(store):
+    await store.update_connection("c1", {"status": "active"})
+    await index_presentation_exchange(store, "c1", "px1", {"connection_id": "c1", **PROOF_RECORD})
+    assert (await store.get_connection("c1")).proof_record is not None
+
+    record = await index_presentation_exchange(store, "c1", "px2")
+    assert (record.presentation_exchange_id, record.proof_state, record.proof_record) == ("px2", None, None)
+    assert await store.find_connection_by_exchange(presentation_exchange_id="px1") is None
+    assert await index_presentation_exchange(store, "c1", None) is None
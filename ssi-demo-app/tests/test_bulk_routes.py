@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""Row parsing for bulk invitation uploads"""
+
+from src.backend.bulk_routes import MAX_CSV_RECORD_SIZE, read_rows
+
+class UploadRequest:
+    """Just enough of a request for ``read_rows``: a content type and a line stream"""
+
+    def __init__(self, content_type: str, body: str):
+        self.content_type = content_type
+        self.body = body
+
+    @property
+    def content(self):
+        async def lines():
+            for line in self.body.splitlines(keepends=True):
+                yield line.encode()
+        return lines()
+
+async def parse(content_type: str, body: str) -> list:
+    return [row async for row in read_rows(UploadRequest(content_type, body))]
+
+HEADER = "﻿username,email,occupation,citizenship\r\n"
+
+async def test_csv_rows_follow_the_header():
+    rows = await parse("text/csv", HEADER + "alice,a@example.com,Engineer,NL\r\n\r\nbob,b@example.com,Nurse,DE\r\n")
+    assert rows == [
+        (1, {"username": "alice", "email": "a@example.com", "occupation": "Engineer", "citizenship": "NL"}),
+        (2, {"username": "bob", "email": "b@example.com", "occupation": "Nurse", "citizenship": "DE"})
+    ]
+
+async def test_quoted_csv_fields_may_span_lines():
+    rows = await parse("text/csv", HEADER + 'alice,a@example.com,"Chief\r\nOfficer",NL\r\n'
+                                            'bob,"b""q""@example.com",Nurse,DE\r\n')
+    assert rows[0] == (1, {"username": "alice", "email": "a@example.com",
+                           "occupation": "Chief\r\nOfficer", "citizenship": "NL"})
+    assert rows[1][1]["email"] == 'b"q"@example.com'
+
+async def test_malformed_csv_rows_are_reported_per_row():
+    rows = await parse("text/csv", HEADER + "alice,a@example.com\r\n" + '"carol,c@example.com,Ops,FR\r\n')
+    assert rows[0] == (1, "Expected 4 columns, got 2")
+    assert rows[1][0] == 2 and rows[1][1].startswith("Invalid CSV")
+
+async def test_unterminated_quote_does_not_swallow_the_upload():
+    body = HEADER + '"dave' + ",x" * MAX_CSV_RECORD_SIZE + "\r\n" + "erin,e@example.com,Chef,BE\r\n"
+    rows = await parse("text/csv", body)
+    assert isinstance(rows[0][1], str)
+    assert rows[-1] == (2, {"username": "erin", "email": "e@example.com", "occupation": "Chef", "citizenship": "BE"})
+
+async def test_ndjson_rows():
+    rows = await parse("application/x-ndjson", '{"username": "alice"}\n\n[1, 2]\n{broken\n')
+    assert rows[0] == (1, {"username": "alice"})
+    assert rows[1] == (2, "Row must be a JSON object")
+    assert rows[2][0] == 3 and rows[2][1].startswith("Invalid JSON")
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""Proof campaign targeting and sending"""
+
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from src.backend import campaign_routes
+from src.backend.agent_pool import AgentPool
+from src.backend.campaign_routes import resolve_targets, run_campaign
+from src.backend.flows import FlowStage, FlowType
+
+def connections_app(connection_ids: list) -> web.Application:
+    """ACA-Py's paged ``GET /connections`` over a fixed set of active connections"""
+    async def list_connections(request):
+        offset = int(request.query.get("offset", 0))
+        limit = int(request.query.get("limit", 100))
+        page = connection_ids[offset:offset + limit]
+        return web.json_response({"results": [{"connection_id": cid, "state": "active"} for cid in page]})
+
+    app = web.Application()
+    app.router.add_get("/connections", list_connections)
+    return app
+
+class ProofAgent:
+    """Accepts every proof request"""
+
+    def __init__(self):
+        self.requested = []
+
+    async def request_proof(self, connection_id: str) -> dict:
+        self.requested.append(connection_id)
+        return {"presentation_exchange_id": f"px-{connection_id}", "state": "request_sent"}
+
+async def test_filters_resolve_every_page_of_every_pooled_agent(store, monkeypatch):
+    monkeypatch.setattr(campaign_routes, "CONNECTION_PAGE_SIZE", 3)
+    owned = {"a": [f"a{n}" for n in range(7)], "b": [f"b{n}" for n in range(2)]}
+    servers = [TestServer(connections_app(ids)) for ids in owned.values()]
+    for server in servers:
+        await server.start_server()
+    pool = AgentPool([str(server.make_url("")).rstrip("/") for server in servers], health_interval=0)
+    await pool.start_session()
+    try:
+        connection_ids, error = await resolve_targets(store, pool, {"filter": {}}, max_connections=100)
+        assert error is None
+        assert sorted(connection_ids) == sorted(owned["a"] + owned["b"])
+
+        # One past the limit is enough to reject the campaign
+        connection_ids, error = await resolve_targets(store, pool, {"filter": {}}, max_connections=4)
+        assert 4 < len(connection_ids) < 9
+    finally:
+        await pool.close_session()
+        for server in servers:
+            await server.close()
+
+async def test_campaign_connections_become_verifier_flows_of_the_tenant(store):
+    await store.update_connection("known", {"type": FlowType.ISSUER, "tenant_id": "acme", "status": "active",
+                                            "stage": FlowStage.CREDENTIAL_OFFERED})
+    agent = ProofAgent()
+    campaign = {"campaign_id": "k1", "tenant_id": "acme", "created_at": "2026-01-01T00:00:00", "status": "sending",
+                "total": 2, "connection_ids": ["known", "new"]}
+    await store.put_campaign("k1", campaign)
+
+    await run_campaign(store, agent, campaign, concurrency=2)
+    assert sorted(agent.requested) == ["known", "new"]
+
+    new = await store.get_connection("new")
+    assert (new.type, new.tenant_id, new.stage) == (FlowType.VERIFIER, "acme", FlowStage.PROOF_REQUESTED)
+    assert new.created_at is not None and new.presentation_exchange_id == "px-new"
+    # Flows the app already tracks keep what they were
+    known = await store.get_connection("known")
+    assert (known.type, known.stage) == (FlowType.ISSUER, FlowStage.PROOF_REQUESTED)
+    assert (await store.get_campaign("k1"))["status"] == "sent"
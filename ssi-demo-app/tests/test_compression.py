@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""Negotiated compression of API responses"""
+
+from aiohttp import web
+from aiohttp.test_utils import TestClient, TestServer
+
+from src.backend.compression import compression_middleware
+from src.backend.config import Settings
+
+LARGE = {"items": ["credential"] * 500}
+
+async def large(request):
+    return web.json_response(LARGE)
+
+async def tagged(request):
+    return web.json_response(LARGE, headers={"ETag": '"v1"'})
+
+async def small(request):
+    return web.json_response({"ok": True})
+
+async def image(request):
+    return web.Response(body=b"<svg>" + b" " * 4096 + b"</svg>", content_type="image/svg+xml")
+
+async def stream(request):
+    response = web.StreamResponse(headers={"Content-Type": "text/event-stream"})
+    await response.prepare(request)
+    await response.write(b"data: " + b"x" * 4096 + b"\n\n")
+    return response
+
+def make_client() -> TestClient:
+    app = web.Application(middlewares=[compression_middleware])
+    app["settings"] = Settings({})
+    app.router.add_get("/api/large", large)
+    app.router.add_get("/api/tagged", tagged)
+    app.router.add_get("/api/small", small)
+    app.router.add_get("/api/stream", stream)
+    app.router.add_get("/api/image.svg", image)
+    app.router.add_get("/large", large)
+    return TestClient(TestServer(app))
+
+async def test_large_api_responses_are_compressed():
+    async with make_client() as client:
+        response = await client.get("/api/large", headers={"Accept-Encoding": "gzip"})
+        assert response.headers["Content-Encoding"] == "gzip"
+        assert "Accept-Encoding" in response.headers["Vary"]
+        assert await response.json() == LARGE
+
+async def test_identity_without_accept_encoding():
+    async with make_client() as client:
+        response = await client.get("/api/large", headers={"Accept-Encoding": "identity"}, auto_decompress=False)
+        assert "Content-Encoding" not in response.headers
+        assert await response.json() == LARGE
+
+async def test_small_streamed_and_non_api_responses_are_left_alone():
+    async with make_client() as client:
+        for path in ("/api/small", "/api/stream", "/large"):
+            response = await client.get(path, headers={"Accept-Encoding": "gzip"})
+            assert "Content-Encoding" not in response.headers, path
+            await response.read()
+
+async def test_images_are_not_compressed():
+    async with make_client() as client:
+        response = await client.get("/api/image.svg", headers={"Accept-Encoding": "gzip"}, auto_decompress=False)
+        assert "Content-Encoding" not in response.headers
+        assert len(await response.read()) > 4096
+
+async def test_compressed_responses_have_weak_etags():
+    async with make_client() as client:
+        response = await client.get("/api/tagged", headers={"Accept-Encoding": "gzip"})
+        assert response.headers["Content-Encoding"] == "gzip"
+        assert response.headers["ETag"] == 'W/"v1"'
+        await response.read()
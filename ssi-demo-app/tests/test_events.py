@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""EventBus fan-out and the Server-Sent Events stream of a connection"""
+
+import asyncio
+import json
+from contextlib import asynccontextmanager
+
+from aiohttp.test_utils import TestClient, TestServer
+
+from app import create_app
+from src.backend.config import Settings
+from src.backend.events import EventBus, event_bus
+from src.backend.flows import FlowType
+
+def test_events_reach_every_subscriber_of_the_connection():
+    bus = EventBus()
+    first, second = bus.subscribe("c1"), bus.subscribe("c1")
+    other = bus.subscribe("c2")
+    bus.publish("c1", "connection", {"state": "active"})
+    assert first.get_nowait() == second.get_nowait() == ("connection", {"state": "active"})
+    assert other.empty()
+
+    bus.unsubscribe("c1", first)
+    assert bus.subscriber_count("c1") == 1 and bus.subscriber_count() == 2
+    bus.unsubscribe("c1", second)
+    bus.unsubscribe("c2", other)
+    assert bus.subscriber_count() == 0
+
+def test_slow_subscribers_lose_events_instead_of_blocking():
+    bus = EventBus(queue_size=2)
+    queue = bus.subscribe("c1")
+    for n in range(3):
+        bus.publish("c1", "proof", {"n": n})
+    assert [queue.get_nowait()[1]["n"] for _ in range(queue.qsize())] == [0, 1]
+
+def test_close_ends_every_stream():
+    bus = EventBus()
+    queues = [bus.subscribe("c1"), bus.subscribe("c2")]
+    bus.close()
+    assert [queue.get_nowait() for queue in queues] == [None, None]
+
+@asynccontextmanager
+async def events_client(**environ):
+    """Client for an app marked ready without an agent behind it"""
+    settings = Settings({
+        # Nothing listens on the discard port
+        "SSI_ADMIN_URL": "http://127.0.0.1:9",
+        "SSI_LEDGER_CACHE": "false",
+        "SSI_RECONCILE_INTERVAL": "0",
+        "SSI_STATE_SWEEP_INTERVAL": "0",
+        "SSI_METRICS": "false",
+        "SSI_WEBHOOKS": "true",
+        **environ
+    })
+    async with TestClient(TestServer(await create_app(settings))) as client:
+        client.server.app["readiness"].mark_ready()
+        yield client
+
+async def read_event(response) -> tuple:
+    """The next ``(event, data)`` on a stream, skipping keep-alive comments"""
+    event, data = None, None
+    while True:
+        line = (await asyncio.wait_for(response.content.readline(), timeout=5)).decode().rstrip("\n")
+        if line.startswith("event: "):
+            event = line[len("event: "):]
+        elif line.startswith("data: "):
+            data = json.loads(line[len("data: "):])
+        elif not line and event is not None:
+            return event, data
+
+async def wait_for_subscribers(connection_id: str, count: int = 1):
+    for _ in range(100):
+        if event_bus.subscriber_count(connection_id) == count:
+            return
+        await asyncio.sleep(0.01)
+    raise AssertionError(f"{connection_id} has {event_bus.subscriber_count(connection_id)} subscribers")
+
+async def test_subscribers_get_the_current_state_then_live_changes():
+    async with events_client() as client:
+        store = client.server.app["state_store"]
+        await store.update_connection("e1", {"type": FlowType.ISSUER, "status": "request", "rfc23_state": "request-received",
+                                             "credential_exchange_id": "cx1", "credential_state": "offer_sent"})
+
+        response = await client.get("/api/events/e1")
+        assert response.status == 200
+        assert response.headers["Content-Type"] == "text/event-stream"
+        assert await read_event(response) == ("ready", {"push": True})
+        # A page that subscribes after the webhooks were handled starts from the stored state
+        assert await read_event(response) == ("connection", {"connected": False, "state": "request", "rfc23_state": "request-received"})
+        event, data = await read_event(response)
+        assert (event, data["state"]) == ("credential", "offer_sent")
+
+        await wait_for_subscribers("e1")
+        webhook = await client.post("/webhooks/topic/connections/", json={
+            "connection_id": "e1", "state": "response", "rfc23_state": "response-sent"
+        })
+        assert webhook.status == 200
+        assert await read_event(response) == ("connection", {"connected": False, "state": "response", "rfc23_state": "response-sent"})
+
+        # Shutting the bus down ends the stream and drops the subscription
+        event_bus.close()
+        assert await asyncio.wait_for(response.content.read(), timeout=5) == b""
+        await wait_for_subscribers("e1", 0)
+
+async def test_unknown_connections_only_get_the_ready_event():
+    async with events_client() as client:
+        response = await client.get("/api/events/unknown")
+        assert await read_event(response) == ("ready", {"push": True})
+        event_bus.publish("unknown", "proof", {"state": "request_sent"})
+        assert await read_event(response) == ("proof", {"state": "request_sent"})
+        response.close()
+
+async def test_pages_are_told_to_poll_when_events_cannot_be_pushed():
+    # Without webhooks nothing is published, and with several workers the webhook
+    # may be handled by a process other than the one holding the stream
+    for environ in ({"SSI_WEBHOOKS": "false"}, {"SSI_WORKERS": "2"}):
+        async with events_client(**environ) as client:
+            response = await client.get("/api/events/c1")
+            assert await read_event(response) == ("ready", {"push": False})
+            response.close()
+
+    async with events_client(SSI_WEBHOOKS="auto") as client:
+        response = await client.get("/api/events/c1")
+        assert await read_event(response) == ("ready", {"push": False})
+        response.close()
+
+        # The first webhook shows that ACA-Py delivers them to this process
+        await client.post("/webhooks/topic/connections/", json={"connection_id": "c1", "state": "active"})
+        response = await client.get("/api/events/c1")
+        assert await read_event(response) == ("ready", {"push": True})
+        response.close()
+
+async def test_streams_wait_for_the_agent_like_other_api_routes():
+    async with events_client() as client:
+        client.server.app["readiness"].ready = False
+        assert (await client.get("/api/events/c1")).status == 503
@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""FlowRecord serialisation and migration of records persisted by older versions"""
+
+from src.backend.flows import FlowRecord, FlowStage, FlowType
+
+def test_round_trip_keeps_enums_and_drops_unset_fields():
+    record = FlowRecord("c1", type="issuer", stage="credential_offered", status="active",
+                        attributes={"username": "alice"})
+    data = record.to_dict()
+    assert data == {
+        "connection_id": "c1",
+        "type": "issuer",
+        "stage": "credential_offered",
+        "status": "active",
+        "attributes": {"username": "alice"}
+    }
+
+    restored = FlowRecord.from_dict(data)
+    assert restored.type is FlowType.ISSUER
+    assert restored.stage is FlowStage.CREDENTIAL_OFFERED
+    assert restored.to_dict() == data
+
+def test_from_dict_ignores_unknown_keys_and_none():
+    assert FlowRecord.from_dict(None) is None
+    record = FlowRecord.from_dict({"connection_id": "c1", "status": "active", "no_longer_used": 1})
+    assert record.to_dict() == {"connection_id": "c1", "status": "active"}
+
+def test_legacy_flags_become_stages():
+    issued = FlowRecord.from_dict({"connection_id": "c1", "type": "issuer", "credential_issued": True})
+    assert issued.stage is FlowStage.CREDENTIAL_OFFERED
+
+    requested = FlowRecord.from_dict({
+        "connection_id": "c2", "type": "verifier", "proof_requested": True, "force_requested": True
+    })
+    assert requested.stage is FlowStage.PROOF_REQUESTED
+    assert requested.forced is True
+
+    # A typed record without any flag is still waiting for its connection
+    invited = FlowRecord.from_dict({"connection_id": "c3", "type": "verifier", "proof_requested": False})
+    assert invited.stage is FlowStage.INVITED
+    assert "proof_requested" not in invited.to_dict()
+
+def test_legacy_flags_do_not_override_a_stage():
+    record = FlowRecord.from_dict({
+        "connection_id": "c1", "type": "verifier", "stage": "invited", "proof_requested": True
+    })
+    assert record.stage is FlowStage.INVITED
+
+def test_copy_is_independent():
+    record = FlowRecord("c1", status="invitation")
+    copy = record.copy()
+    copy.status = "active"
+    assert record.status == "invitation"
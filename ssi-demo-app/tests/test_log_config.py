@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""Structured, sampled and queued logging"""
+
+import json
+import logging
+import sys
+
+import pytest
+
+from src.backend.config import Settings
+from src.backend.log_config import JsonFormatter, PathSampler, configure_logging, stop_logging
+
+def record(level: int = logging.INFO, **extra) -> logging.LogRecord:
+    return logging.makeLogRecord({"name": "src.backend.ssi_agent", "levelno": level,
+                                  "levelname": logging.getLevelName(level), "msg": "%s -> %s",
+                                  "args": ("GET", 200), **extra})
+
+@pytest.fixture
+def root_logger():
+    """The root logger, with its handlers and level restored afterwards"""
+    root = logging.getLogger()
+    handlers, level = list(root.handlers), root.level
+    yield root
+    stop_logging()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    for handler in handlers:
+        root.addHandler(handler)
+    root.setLevel(level)
+
+def test_json_lines_include_extra_fields():
+    entry = json.loads(JsonFormatter().format(record(admin_path="/connections/{id}", duration_ms=1.5)))
+    assert entry["message"] == "GET -> 200"
+    assert (entry["level"], entry["logger"]) == ("INFO", "src.backend.ssi_agent")
+    assert (entry["admin_path"], entry["duration_ms"]) == ("/connections/{id}", 1.5)
+    assert "args" not in entry and "msg" not in entry
+
+def test_json_lines_include_exceptions():
+    try:
+        raise ValueError("bad input")
+    except ValueError:
+        entry = json.loads(JsonFormatter().format(record(logging.ERROR, exc_info=sys.exc_info())))
+    assert entry["exception"].endswith("ValueError: bad input")
+
+def test_admin_lines_are_sampled_by_the_longest_prefix():
+    sampler = PathSampler({"/connections": 0.0, "/connections/{id}/accept": 1.0, "/schemas": 0.5})
+    assert sampler.rate("/connections/{id}") == 0.0
+    assert sampler.rate("/connections/{id}/accept-request") == 1.0
+    assert sampler.rate("/schemas/{id}") == 0.5
+    assert sampler.rate("/present-proof/records") == 1.0
+
+    assert not sampler.filter(record(admin_path="/connections/{id}"))
+    assert sampler.filter(record(admin_path="/connections/{id}/accept-request"))
+    # Problems and lines that are not about admin calls are always kept
+    assert sampler.filter(record(logging.ERROR, admin_path="/connections/{id}"))
+    assert sampler.filter(record())
+
+def test_sample_rates_come_from_the_environment():
+    settings = Settings({"SSI_LOG_SAMPLE": "/connections=0.01, /status=0", "SSI_LOG_FORMAT": "json"})
+    assert settings.logging_options() == {
+        "level": "INFO", "fmt": "json", "sample_rates": {"/connections": 0.01, "/status": 0.0}, "use_queue": True
+    }
+
+def test_queued_records_are_written_by_the_listener(root_logger, capsys):
+    configure_logging("info", "json", {"/status": 0.0})
+    logger = logging.getLogger("src.backend.webhooks")
+    logger.info("connection %s", {"state": "active"})
+    logger.info("polled", extra={"admin_path": "/status"})
+    logger.debug("not at this level")
+    stop_logging()
+
+    lines = [json.loads(line) for line in capsys.readouterr().err.splitlines()]
+    assert [line["message"] for line in lines] == ["connection {'state': 'active'}"]
+
+def test_unknown_formats_are_rejected(root_logger):
+    with pytest.raises(ValueError):
+        configure_logging(fmt="xml")
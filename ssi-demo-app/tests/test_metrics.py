@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""Prometheus metrics: instruments, templates and the /metrics route"""
+
+from aiohttp import web
+from aiohttp.test_utils import TestClient, TestServer
+
+from src.backend.metrics import (EXPOSITION_CONTENT_TYPE, Counter, Histogram, admin_path_template,
+                                 metrics_middleware, routes as metrics_routes)
+from src.backend.state_store import MemoryStateStore
+
+def sample(text: str, name: str) -> float:
+    """Value of the exposition line starting with ``name``"""
+    for line in text.splitlines():
+        if line.startswith(name + " "):
+            return float(line.rsplit(" ", 1)[1])
+    return 0.0
+
+def test_counters_render_with_labels():
+    counter = Counter("test_total", "Things", ("kind",))
+    counter.inc("a")
+    counter.inc("a", amount=2)
+    counter.inc('say "hi"')
+    assert counter.render() == [
+        "# HELP test_total Things",
+        "# TYPE test_total counter",
+        'test_total{kind="a"} 3',
+        'test_total{kind="say \\"hi\\""} 1'
+    ]
+
+def test_histograms_are_cumulative():
+    histogram = Histogram("test_seconds", "Latency", buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 5.0):
+        histogram.observe(value)
+    assert histogram.render()[2:] == [
+        'test_seconds_bucket{le="0.1"} 1',
+        'test_seconds_bucket{le="1"} 2',
+        'test_seconds_bucket{le="+Inf"} 3',
+        "test_seconds_sum 5.55",
+        "test_seconds_count 3"
+    ]
+
+def test_admin_paths_are_templated_by_id():
+    assert admin_path_template("/connections/3fa85f64-5717-4562-b3fc-2c963f66afa6?state=active") == "/connections/{id}"
+    assert admin_path_template("/connections/create-invitation") == "/connections/create-invitation"
+    assert admin_path_template("/connections/any-name/accept-request") == "/connections/{id}/accept-request"
+    assert admin_path_template("/schemas/Th7MpTaRZVRYnPiabds81Y:2:demo:1.0") == "/schemas/{id}"
+    assert admin_path_template("/present-proof/records/abc/verify-presentation") == "/present-proof/records/{id}/verify-presentation"
+
+async def status(request):
+    return web.json_response({"connection_id": request.match_info["connection_id"]})
+
+async def test_routes_are_counted_by_template():
+    app = web.Application(middlewares=[metrics_middleware])
+    app["state_store"] = MemoryStateStore()
+    app.router.add_routes(metrics_routes)
+    app.router.add_get("/api/status/{connection_id}", status)
+    async with TestClient(TestServer(app)) as client:
+        before = await (await client.get("/metrics")).text()
+        for path in ("/api/status/c1", "/api/status/c2", "/nowhere"):
+            await client.get(path)
+        await app["state_store"].update_connection("c1", {"status": "active"})
+
+        response = await client.get("/metrics")
+        assert response.headers["Content-Type"] == EXPOSITION_CONTENT_TYPE
+        after = await response.text()
+
+    ok = 'ssi_http_requests_total{method="GET",route="/api/status/{connection_id}",status="200"}'
+    missing = 'ssi_http_requests_total{method="GET",route="unmatched",status="404"}'
+    assert sample(after, ok) - sample(before, ok) == 2
+    assert sample(after, missing) - sample(before, missing) == 1
+    assert sample(after, "ssi_state_connections") == 1
+    # The scrape being served is the only request in flight
+    assert sample(after, "ssi_http_requests_in_flight") == 1
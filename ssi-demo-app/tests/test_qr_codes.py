@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""Invitation QR codes: the render pool, its cache and the image route"""
+
+import asyncio
+import threading
+import time
+from contextlib import asynccontextmanager
+
+from aiohttp.test_utils import TestClient, TestServer
+
+from app import create_app
+from src.backend.config import Settings
+from src.backend import qr_codes
+from src.backend.flows import FlowType
+from src.backend.qr_codes import QRCodeRenderer, build_qr_payload
+
+INVITATION_URL = "https://example.com/invite?oob=abc"
+
+def counting_renders(monkeypatch, delay: float = 0) -> list:
+    """Replace the real render with a slow fake; returns the payloads and threads it ran with"""
+    calls = []
+
+    def render(qr_data, fmt, box_size, border):
+        calls.append((qr_data, threading.current_thread().name))
+        time.sleep(delay)
+        return f"{fmt}:{qr_data}".encode()
+
+    monkeypatch.setattr(qr_codes, "render_qr_image", render)
+    return calls
+
+def test_invitations_are_encoded_as_urls():
+    assert build_qr_payload(INVITATION_URL) == INVITATION_URL
+    assert build_qr_payload('{"@id": "1"}') == "https://didcomm.org/out-of-band/?oob=%7B%22%40id%22%3A%20%221%22%7D"
+    assert build_qr_payload("not json") == "not json"
+
+async def test_images_are_real_png_and_svg():
+    renderer = QRCodeRenderer()
+    try:
+        assert (await renderer.render(INVITATION_URL, "png")).startswith(b"\x89PNG")
+        assert b"<svg" in await renderer.render(INVITATION_URL, "svg")
+    finally:
+        renderer.close()
+
+async def test_renders_run_in_the_pool_and_are_shared(monkeypatch):
+    calls = counting_renders(monkeypatch, delay=0.05)
+    renderer = QRCodeRenderer(max_workers=2)
+    try:
+        images = await asyncio.gather(*(renderer.render(INVITATION_URL) for _ in range(5)))
+        assert images == [f"png:{INVITATION_URL}".encode()] * 5
+        assert len(calls) == 1 and calls[0][1].startswith("qr-render")
+        assert renderer._inflight == {}
+    finally:
+        renderer.close()
+
+async def test_the_cache_evicts_the_least_recently_used(monkeypatch):
+    calls = counting_renders(monkeypatch)
+    renderer = QRCodeRenderer(cache_size=2)
+    try:
+        for data in ("https://a", "https://b", "https://a", "https://c", "https://a", "https://b"):
+            await renderer.render(data)
+        # "b" was the least recently used when "c" came in, so only it is rendered again
+        assert [qr_data for qr_data, _ in calls] == ["https://a", "https://b", "https://c", "https://b"]
+        assert len(renderer._cache) == 2
+    finally:
+        renderer.close()
+
+async def test_a_zero_cache_size_renders_every_time(monkeypatch):
+    calls = counting_renders(monkeypatch)
+    renderer = QRCodeRenderer(cache_size=0)
+    try:
+        await renderer.render(INVITATION_URL)
+        await renderer.render(INVITATION_URL)
+        assert len(calls) == 2 and not renderer._cache
+    finally:
+        renderer.close()
+
+@asynccontextmanager
+async def qr_client(**environ):
+    """Client for an app marked ready, with one connection that has an invitation"""
+    settings = Settings({
+        # Nothing listens on the discard port
+        "SSI_ADMIN_URL": "http://127.0.0.1:9",
+        "SSI_LEDGER_CACHE": "false",
+        "SSI_RECONCILE_INTERVAL": "0",
+        "SSI_STATE_SWEEP_INTERVAL": "0",
+        "SSI_METRICS": "false",
+        **environ
+    })
+    async with TestClient(TestServer(await create_app(settings))) as client:
+        app = client.server.app
+        app["readiness"].mark_ready()
+        await app["state_store"].update_connection("c1", {"type": FlowType.ISSUER, "status": "invitation",
+                                                          "invitation_url": INVITATION_URL})
+        yield client
+
+async def test_matching_etags_are_answered_without_rendering():
+    async with qr_client() as client:
+        renderer = client.server.app["qr_renderer"]
+        response = await client.get("/api/qr/c1.png")
+        assert response.status == 200
+        etag = response.headers["ETag"]
+        assert len(renderer._cache) == 1
+
+        renderer._cache.clear()
+        for if_none_match in (etag, f"W/{etag}", f'"other", {etag}'):
+            response = await client.get("/api/qr/c1.png", headers={"If-None-Match": if_none_match})
+            assert response.status == 304, if_none_match
+            assert response.headers["ETag"] == etag
+            assert await response.read() == b""
+        assert len(renderer._cache) == 0
+
+        response = await client.get("/api/qr/c1.png", headers={"If-None-Match": '"other"'})
+        assert response.status == 200
+
+async def test_each_format_has_its_own_etag():
+    async with qr_client() as client:
+        png = await client.get("/api/qr/c1.png")
+        svg = await client.get("/api/qr/c1.svg")
+        assert png.headers["ETag"] != svg.headers["ETag"]
+        response = await client.get("/api/qr/c1.svg", headers={"If-None-Match": png.headers["ETag"]})
+        assert response.status == 200
+
+async def test_images_keep_their_strong_etag_when_gzip_is_accepted():
+    async with qr_client(SSI_COMPRESSION_MIN_SIZE="1") as client:
+        for fmt in ("png", "svg"):
+            response = await client.get(f"/api/qr/c1.{fmt}", headers={"Accept-Encoding": "gzip"}, auto_decompress=False)
+            assert "Content-Encoding" not in response.headers, fmt
+            assert not response.headers["ETag"].startswith("W/")
+
+async def test_renders_are_served_from_the_cache():
+    async with qr_client() as client:
+        renderer = client.server.app["qr_renderer"]
+        first = await (await client.get("/api/qr/c1.svg")).read()
+        key, cached = next(iter(renderer._cache.items()))
+        assert cached == first
+
+        # A cached image is returned as is, without a new render
+        renderer._cache[key] = b"<svg>cached</svg>"
+        assert await (await client.get("/api/qr/c1.svg")).read() == b"<svg>cached</svg>"
+
+async def test_qr_codes_are_served_as_cacheable_images():
+    async with qr_client() as client:
+        for fmt, content_type, magic in (("png", "image/png", b"\x89PNG"), ("svg", "image/svg+xml", b"<")):
+            response = await client.get(f"/api/qr/c1.{fmt}")
+            assert response.status == 200
+            assert response.content_type == content_type
+            assert response.headers["Cache-Control"] == "private, max-age=86400, immutable"
+            assert (await response.read()).startswith(magic)
+
+async def test_qr_codes_need_a_connection_with_an_invitation():
+    async with qr_client() as client:
+        await client.server.app["state_store"].update_connection("c2", {"type": FlowType.VERIFIER, "status": "active"})
+        for path in ("/api/qr/unknown.png", "/api/qr/c2.png", "/api/qr/c1.gif"):
+            assert (await client.get(path)).status == 404, path
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""Supervised bootstrap, the readiness gate and the health probes"""
+
+import asyncio
+
+from aiohttp import web
+from aiohttp.test_utils import TestClient, TestServer
+
+from src.backend.readiness import Readiness, readiness_middleware, routes as readiness_routes, supervise_bootstrap
+
+async def test_bootstrap_is_retried_with_backoff_until_it_succeeds(monkeypatch):
+    readiness = Readiness()
+    outcomes = [RuntimeError("ledger unreachable"), False, True]
+    sleeps = []
+
+    async def setup():
+        outcome = outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    real_sleep = asyncio.sleep
+
+    async def sleep(delay):
+        sleeps.append(delay)
+        await real_sleep(0)
+
+    monkeypatch.setattr(asyncio, "sleep", sleep)
+    await supervise_bootstrap(readiness, setup, retry_delay=1.0, max_retry_delay=1.5)
+
+    assert sleeps == [1.0, 1.5]
+    assert readiness.ready and readiness.attempts == 3
+    assert readiness.last_error is None and readiness.ready_at is not None
+
+async def test_failed_attempts_are_reported_until_cancelled():
+    readiness = Readiness()
+
+    async def setup():
+        raise RuntimeError("ledger unreachable")
+
+    task = asyncio.ensure_future(supervise_bootstrap(readiness, setup, retry_delay=0.01, max_retry_delay=0.01))
+    await asyncio.sleep(0.05)
+    task.cancel()
+    await asyncio.gather(task, return_exceptions=True)
+    assert not readiness.ready and readiness.attempts > 1
+    assert readiness.last_error == "ledger unreachable"
+
+async def agent_info(request):
+    return web.json_response({"success": True})
+
+async def webhook(request):
+    return web.json_response({"status": "ok"})
+
+class Agent:
+    schema_id = "s1"
+    cred_def_id = "cd1"
+
+def make_client() -> TestClient:
+    app = web.Application(middlewares=[readiness_middleware])
+    app["readiness"] = Readiness()
+    app["ssi_agent"] = Agent()
+    app.router.add_routes(readiness_routes)
+    app.router.add_route("*", "/api/agent/info", agent_info)
+    app.router.add_post("/webhooks/topic/{topic}/", webhook)
+    return TestClient(TestServer(app))
+
+async def test_api_routes_wait_for_bootstrap():
+    async with make_client() as client:
+        response = await client.get("/api/agent/info")
+        assert response.status == 503
+        assert response.headers["Retry-After"] == "1"
+        assert not (await response.json())["success"]
+        # CORS preflights and webhooks are answered while starting
+        assert (await client.options("/api/agent/info")).status == 200
+        assert (await client.post("/webhooks/topic/connections/", json={})).status == 200
+
+        client.server.app["readiness"].mark_ready()
+        assert (await client.get("/api/agent/info")).status == 200
+
+async def test_probes_report_liveness_and_readiness():
+    async with make_client() as client:
+        app = client.server.app
+        assert (await client.get("/healthz")).status == 200
+        response = await client.get("/readyz")
+        assert response.status == 503
+        assert (await response.json())["ready"] is False
+
+        app["readiness"].mark_ready()
+        assert (await client.get("/healthz")).status == 200
+        response = await client.get("/readyz")
+        assert response.status == 200
+        body = await response.json()
+        assert (body["ready"], body["schema_id"], body["cred_def_id"]) == (True, "s1", "cd1")
+        assert "agents" not in body
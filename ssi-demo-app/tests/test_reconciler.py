@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""FlowReconciler against the benchmark's fake ACA-Py with webhooks turned off"""
+
+import asyncio
+from contextlib import asynccontextmanager
+
+from aiohttp.test_utils import TestClient, TestServer
+
+from app import create_app
+from benchmarks.fake_acapy import create_fake_acapy_app
+from src.backend.config import Settings
+from src.backend.flows import FlowStage
+from src.backend.reconciler import FlowReconciler
+
+@asynccontextmanager
+async def reconciled_client(agents: int = 1):
+    """Client for an app whose agents never send webhooks; passes are run by the tests"""
+    fakes = [
+        TestServer(create_fake_acapy_app(latency=0.001, accept_after=0.05, step_delay=0.02, webhook_url=None))
+        for _ in range(agents)
+    ]
+    for fake in fakes:
+        await fake.start_server()
+    settings = Settings({
+        "SSI_ADMIN_URLS": ",".join(str(fake.make_url("")).rstrip("/") for fake in fakes),
+        "SSI_AGENT_HEALTH_INTERVAL": "0",
+        "SSI_LEDGER_CACHE": "false",
+        "SSI_RECONCILE_INTERVAL": "0",
+        "SSI_STATE_SWEEP_INTERVAL": "0",
+        "SSI_METRICS": "false"
+    })
+    try:
+        async with TestClient(TestServer(await create_app(settings))) as client:
+            for _ in range(100):
+                if client.server.app["readiness"].ready:
+                    break
+                await asyncio.sleep(0.05)
+            assert client.server.app["readiness"].ready
+            yield client
+    finally:
+        for fake in fakes:
+            await fake.close()
+
+async def reconcile_until(app, done, reconciler: FlowReconciler = None):
+    reconciler = reconciler or app["flow_reconciler"]
+    for _ in range(50):
+        await reconciler.reconcile()
+        if await done():
+            return True
+        await asyncio.sleep(0.05)
+    return False
+
+async def test_flows_complete_without_webhooks():
+    async with reconciled_client() as client:
+        app = client.server.app
+        store = app["state_store"]
+        response = await client.post("/api/issuer/create-invitation", json={
+            "username": "alice", "email": "a@example.com", "occupation": "Engineer", "citizenship": "NL"
+        })
+        issuer_id = (await response.json())["connection_id"]
+        response = await client.post("/api/verifier/create-invitation", json={})
+        verifier_id = (await response.json())["connection_id"]
+
+        async def finished():
+            issuer = await store.get_connection(issuer_id)
+            verifier = await store.get_connection(verifier_id)
+            return issuer.credential_state == "credential_acked" and verifier.proof_state == "verified"
+
+        assert await reconcile_until(app, finished)
+        issuer = await store.get_connection(issuer_id)
+        assert issuer.stage == FlowStage.CREDENTIAL_OFFERED
+        verifier = await store.get_connection(verifier_id)
+        assert verifier.proof_attributes is not None
+        # Reconciled state must not make the status routes trust the store as webhook-fed
+        assert issuer.webhook_updated_at is None and verifier.webhook_updated_at is None
+
+async def test_abandoned_invitations_are_not_reconciled():
+    async with reconciled_client() as client:
+        app = client.server.app
+        store = app["state_store"]
+        response = await client.post("/api/verifier/create-invitation", json={})
+        connection_id = (await response.json())["connection_id"]
+        await asyncio.sleep(0.2)
+
+        stale = FlowReconciler(app, interval=0, max_age=0.1)
+        assert (await stale.reconcile())["connected"] == 0
+        assert (await store.get_connection(connection_id)).status != "active"
+
+        async def connected():
+            return (await store.get_connection(connection_id)).status == "active"
+
+        assert await reconcile_until(app, connected)
+
+async def test_flows_on_every_pooled_agent_are_reconciled():
+    async with reconciled_client(agents=2) as client:
+        app = client.server.app
+        store = app["state_store"]
+        responses = await asyncio.gather(*(
+            client.post("/api/verifier/create-invitation", json={}) for _ in range(6)
+        ))
+        connection_ids = [(await response.json())["connection_id"] for response in responses]
+        owners = {(await store.get_connection(connection_id)).admin_url for connection_id in connection_ids}
+        assert len(owners) == 2
+
+        async def finished():
+            records = [await store.get_connection(connection_id) for connection_id in connection_ids]
+            return all(record.proof_state == "verified" for record in records)
+
+        assert await reconcile_until(app, finished)
+        assert await store.query_connections(finished=False) == []
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""StateSweeper compaction and eviction"""
+
+import asyncio
+
+from src.backend.flows import FlowStage, FlowType
+from src.backend.retention import StateSweeper
+
+async def add_finished_flow(store, connection_id: str):
+    await store.update_connection(connection_id, {
+        "type": FlowType.ISSUER,
+        "stage": FlowStage.CREDENTIAL_OFFERED,
+        "status": "active",
+        "invitation": {"@id": "invitation"},
+        "invitation_url": "http://agent/?oob=1",
+        "attributes": {"username": "alice"},
+        "credential_exchange_id": "cx1",
+        "credential_state": "credential_acked"
+    })
+
+async def test_finished_flows_are_compacted_to_a_summary(store):
+    await add_finished_flow(store, "done")
+    await store.update_connection("open", {"type": FlowType.ISSUER, "status": "invitation",
+                                           "attributes": {"username": "bob"}})
+
+    stats = await StateSweeper(store, idle_ttl=0, completed_ttl=0).sweep()
+    assert stats == {"compacted": 1, "evicted": 0, "campaigns_expired": 0}
+
+    done = await store.get_connection("done")
+    assert done.compacted_at is not None
+    assert done.invitation is None and done.attributes is None
+    # Enough is kept to answer status polls and serve the QR image after a reload
+    assert done.credential_state == "credential_acked"
+    assert done.invitation_url == "http://agent/?oob=1"
+
+    assert (await store.get_connection("open")).attributes == {"username": "bob"}
+
+async def test_compaction_only_looks_at_records_changed_since_the_last_pass(store):
+    sweeper = StateSweeper(store, idle_ttl=0, completed_ttl=0)
+    await add_finished_flow(store, "c1")
+    assert (await sweeper.sweep())["compacted"] == 1
+    assert (await sweeper.sweep())["compacted"] == 0
+
+async def test_idle_and_completed_flows_are_evicted_after_their_ttls(store):
+    await store.update_connection("idle", {"type": FlowType.VERIFIER, "status": "invitation"})
+    await add_finished_flow(store, "done")
+    await asyncio.sleep(0.1)
+    await store.update_connection("fresh", {"type": FlowType.VERIFIER, "status": "invitation"})
+
+    # Unfinished flows expire after idle_ttl, finished ones are kept until completed_ttl
+    stats = await StateSweeper(store, idle_ttl=0.05, completed_ttl=3600).sweep()
+    assert stats["evicted"] == 1
+    assert await store.get_connection("idle") is None
+    assert await store.get_connection("done") is not None
+    assert await store.get_connection("fresh") is not None
+
+    await asyncio.sleep(0.1)
+    stats = await StateSweeper(store, idle_ttl=0, completed_ttl=0.05).sweep()
+    assert stats["evicted"] == 1
+    assert await store.get_connection("done") is None
+    # A TTL of 0 keeps unfinished flows forever
+    assert await store.get_connection("fresh") is not None
+
+async def test_polling_an_abandoned_flow_does_not_keep_it_alive(store):
+    await store.update_connection("idle", {"type": FlowType.ISSUER, "status": "invitation"})
+    await asyncio.sleep(0.1)
+    # What the status routes write on every poll
+    await store.update_connection("idle", {"status": "invitation"}, create=False)
+
+    assert (await StateSweeper(store, idle_ttl=0.05, completed_ttl=0).sweep())["evicted"] == 1
+
+async def test_old_finished_campaigns_expire(store):
+    await store.put_campaign("old", {"campaign_id": "old", "created_at": "2020-01-01T00:00:00", "status": "sent"})
+    await store.put_campaign("new", {"campaign_id": "new", "created_at": "2999-01-01T00:00:00", "status": "sent"})
+
+    stats = await StateSweeper(store, idle_ttl=0, completed_ttl=60).sweep()
+    assert stats["campaigns_expired"] == 1
+    assert await store.get_campaign("old") is None
+    assert await store.get_campaign("new") is not None
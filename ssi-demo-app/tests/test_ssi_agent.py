@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""SSIAgent admin client: GET coalescing, the micro-TTL cache and ledger id caching"""
+
+import asyncio
+from contextlib import asynccontextmanager
+
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from src.backend import ssi_agent
+from src.backend.ledger_cache import LedgerCache
+from src.backend.ssi_agent import SSIAgent
+
+class CountingAdmin:
+    """Admin API whose GETs are slow enough to overlap and are counted per path"""
+
+    def __init__(self, delay: float = 0.05):
+        self.delay = delay
+        self.hits = {}
+
+    async def get(self, request):
+        self.hits[request.path] = self.hits.get(request.path, 0) + 1
+        await asyncio.sleep(self.delay)
+        if request.path == "/failing":
+            return web.Response(status=500, text="Internal Server Error")
+        return web.json_response({"path": request.path, "hit": self.hits[request.path]})
+
+    async def post(self, request):
+        return web.json_response({"success": True})
+
+    def app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_get("/{tail:.*}", self.get)
+        app.router.add_post("/{tail:.*}", self.post)
+        return app
+
+@asynccontextmanager
+async def admin_agent(admin: CountingAdmin, **options):
+    server = TestServer(admin.app())
+    await server.start_server()
+    agent = SSIAgent(str(server.make_url("")).rstrip("/"), **options)
+    await agent.start_session()
+    try:
+        yield agent
+    finally:
+        await agent.close_session()
+        await server.close()
+
+async def test_concurrent_gets_share_one_request():
+    admin = CountingAdmin()
+    async with admin_agent(admin) as agent:
+        results = await asyncio.gather(*(agent.admin_request("GET", "/connections/c1") for _ in range(10)))
+        assert admin.hits == {"/connections/c1": 1}
+        assert all(result == {"path": "/connections/c1", "hit": 1} for result in results)
+
+        # Different paths are not merged, and without a TTL nothing is reused afterwards
+        await asyncio.gather(agent.admin_request("GET", "/connections/c2"), agent.admin_request("GET", "/connections/c1"))
+        assert admin.hits == {"/connections/c1": 2, "/connections/c2": 1}
+
+async def test_results_are_reused_for_the_ttl():
+    admin = CountingAdmin(delay=0)
+    async with admin_agent(admin, get_cache_ttl=0.2) as agent:
+        assert (await agent.admin_request("GET", "/connections/c1"))["hit"] == 1
+        assert (await agent.admin_request("GET", "/connections/c1"))["hit"] == 1
+
+        await asyncio.sleep(0.25)
+        assert (await agent.admin_request("GET", "/connections/c1"))["hit"] == 2
+
+async def test_writes_clear_the_cache():
+    admin = CountingAdmin(delay=0)
+    async with admin_agent(admin, get_cache_ttl=60) as agent:
+        await agent.admin_request("GET", "/connections/c1")
+        await agent.admin_request("POST", "/connections/c1/accept-request", {})
+        assert (await agent.admin_request("GET", "/connections/c1"))["hit"] == 2
+
+async def test_errors_are_not_cached():
+    admin = CountingAdmin(delay=0)
+    async with admin_agent(admin, get_cache_ttl=60) as agent:
+        assert "error" in await agent.admin_request("GET", "/failing")
+        assert "error" in await agent.admin_request("GET", "/failing")
+        assert admin.hits["/failing"] == 2
+
+async def test_cancelling_the_leading_caller_does_not_abort_the_request():
+    admin = CountingAdmin(delay=0.1)
+    async with admin_agent(admin) as agent:
+        leader = asyncio.ensure_future(agent.admin_request("GET", "/connections/c1"))
+        await asyncio.sleep(0.02)
+        follower = asyncio.ensure_future(agent.admin_request("GET", "/connections/c1"))
+        await asyncio.sleep(0.02)
+        leader.cancel()
+
+        assert (await follower)["hit"] == 1
+        assert leader.cancelled()
+        assert admin.hits == {"/connections/c1": 1}
+        # The finished request no longer counts as in flight
+        assert agent._inflight_gets == {}
+
+class LedgerAdmin:
+    """Admin API resolving a fixed set of ledger ids; schemas become readable after ``schema_reads`` attempts"""
+
+    def __init__(self, schemas=(), cred_defs=(), schema_reads: int = 1):
+        self.schemas = set(schemas)
+        self.cred_defs = set(cred_defs)
+        self.schema_reads = schema_reads
+        self.reads = 0
+
+    async def schema(self, request):
+        self.reads += 1
+        if request.match_info["id"] in self.schemas and self.reads >= self.schema_reads:
+            return web.json_response({"schema": {"id": request.match_info["id"]}})
+        return web.json_response({"schema": None})
+
+    async def cred_def(self, request):
+        if request.match_info["id"] in self.cred_defs:
+            return web.json_response({"credential_definition": {"id": request.match_info["id"]}})
+        return web.Response(status=404, text="Not found")
+
+    def app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_get("/schemas/{id}", self.schema)
+        app.router.add_get("/credential-definitions/{id}", self.cred_def)
+        return app
+
+def test_ledger_cache_is_keyed_by_agent_and_did(tmp_path):
+    cache = LedgerCache(str(tmp_path / "ledger.json"))
+    assert cache.get("http://a", "did1") is None
+    cache.put("http://a/", "did1", "s1", "cd1")
+    assert cache.get("http://a", "did1")["cred_def_id"] == "cd1"
+    assert cache.get("http://a", "did2") is None and cache.get("http://b", "did1") is None
+
+    # Another process reading the file sees the same entries
+    assert LedgerCache(cache.path).get("http://a", "did1")["schema_id"] == "s1"
+    cache.discard("http://a", "did1")
+    assert cache.get("http://a", "did1") is None
+
+def test_unreadable_ledger_caches_are_ignored(tmp_path):
+    path = tmp_path / "ledger.json"
+    path.write_text("{not json")
+    cache = LedgerCache(str(path))
+    assert cache.get("http://a", "did1") is None
+    cache.put("http://a", "did1", "s1", "cd1")
+    assert cache.get("http://a", "did1")["schema_id"] == "s1"
+
+async def test_cached_ledger_ids_are_used_while_the_ledger_resolves_them(tmp_path):
+    path = str(tmp_path / "ledger.json")
+    admin = LedgerAdmin(schemas={"s1"}, cred_defs={"cd1"})
+    server = TestServer(admin.app())
+    await server.start_server()
+    agent = SSIAgent(str(server.make_url("")).rstrip("/"), ledger_cache_path=path)
+    await agent.start_session()
+    try:
+        assert not await agent.load_cached_ledger_ids("did1")
+
+        agent.ledger_cache.put(agent.admin_url, "did1", "s1", "cd1")
+        assert await agent.load_cached_ledger_ids("did1")
+        assert (agent.schema_id, agent.cred_def_id) == ("s1", "cd1")
+
+        # A ledger reset leaves stale ids behind, which are dropped
+        agent.schema_id = agent.cred_def_id = None
+        admin.cred_defs.clear()
+        assert not await agent.load_cached_ledger_ids("did1")
+        assert agent.cred_def_id is None
+        assert agent.ledger_cache.get(agent.admin_url, "did1") is None
+    finally:
+        await agent.close_session()
+        await server.close()
+
+async def test_new_schemas_are_polled_until_readable(monkeypatch):
+    monkeypatch.setattr(ssi_agent, "LEDGER_READY_INTERVAL", 0.01)
+    monkeypatch.setattr(ssi_agent, "LEDGER_READY_TIMEOUT", 0.2)
+    admin = LedgerAdmin(schemas={"s1"}, schema_reads=3)
+    server = TestServer(admin.app())
+    await server.start_server()
+    agent = SSIAgent(str(server.make_url("")).rstrip("/"))
+    await agent.start_session()
+    try:
+        assert await agent.wait_for_schema("s1")
+        assert admin.reads == 3
+
+        # Setup goes on when the schema never shows up
+        assert not await agent.wait_for_schema("missing")
+    finally:
+        await agent.close_session()
+        await server.close()
@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""Behaviour shared by the memory and SQLite state store backends"""
+
+import asyncio
+import json
+import sqlite3
+
+from src.backend.flows import FlowRecord, FlowStage, FlowType
+from src.backend.state_store import SQLiteStateStore
+
+async def test_update_creates_and_merges(store):
+    record = await store.update_connection("c1", {"type": FlowType.ISSUER, "status": "invitation"},
+                                           defaults={"stage": FlowStage.INVITED})
+    assert isinstance(record, FlowRecord)
+    assert record.updated_at is not None
+
+    record = await store.update_connection("c1", {"status": "active"}, defaults={"stage": FlowStage.PROOF_REQUESTED})
+    assert record.status == "active"
+    # Defaults never overwrite a field that is already set
+    assert record.stage == FlowStage.INVITED
+
+    stored = await store.get_connection("c1")
+    assert stored.type == FlowType.ISSUER
+    assert stored.to_dict() == record.to_dict()
+
+async def test_update_without_create_and_remove(store):
+    assert await store.update_connection("missing", {"status": "active"}, create=False) is None
+    assert await store.get_connection("missing") is None
+
+    await store.update_connection("c1", {"status": "active", "attributes": {"username": "alice"}})
+    record = await store.update_connection("c1", remove=["attributes"])
+    assert record.attributes is None
+    assert (await store.get_connection("c1")).attributes is None
+
+async def test_unchanged_update_is_not_stamped(store):
+    first = await store.update_connection("c1", {"status": "invitation"})
+    await asyncio.sleep(0.01)
+    repeated = await store.update_connection("c1", {"status": "invitation"})
+    assert repeated.updated_at == first.updated_at
+    assert (await store.get_connection("c1")).updated_at == first.updated_at
+
+    changed = await store.update_connection("c1", {"status": "active"})
+    assert changed.updated_at > first.updated_at
+
+async def test_conditional_update(store):
+    await store.update_connection("c1", {"status": "active"})
+    record = await store.update_connection("c1", {"status": "response"}, only_if=lambda r: r.status != "active")
+    assert record.status == "active"
+    assert (await store.get_connection("c1")).status == "active"
+
+    record = await store.update_connection("c1", {"status": "completed"}, only_if=lambda r: r.status == "active")
+    assert record.status == "completed"
+
+async def test_get_returns_copies(store):
+    await store.update_connection("c1", {"status": "invitation"})
+    record = await store.get_connection("c1")
+    record.status = "active"
+    assert (await store.get_connection("c1")).status == "invitation"
+
+async def test_claim_connection(store):
+    assert not await store.claim_connection("missing", "issuing")
+
+    await store.update_connection("c1", {"status": "active"})
+    assert await store.claim_connection("c1", "issuing")
+    assert not await store.claim_connection("c1", "issuing")
+    # Flags are independent of each other
+    assert await store.claim_connection("c1", "requesting_proof")
+    # A claim older than stale_after counts as abandoned
+    assert await store.claim_connection("c1", "issuing", stale_after=0)
+
+async def test_concurrent_claims_have_one_winner(store):
+    await store.update_connection("c1", {"status": "active"})
+    results = await asyncio.gather(*(store.claim_connection("c1", "issuing") for _ in range(20)))
+    assert results.count(True) == 1
+
+async def test_claims_are_atomic_across_sqlite_connections(tmp_path):
+    path = str(tmp_path / "shared.db")
+    stores = [SQLiteStateStore(path), SQLiteStateStore(path)]
+    for store in stores:
+        await store.open()
+    try:
+        await stores[0].update_connection("c1", {"status": "active"})
+        results = await asyncio.gather(*(stores[n % 2].claim_connection("c1", "issuing") for n in range(20)))
+        assert results.count(True) == 1
+    finally:
+        for store in stores:
+            await store.close()
+
+async def test_sqlite_adds_the_finished_index_to_old_databases(tmp_path):
+    path = str(tmp_path / "old.db")
+    db = sqlite3.connect(path)
+    db.execute("CREATE TABLE connections (connection_id TEXT PRIMARY KEY, type TEXT, status TEXT, "
+               "credential_exchange_id TEXT, presentation_exchange_id TEXT, created_at TEXT, "
+               "updated_at TEXT, data TEXT NOT NULL)")
+    for connection_id, proof_state in (("open", "request_sent"), ("done", "verified")):
+        data = {"connection_id": connection_id, "status": "active", "proof_state": proof_state}
+        db.execute("INSERT INTO connections (connection_id, status, data) VALUES (?, ?, ?)",
+                   (connection_id, "active", json.dumps(data)))
+    db.commit()
+    db.close()
+
+    store = SQLiteStateStore(path)
+    await store.open()
+    try:
+        assert [r.connection_id for r in await store.query_connections(finished=False)] == ["open"]
+        assert [r.connection_id for r in await store.query_connections(finished=True)] == ["done"]
+    finally:
+        await store.close()
+
+async def test_find_by_exchange(store):
+    await store.update_connection("c1", {"credential_exchange_id": "cx1"})
+    await store.update_connection("c2", {"presentation_exchange_id": "px1"})
+
+    assert (await store.find_connection_by_exchange(credential_exchange_id="cx1")).connection_id == "c1"
+    assert (await store.find_connection_by_exchange(presentation_exchange_id="px1")).connection_id == "c2"
+    assert await store.find_connection_by_exchange(presentation_exchange_id="unknown") is None
+
+    # Rebinding a connection to a new exchange drops the old lookup
+    await store.update_connection("c2", {"presentation_exchange_id": "px2"})
+    assert await store.find_connection_by_exchange(presentation_exchange_id="px1") is None
+    assert (await store.find_connection_by_exchange(presentation_exchange_id="px2")).connection_id == "c2"
+
+async def test_query_count_and_delete(store):
+    for number in range(5):
+        await store.update_connection(f"c{number}", {
+            "type": FlowType.ISSUER if number % 2 == 0 else FlowType.VERIFIER,
+            "status": "active" if number < 3 else "invitation",
+            "created_at": f"2026-01-0{number + 1}T00:00:00"
+        })
+
+    assert await store.count_connections() == 5
+    issuers = await store.query_connections(type="issuer")
+    assert [record.connection_id for record in issuers] == ["c0", "c2", "c4"]
+    active_verifiers = await store.query_connections(type=FlowType.VERIFIER, status="active")
+    assert [record.connection_id for record in active_verifiers] == ["c1"]
+    page = await store.query_connections(offset=1, limit=2)
+    assert [record.connection_id for record in page] == ["c1", "c2"]
+    older = await store.query_connections(created_before="2026-01-03T00:00:00")
+    assert [record.connection_id for record in older] == ["c0", "c1"]
+
+    assert await store.delete_connections(["c0", "c1", "missing"]) == 2
+    assert await store.count_connections() == 3
+    assert await store.get_connection("c0") is None
+
+async def test_query_by_finished(store):
+    await store.update_connection("open", {"status": "active", "credential_state": "offer_sent"})
+    await store.update_connection("issued", {"status": "active", "credential_state": "credential_acked"})
+    await store.update_connection("failed", {"status": "abandoned"})
+
+    assert [r.connection_id for r in await store.query_connections(finished=False)] == ["open"]
+    assert {r.connection_id for r in await store.query_connections(finished=True)} == {"issued", "failed"}
+
+    # The index follows updates
+    await store.update_connection("open", {"credential_state": "credential_acked"})
+    assert await store.query_connections(finished=False) == []
+    await store.delete_connections(["open", "issued", "failed"])
+    assert await store.query_connections(finished=True) == []
+
+async def test_campaign_results(store):
+    await store.put_campaign("k1", {"campaign_id": "k1", "created_at": "2026-01-01T00:00:00", "status": "sending"})
+    await store.put_campaign_results("k1", [{"connection_id": f"c{n}", "state": "pending"} for n in range(3)])
+    await store.put_campaign_results("k1", [
+        {"connection_id": "c1", "state": "request_sent", "presentation_exchange_id": "px1"}
+    ])
+
+    results, total = await store.get_campaign_results("k1")
+    assert total == 3
+    # Rewritten entries keep their position
+    assert [entry["connection_id"] for entry in results] == ["c0", "c1", "c2"]
+    assert await store.campaign_state_counts("k1") == {"pending": 2, "request_sent": 1}
+    assert await store.find_campaign_result("px1") == ("k1", results[1])
+
+    pending, total = await store.get_campaign_results("k1", state="pending", limit=1)
+    assert total == 2 and len(pending) == 1
+
+    # Campaigns still sending are never expired
+    assert await store.expire_campaigns("2027-01-01T00:00:00") == 0
+    await store.put_campaign("k1", {"campaign_id": "k1", "created_at": "2026-01-01T00:00:00", "status": "sent"})
+    assert await store.expire_campaigns("2027-01-01T00:00:00") == 1
+    assert await store.get_campaign("k1") is None
+
+async def test_tenants(store):
+    await store.put_tenant("acme", {"tenant_id": "acme", "wallet_id": "w1", "created_at": "2026-01-02T00:00:00"})
+    await store.put_tenant("beta", {"tenant_id": "beta", "wallet_id": "w2", "created_at": "2026-01-01T00:00:00"})
+
+    assert (await store.get_tenant("acme"))["wallet_id"] == "w1"
+    assert (await store.find_tenant_by_wallet("w2"))["tenant_id"] == "beta"
+    assert await store.find_tenant_by_wallet("w3") is None
+    assert [tenant["tenant_id"] for tenant in await store.list_tenants()] == ["beta", "acme"]
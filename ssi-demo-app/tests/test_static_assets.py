@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""The page and its content-hashed, pre-compressed assets"""
+
+import gzip
+import re
+
+from aiohttp import web
+from aiohttp.test_utils import TestClient, TestServer
+
+from src.templates.templates import IMMUTABLE_CACHE_CONTROL, Asset, StaticAssets, index_page, routes as static_routes
+
+def write_static(directory, css: str = "body { color: black; }\n" * 50):
+    (directory / "app.css").write_text(css)
+    (directory / "app.js").write_text("console.log('demo');\n")
+    (directory / "index.html").write_text('<link href="{{app.css}}"><script src="{{app.js}}"></script>\n')
+
+def make_client(assets: StaticAssets) -> TestClient:
+    app = web.Application()
+    app["static_assets"] = assets
+    app.router.add_get("/", index_page)
+    app.router.add_routes(static_routes)
+    return TestClient(TestServer(app))
+
+def test_asset_names_follow_their_content(tmp_path):
+    write_static(tmp_path)
+    before = StaticAssets(str(tmp_path))
+    page = before.index.encodings["identity"].decode()
+    urls = re.findall(r'"(/static/[^"]+)"', page)
+    assert [url.rsplit(".", 2)[0] for url in urls] == ["/static/app", "/static/app"]
+    assert sorted(before.assets) == sorted(url[len("/static/"):] for url in urls)
+
+    write_static(tmp_path, css="body { color: white; }\n" * 50)
+    after = StaticAssets(str(tmp_path))
+    css = [name for name in after.assets if name.endswith(".css")]
+    assert css != [name for name in before.assets if name.endswith(".css")]
+    assert [name for name in after.assets if name.endswith(".js")] == [name for name in before.assets if name.endswith(".js")]
+
+def test_encodings_are_only_kept_when_smaller():
+    large = Asset("app.css", b"body { color: black; }\n" * 50, IMMUTABLE_CACHE_CONTROL)
+    assert gzip.decompress(large.encodings["gzip"]) == large.encodings["identity"]
+    assert list(large.encodings)[-1] == "identity"
+    assert Asset("app.js", b"x", IMMUTABLE_CACHE_CONTROL).encodings.keys() == {"identity"}
+
+    assert large.negotiate("gzip, deflate") == "gzip"
+    assert large.negotiate("gzip;q=0, deflate") == "identity"
+    assert large.negotiate("*") == list(large.encodings)[0]
+    assert large.negotiate("") == "identity"
+    assert large.etag("gzip") != large.etag("identity")
+
+async def test_assets_are_served_compressed_and_revalidated(tmp_path):
+    write_static(tmp_path)
+    assets = StaticAssets(str(tmp_path))
+    css_name = next(name for name in assets.assets if name.endswith(".css"))
+    async with make_client(assets) as client:
+        response = await client.get(f"/static/{css_name}", headers={"Accept-Encoding": "gzip"}, auto_decompress=False)
+        assert response.status == 200
+        assert response.headers["Content-Encoding"] == "gzip"
+        assert response.headers["Content-Type"] == "text/css; charset=utf-8"
+        assert response.headers["Cache-Control"] == IMMUTABLE_CACHE_CONTROL
+        assert "Accept-Encoding" in response.headers["Vary"]
+        gzip_etag = response.headers["ETag"]
+        assert gzip.decompress(await response.read()) == (tmp_path / "app.css").read_bytes()
+
+        response = await client.get(f"/static/{css_name}", headers={"Accept-Encoding": "identity"})
+        assert "Content-Encoding" not in response.headers
+        identity_etag = response.headers["ETag"]
+        assert identity_etag != gzip_etag
+        await response.read()
+
+        # A validator only matches the encoding it was issued for
+        response = await client.get(f"/static/{css_name}", headers={"Accept-Encoding": "gzip", "If-None-Match": gzip_etag})
+        assert response.status == 304
+        response = await client.get(f"/static/{css_name}", headers={"Accept-Encoding": "gzip", "If-None-Match": identity_etag})
+        assert response.status == 200
+        await response.read()
+
+        assert (await client.get("/static/app.css")).status == 404
+
+async def test_the_page_is_revalidated_on_every_visit(tmp_path):
+    write_static(tmp_path)
+    async with make_client(StaticAssets(str(tmp_path))) as client:
+        response = await client.get("/")
+        assert response.headers["Cache-Control"] == "no-cache"
+        assert response.headers["Content-Type"] == "text/html; charset=utf-8"
+        assert "{{" not in await response.text()
+
+        response = await client.get("/", headers={"If-None-Match": response.headers["ETag"]})
+        assert response.status == 304
+
+def test_the_shipped_page_references_every_asset():
+    assets = StaticAssets()
+    page = assets.index.encodings["identity"].decode()
+    assert "{{" not in page
+    assert all(f"/static/{name}" in page for name in assets.assets)
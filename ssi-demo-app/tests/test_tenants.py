@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""Tenant token caching and the refresh-on-401 retry"""
+
+import asyncio
+import base64
+import json
+import time
+
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from src.backend.ssi_agent import SSIAgent
+from src.backend.tenants import TenantAgent, TokenCache, token_lifetime
+
+def make_jwt(claims: dict) -> str:
+    payload = base64.urlsafe_b64encode(json.dumps(claims).encode()).decode().rstrip("=")
+    return f"header.{payload}.signature"
+
+class FakeMultitenantAgent:
+    """Issues numbered tokens and rejects the ones listed in ``revoked``"""
+
+    def __init__(self):
+        self.issued = 0
+        self.revoked = set()
+        self.authorizations = []
+
+    async def token(self, request):
+        self.issued += 1
+        return web.json_response({"token": f"token-{self.issued}"})
+
+    async def connections(self, request):
+        authorization = request.headers.get("Authorization", "")
+        self.authorizations.append(authorization)
+        if authorization.removeprefix("Bearer ") in self.revoked:
+            return web.Response(status=401, text="Unauthorized")
+        return web.json_response({"results": []})
+
+    def app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_post("/multitenancy/wallet/{wallet_id}/token", self.token)
+        app.router.add_get("/connections", self.connections)
+        return app
+
+async def start_tenant_agent(fake: FakeMultitenantAgent):
+    server = TestServer(fake.app())
+    await server.start_server()
+    base = SSIAgent(str(server.make_url("")).rstrip("/"))
+    await base.start_session()
+    agent = TenantAgent(base, {"tenant_id": "acme", "wallet_id": "w1"}, TokenCache(ttl=3600))
+    return server, base, agent
+
+def test_token_lifetime_reads_the_exp_claim():
+    assert 590 < token_lifetime(make_jwt({"exp": time.time() + 600})) <= 600
+    assert token_lifetime(make_jwt({"wallet_id": "w1"})) is None
+    assert token_lifetime("not-a-jwt") is None
+
+async def test_token_cache_shares_one_fetch():
+    cache = TokenCache(ttl=3600)
+    fetches = 0
+
+    async def fetch():
+        nonlocal fetches
+        fetches += 1
+        await asyncio.sleep(0.01)
+        return "token"
+
+    tokens = await asyncio.gather(*(cache.get("w1", fetch) for _ in range(10)))
+    assert tokens == ["token"] * 10
+    assert await cache.get("w1", fetch) == "token"
+    assert fetches == 1
+
+    cache.invalidate("w1")
+    await cache.get("w1", fetch)
+    assert fetches == 2
+
+async def test_token_cache_refetches_expiring_tokens():
+    # A token expiring within the refresh margin is never reused
+    cache = TokenCache(ttl=3600)
+    fetches = 0
+
+    async def fetch():
+        nonlocal fetches
+        fetches += 1
+        return make_jwt({"exp": time.time() + 10})
+
+    await cache.get("w1", fetch)
+    await cache.get("w1", fetch)
+    assert fetches == 2
+
+async def test_tenant_requests_reuse_the_cached_token():
+    fake = FakeMultitenantAgent()
+    server, base, agent = await start_tenant_agent(fake)
+    try:
+        for _ in range(3):
+            assert await agent.admin_request("GET", "/connections") == {"results": []}
+        assert fake.issued == 1
+        assert fake.authorizations == ["Bearer token-1"] * 3
+    finally:
+        await base.close_session()
+        await server.close()
+
+async def test_tenant_request_refreshes_a_rejected_token_once():
+    fake = FakeMultitenantAgent()
+    server, base, agent = await start_tenant_agent(fake)
+    try:
+        await agent.admin_request("GET", "/connections")
+        fake.revoked.add("token-1")
+
+        result = await agent._send_admin_request("GET", "/connections")
+        assert result == {"results": []}
+        assert fake.issued == 2
+        assert fake.authorizations[-2:] == ["Bearer token-1", "Bearer token-2"]
+
+        # A token that is rejected even after refreshing is reported, not retried forever
+        fake.revoked.update({"token-2", "token-3"})
+        result = await agent._send_admin_request("GET", "/connections")
+        assert result["error"].startswith("Status 401")
+        assert fake.issued == 3
+    finally:
+        await base.close_session()
+        await server.close()
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""Spans, trace propagation and the traced request path"""
+
+import asyncio
+import json
+
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestClient, TestServer
+
+from src.backend.ssi_agent import SSIAgent
+from src.backend.state_store import MemoryStateStore
+from src.backend.tracing import (DISABLED_SPAN, FileExporter, TracedStateStore, create_exporter, span, trace_headers,
+                                 tracer, tracing_middleware)
+
+TRACE_ID = "4bf92f3577b34da6a3ce929d0e0e4736"
+
+class ListExporter:
+    def __init__(self):
+        self.spans = []
+
+    def export(self, span: dict):
+        self.spans.append(span)
+
+    def close(self):
+        pass
+
+@pytest.fixture
+def exported():
+    """Spans finished while the test runs, with tracing on"""
+    exporter = ListExporter()
+    tracer.configure(exporter)
+    yield exporter.spans
+    tracer.configure(None)
+
+def test_spans_are_not_recorded_while_tracing_is_off():
+    with span("work", connection_id="c1") as work:
+        assert work is DISABLED_SPAN
+        assert trace_headers() is None
+
+def test_children_join_the_trace_of_the_current_span(exported):
+    with span("request") as root:
+        with span("child", connection_id="c1", skipped=None) as child:
+            assert trace_headers() == {"traceparent": f"00-{root.trace_id}-{child.span_id}-01"}
+    assert trace_headers() is None
+
+    child, request = exported
+    assert (child["name"], request["name"]) == ("child", "request")
+    assert child["trace_id"] == request["trace_id"] and child["parent_id"] == request["span_id"]
+    assert request["parent_id"] is None
+    assert child["attributes"] == {"connection_id": "c1"}
+    assert child["status"] == request["status"] == "ok"
+
+def test_failures_and_cancellations_are_marked(exported):
+    with pytest.raises(ValueError):
+        with span("failing"):
+            raise ValueError("bad input")
+    with pytest.raises(asyncio.CancelledError):
+        with span("cancelled"):
+            raise asyncio.CancelledError()
+
+    failing, cancelled = exported
+    assert failing["status"] == "error" and failing["attributes"]["error"] == "ValueError: bad input"
+    assert cancelled["status"] == "cancelled"
+
+def test_incoming_trace_context_is_continued(exported):
+    with tracer.span("request", traceparent=f"00-{TRACE_ID}-00f067aa0ba902b7-01"):
+        pass
+    # Not sampled upstream, so neither the request nor its children are recorded
+    with tracer.span("request", traceparent=f"00-{TRACE_ID}-00f067aa0ba902b7-00") as unsampled:
+        assert not unsampled.recording
+        with span("child") as child:
+            assert not child.recording
+    # Malformed headers start a new trace
+    with tracer.span("request", traceparent="garbage"):
+        pass
+
+    continued, fresh = exported
+    assert (continued["trace_id"], continued["parent_id"]) == (TRACE_ID, "00f067aa0ba902b7")
+    assert fresh["trace_id"] != TRACE_ID and fresh["parent_id"] is None
+
+def test_roots_are_sampled(exported):
+    tracer.sample_rate = 0.0
+    with span("request"):
+        with span("child"):
+            pass
+    assert exported == []
+
+def test_file_exporter_writes_json_lines(tmp_path):
+    path = str(tmp_path / "traces.jsonl")
+    exporter = create_exporter("file", path)
+    assert isinstance(exporter, FileExporter)
+    exporter.export({"name": "a"})
+    exporter.export({"name": "b"})
+    exporter.close()
+    with open(path) as f:
+        assert [json.loads(line)["name"] for line in f] == ["a", "b"]
+    assert create_exporter("none") is None
+    with pytest.raises(ValueError):
+        create_exporter("zipkin")
+
+async def test_requests_are_traced_through_the_store_and_admin_calls(exported):
+    received = []
+
+    async def admin_connection(request):
+        received.append(request.headers.get("traceparent"))
+        return web.json_response({"connection_id": request.match_info["connection_id"], "state": "active"})
+
+    admin = web.Application()
+    admin.router.add_get("/connections/{connection_id}", admin_connection)
+
+    async def status(request):
+        connection_id = request.match_info["connection_id"]
+        result = await request.app["agent"].admin_request("GET", f"/connections/{connection_id}")
+        await request.app["store"].update_connection(connection_id, {"status": result["state"]})
+        return web.json_response(result)
+
+    async with TestServer(admin) as admin_server:
+        agent = SSIAgent(str(admin_server.make_url("")).rstrip("/"))
+        await agent.start_session()
+        app = web.Application(middlewares=[tracing_middleware])
+        app["agent"] = agent
+        app["store"] = TracedStateStore(MemoryStateStore())
+        app.router.add_get("/api/status/{connection_id}", status)
+        try:
+            async with TestClient(TestServer(app)) as client:
+                response = await client.get("/api/status/c1", headers={
+                    "traceparent": f"00-{TRACE_ID}-00f067aa0ba902b7-01"
+                })
+                assert response.status == 200
+        finally:
+            await agent.close_session()
+
+    admin_call, store_call, request = exported
+    assert request["name"] == "GET /api/status/{connection_id}"
+    assert request["attributes"]["connection_id"] == "c1" and request["attributes"]["http.status_code"] == 200
+    assert admin_call["name"] == "admin GET /connections/{id}"
+    assert store_call["name"] == "store.update_connection" and store_call["attributes"] == {"connection_id": "c1"}
+    assert {span["trace_id"] for span in exported} == {TRACE_ID}
+    assert admin_call["parent_id"] == store_call["parent_id"] == request["span_id"]
+    # ACA-Py is handed the admin call's span as the parent of anything it records
+    assert received == [f"00-{TRACE_ID}-{admin_call['span_id']}-01"]
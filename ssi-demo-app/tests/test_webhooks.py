@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""Webhook receiver: authentication, recorded state and proof confirmation"""
+
+from contextlib import asynccontextmanager
+
+from aiohttp.test_utils import TestClient, TestServer
+
+from app import create_app
+from src.backend.config import Settings
+from src.backend.flows import FlowType
+from src.backend.webhooks import apply_connection_record
+
+@asynccontextmanager
+async def webhook_client(**environ):
+    """Client for an app whose ACA-Py is unreachable, so it never finishes bootstrapping"""
+    settings = Settings({
+        # Nothing listens on the discard port
+        "SSI_ADMIN_URL": "http://127.0.0.1:9",
+        "SSI_LEDGER_CACHE": "false",
+        "SSI_RECONCILE_INTERVAL": "0",
+        "SSI_STATE_SWEEP_INTERVAL": "0",
+        "SSI_METRICS": "false",
+        **environ
+    })
+    async with TestClient(TestServer(await create_app(settings))) as client:
+        yield client
+
+async def test_webhooks_are_accepted_while_bootstrapping():
+    async with webhook_client() as client:
+        app = client.server.app
+        assert not app["readiness"].ready
+        await app["state_store"].update_connection("c1", {"type": FlowType.ISSUER, "status": "invitation_sent"})
+
+        response = await client.post("/webhooks/topic/connections/", json={
+            "connection_id": "c1", "state": "active", "rfc23_state": "completed"
+        })
+        assert response.status == 200
+
+        record = await app["state_store"].get_connection("c1")
+        assert record.status == "active"
+        assert record.webhook_updated_at is not None
+        assert app["webhook_state"]["enabled"]
+        # Other API routes still wait for the agent
+        assert (await client.get("/api/agent/info")).status == 503
+
+async def test_webhook_api_key_is_required_when_configured():
+    async with webhook_client(SSI_WEBHOOK_API_KEY="secret") as client:
+        store = client.server.app["state_store"]
+        await store.update_connection("c1", {"type": FlowType.ISSUER, "status": "invitation_sent"})
+        event = {"connection_id": "c1", "state": "active"}
+        assert (await client.post("/webhooks/topic/connections/", json=event)).status == 401
+        wrong = await client.post("/webhooks/topic/connections/", json=event, headers={"x-api-key": "guess"})
+        assert wrong.status == 401
+        assert (await store.get_connection("c1")).status == "invitation_sent"
+
+        response = await client.post("/webhooks/topic/connections/", json=event, headers={"x-api-key": "secret"})
+        assert response.status == 200
+        assert (await store.get_connection("c1")).status == "active"
+
+async def test_webhooks_for_unknown_connections_are_ignored():
+    async with webhook_client() as client:
+        store = client.server.app["state_store"]
+        for topic, event in (("connections", {"connection_id": "x1", "state": "active"}),
+                             ("issue_credential", {"connection_id": "x1", "state": "offer_sent"}),
+                             ("present_proof", {"connection_id": "x1", "state": "request_sent"})):
+            assert (await client.post(f"/webhooks/topic/{topic}/", json=event)).status == 200
+        assert await store.get_connection("x1") is None
+        assert await store.count_connections() == 0
+
+async def test_unconfirmed_verified_proof_is_not_stored_as_verified():
+    async with webhook_client() as client:
+        store = client.server.app["state_store"]
+        await store.update_connection("c1", {"type": FlowType.VERIFIER, "status": "active"})
+
+        response = await client.post("/webhooks/topic/present_proof/", json={
+            "connection_id": "c1",
+            "presentation_exchange_id": "px1",
+            "state": "verified",
+            "presentation": {"requested_proof": {"revealed_attrs": {"username": {"raw": "mallory"}}}}
+        })
+        assert response.status == 200
+
+        record = await store.get_connection("c1")
+        assert record.presentation_exchange_id == "px1"
+        assert record.proof_state != "verified"
+        assert record.proof_record is None and record.proof_attributes is None
+
+async def test_late_connection_webhooks_do_not_roll_state_back():
+    async with webhook_client() as client:
+        store = client.server.app["state_store"]
+        await store.update_connection("c1", {"type": FlowType.VERIFIER, "status": "invitation_sent"})
+
+        # ACA-Py delivers webhooks concurrently, so "active" can overtake "response"
+        for state, rfc23_state in (("request", "request-received"), ("active", "completed"),
+                                   ("response", "response-sent")):
+            response = await client.post("/webhooks/topic/connections/", json={
+                "connection_id": "c1", "state": state, "rfc23_state": rfc23_state
+            })
+            assert response.status == 200
+
+        record = await store.get_connection("c1")
+        assert (record.status, record.rfc23_state) == ("active", "completed")
+
+async def test_events_for_unknown_topics_are_acknowledged():
+    async with webhook_client() as client:
+        response = await client.post("/webhooks/topic/basicmessages/", json={"content": "hi"})
+        assert response.status == 200
+        assert (await response.json())["ignored"] == "basicmessages"
+        assert (await client.post("/webhooks/topic/connections/", data=b"{not json")).status == 400
+
+async def test_reconciled_connections_are_not_marked_as_webhook_fed():
+    async with webhook_client() as client:
+        app = client.server.app
+        await app["state_store"].update_connection("c1", {"type": FlowType.ISSUER, "status": "invitation_sent"})
+        await apply_connection_record(app, {"connection_id": "c1", "state": "active"}, None)
+
+        record = await app["state_store"].get_connection("c1")
+        assert record.status == "active"
+        assert record.webhook_updated_at is None
@@ -0,0 +1,18 @@
+#!/usr/bin/env python3
+"""Settings for multi-process serving"""
+
+from app import share_state_between_workers
+from src.backend.config import Settings
+
+def test_several_workers_share_a_sqlite_store():
+    settings = Settings({"SSI_STATE_DB_PATH": "/tmp/ssi.db"})
+    settings.workers = 4
+    share_state_between_workers(settings)
+    assert settings.state_store == "sqlite"
+    assert settings.state_db_path == "/tmp/ssi.db"
+
+def test_one_worker_keeps_the_memory_store():
+    settings = Settings({})
+    settings.workers = 1
+    share_state_between_workers(settings)
+    assert settings.state_store == "memory"
@@ -27,6 +27,13 @@ echo ""
 # Configuration
 LEDGER_URL="http://dev.greenlight.bcovrin.vonx.io"
 
+# ACA-Py posts connection, credential and proof events to the web app (--webhook-url);
+# with SSI_WEBHOOK_API_KEY set, the key is sent along as x-api-key
+WEBHOOK_URL="${WEBHOOK_URL:-http://localhost:8080/webhooks}"
+if [ -n "$SSI_WEBHOOK_API_KEY" ]; then
+    WEBHOOK_URL="${WEBHOOK_URL}#${SSI_WEBHOOK_API_KEY}"
+fi
+
 # Check if ngrok is available
 NGROK_AVAILABLE=false
 if command -v ngrok &> /dev/null; then
@@ -85,7 +92,7 @@ start_issuer() {
     
     # Use sudo with the exact command pattern that worked
     cd acapy
-    sudo LEDGER_URL="$LEDGER_URL" AGENT_ENDPOINT="$ISSUER_ENDPOINT" \
+    sudo LEDGER_URL="$LEDGER_URL" AGENT_ENDPOINT="$ISSUER_ENDPOINT" WEBHOOK_TARGET="$WEBHOOK_URL" \
         ./demo/run_demo run faber --bg &
     
     FABER_PID=$!
@@ -104,7 +111,7 @@ start_verifier() {
     
     # Use sudo with the exact command pattern
     cd acapy
-    sudo LEDGER_URL="$LEDGER_URL" AGENT_ENDPOINT="$VERIFIER_ENDPOINT" \
+    sudo LEDGER_URL="$LEDGER_URL" AGENT_ENDPOINT="$VERIFIER_ENDPOINT" WEBHOOK_TARGET="$WEBHOOK_URL" \
         ./demo/run_demo run alice --bg &
     
     ALICE_PID=$!
@@ -144,6 +151,7 @@ else
 fi
 
 echo -e "• Ledger: ${GREEN}$LEDGER_URL${NC}"
+echo -e "• Webhooks: ${GREEN}${WEBHOOK_URL%%#*}${NC}"
 
 if [ "$NGROK_AVAILABLE" = true ] && [ ! -z "$ISSUER_ENDPOINT" ] && [[ "$ISSUER_ENDPOINT" == *"ngrok"* ]]; then
     echo -e "• External Endpoint: ${GREEN}$ISSUER_ENDPOINT${NC}"